@@ -6,17 +6,20 @@
 2. 通过 include_router 注册 /api/crawl 路由（见 router.py），供前端或其他服务调用。
 3. 注册定时任务等生命周期钩子（见 lifecycle.py），支持自动化抓取。
 
+注意：本包会被解析进程池（spawn）的子进程导入（见 workers.py / parsers.py），
+因此这里不在导入时加载 router/services，避免子进程连带加载向量库等重量级依赖。
+
 API整合流程：
 - 主应用调用 setup_crawler(app)，本方法会自动注册爬虫路由和后台任务。
 - 所有爬虫相关 API 都通过 /api/crawl 暴露。
 """
-from fastapi import FastAPI  # 导入 FastAPI 主类，用于类型标注和应用实例传递
+from typing import TYPE_CHECKING  # 仅用于类型标注的导入
 
-from .router import router as crawler_router  # 导入爬虫路由对象，定义了 /api/crawl 相关接口
-from .lifecycle import crawler_lifespan  # 导入新版lifespan生命周期管理器
+if TYPE_CHECKING:
+    from fastapi import FastAPI  # 导入 FastAPI 主类，用于类型标注和应用实例传递
 
 
-def setup_crawler(app: FastAPI) -> None:
+def setup_crawler(app: "FastAPI") -> None:
         """
         挂载爬虫路由到主 FastAPI 应用。
         参数：app —— 主 FastAPI 应用实例。
@@ -24,7 +27,20 @@ def setup_crawler(app: FastAPI) -> None:
             1. 注册 /api/crawl 路由（由 router.py 提供），实现爬虫 API。
             2. 生命周期钩子已由 lifespan 统一管理，无需单独注册。
         """
+        from .router import router as crawler_router  # 导入爬虫路由对象，定义了 /api/crawl 相关接口
+
         app.include_router(crawler_router)  # 注册爬虫路由到主应用，所有 /api/crawl 请求由 router.py 处理
 
 
+def __getattr__(name: str):
+        """按需导出 crawler_router / crawler_lifespan，保持原有导入方式可用。"""
+        if name == "crawler_router":
+                from .router import router
+                return router
+        if name == "crawler_lifespan":
+                from .lifecycle import crawler_lifespan
+                return crawler_lifespan
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = ["setup_crawler", "crawler_router"]  # 模块导出，供主应用或其他模块引用
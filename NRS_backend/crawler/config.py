@@ -18,17 +18,50 @@ def _get_bool_env(name: str, default: bool) -> bool:
         return default
     return value.strip().lower() in {"1", "true", "yes", "on"}
 
-CRAWL_INTERVAL = int(os.getenv("CRAWL_INTERVAL", "3600"))  # 定时抓取间隔（秒），默认1小时
+CRAWL_INTERVAL = int(os.getenv("CRAWL_INTERVAL", "3600"))  # 新源的初始抓取间隔（秒），默认1小时
+CRAWL_MIN_INTERVAL = int(os.getenv("CRAWL_MIN_INTERVAL", "600"))  # 自适应调度的最短抓取间隔（秒）
+CRAWL_MAX_INTERVAL = int(os.getenv("CRAWL_MAX_INTERVAL", "86400"))  # 自适应调度的最长抓取间隔（秒）
+CRAWL_TARGET_ITEMS_PER_RUN = float(os.getenv("CRAWL_TARGET_ITEMS_PER_RUN", "1"))  # 期望平均每次抓取到的新条目数
+CRAWL_JITTER = float(os.getenv("CRAWL_JITTER", "0.1"))  # 抓取间隔的随机抖动比例（±）
 REQUEST_TIMEOUT = 30  # 单次请求超时时间（秒）
 MAX_RETRIES = 3       # 网络请求最大重试次数
+MAX_CONCURRENT_SOURCES = int(os.getenv("MAX_CONCURRENT_SOURCES", "4"))  # 定时任务中同时爬取的源数量上限
+SOURCE_CRAWL_TIMEOUT = float(os.getenv("SOURCE_CRAWL_TIMEOUT", "1800"))  # 单个源一次爬取的超时时间（秒），0表示不限
+HOST_RATE_LIMIT = float(os.getenv("HOST_RATE_LIMIT", "5"))  # 同一站点的平均请求速率上限（次/秒）
+HOST_BURST = int(os.getenv("HOST_BURST", "10"))  # 同一站点允许的突发请求数（令牌桶容量）
+HOST_INITIAL_CONCURRENCY = int(os.getenv("HOST_INITIAL_CONCURRENCY", "4"))  # 同一站点的初始并发请求数
+HOST_MIN_CONCURRENCY = int(os.getenv("HOST_MIN_CONCURRENCY", "1"))  # 自适应并发下限
+HOST_MAX_CONCURRENCY = int(os.getenv("HOST_MAX_CONCURRENCY", "16"))  # 自适应并发上限
+MAX_CONCURRENT_DOWNLOADS = int(os.getenv("MAX_CONCURRENT_DOWNLOADS", "8"))  # 全局附件/图片并发下载上限
+MAX_DOWNLOAD_BYTES = int(float(os.getenv("MAX_DOWNLOAD_MB", "100")) * 1024 * 1024)  # 单个附件/图片大小上限（MAX_DOWNLOAD_MB，单位MB）
+DOWNLOAD_SPOOL_THRESHOLD = int(float(os.getenv("DOWNLOAD_SPOOL_THRESHOLD_MB", "8")) * 1024 * 1024)  # 超过该大小的下载写入临时文件（MB）
+DOWNLOAD_SPOOL_DIR = os.getenv("DOWNLOAD_SPOOL_DIR") or None  # 下载临时文件目录，默认系统临时目录
+DOWNLOAD_TIMEOUT = int(os.getenv("DOWNLOAD_TIMEOUT", "120"))  # 单次附件/图片下载超时时间（秒）
+MAX_CONCURRENT_PARSES = int(os.getenv("MAX_CONCURRENT_PARSES", str(os.cpu_count() or 4)))  # 全局PDF/Word解析与OCR并发上限
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 4)))  # 解析/OCR进程池进程数，0表示使用线程
+PARSE_TASK_TIMEOUT = float(os.getenv("PARSE_TASK_TIMEOUT", "120"))  # 单个解析/OCR任务超时时间（秒）
+PARSE_MAX_TASKS_PER_CHILD = int(os.getenv("PARSE_MAX_TASKS_PER_CHILD", "50"))  # 子进程处理多少个任务后重建，0表示不限
+PARSE_CACHE_ENABLED = _get_bool_env("PARSE_CACHE_ENABLED", True)  # 是否缓存附件解析与OCR结果
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", "./data/parse_cache")  # 解析结果缓存目录
+PARSE_CACHE_MAX_BYTES = int(float(os.getenv("PARSE_CACHE_MAX_MB", "512")) * 1024 * 1024)  # 缓存总大小上限（PARSE_CACHE_MAX_MB，单位MB）
 AUTO_CRAWL_ENABLED = _get_bool_env("AUTO_CRAWL_ENABLED", True)  # 是否启用定时自动抓取
 
 VECTOR_SYNC_ENABLED = _get_bool_env("VECTOR_SYNC_ENABLED", True)  # 是否自动同步爬取内容到向量库
+VECTOR_SYNC_BATCH_SIZE = int(os.getenv("VECTOR_SYNC_BATCH_SIZE", "64"))  # 攒够多少条记录批量写入向量库
+VECTOR_SYNC_FLUSH_INTERVAL = float(os.getenv("VECTOR_SYNC_FLUSH_INTERVAL", "5"))  # 未攒满时最长多久刷新一次（秒）
+VECTOR_RESYNC_INTERVAL = float(os.getenv("VECTOR_RESYNC_INTERVAL", "300"))  # 后台重新同步未同步记录的间隔（秒）
+VECTOR_RESYNC_MAX_BACKOFF = float(os.getenv("VECTOR_RESYNC_MAX_BACKOFF", "3600"))  # 重新同步连续失败时的最大退避间隔（秒）
+VECTOR_RESYNC_MIN_AGE = float(os.getenv("VECTOR_RESYNC_MIN_AGE", "120"))  # 只重新同步入库超过该秒数的记录，避开仍在同步队列中的记录
+VECTOR_RESYNC_MAX_ATTEMPTS = int(os.getenv("VECTOR_RESYNC_MAX_ATTEMPTS", "5"))  # 单条记录重新同步失败多少次后不再自动重试，0表示不限
 
 TESSERACT_CMD = ""  # OCR工具tesseract命令路径，可用环境变量覆盖
 TESSDATA_DIR = ""   # OCR数据目录路径，可用环境变量覆盖
 
 DATABASE_PATH = os.getenv("CRAWLER_DB_PATH", "./data/crawler.db")  # SQLite数据库文件路径
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()  # WAL模式下的同步级别（OFF/NORMAL/FULL）
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))  # 每个连接的页缓存大小（KB）
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))  # 数据库被锁时的等待时间（毫秒）
+SQLITE_WRITE_BATCH_SIZE = int(os.getenv("SQLITE_WRITE_BATCH_SIZE", "256"))  # 单写线程每个事务最多合并的写请求数
 
 TARGET_SOURCES = [
     {
@@ -0,0 +1,138 @@
+"""
+附件/图片的流式下载与落盘。
+
+- 下载前按响应头预检：Content-Length 超过 MAX_DOWNLOAD_BYTES、或 Content-Type 与附件类型不符（如返回HTML错误页）时直接放弃；
+- 边下载边计算 SHA-256（供解析结果缓存使用），累计大小超过上限时中止；
+- 不超过 DOWNLOAD_SPOOL_THRESHOLD 的内容保存在内存，超过后写入临时文件，解析函数直接读取文件路径，
+  避免多个大文件同时驻留内存，也避免把大块字节序列化传给解析进程池；
+- 放弃或中止下载时通过 abort_response() 真正中断传输，而不是把剩余响应体读完再丢弃。
+"""
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import asyncio  # 文件写入转交线程、等待传输任务结束
+import hashlib  # 增量计算SHA-256
+import os  # 删除临时文件
+import tempfile  # 临时文件
+from typing import IO, Optional, Union  # 类型注解
+
+from .config import DOWNLOAD_SPOOL_DIR, DOWNLOAD_SPOOL_THRESHOLD, MAX_DOWNLOAD_BYTES  # 下载上限与落盘阈值
+
+SPOOL_WRITE_SIZE = 1024 * 1024  # 落盘时攒够多少字节交给线程写一次，避免每个小块都切换线程
+
+# 各附件类型可接受的Content-Type前缀；通用二进制类型与缺失的Content-Type总是放行
+EXPECTED_CONTENT_TYPES = {
+    "pdf": ("application/pdf", "application/x-pdf"),
+    "docx": ("application/vnd.openxmlformats-officedocument", "application/msword", "application/zip"),
+    "ocr": ("image/",),
+}
+GENERIC_CONTENT_TYPES = (
+    "application/octet-stream",
+    "binary/octet-stream",
+    "application/x-download",
+    "application/force-download",
+    "application/download",
+)
+
+
+class DownloadRejected(Exception):
+    """响应过大或类型不符，放弃下载（不重试）。"""
+
+
+class SpooledDownload:
+    """流式下载的结果：小文件保存在内存，大文件保存在临时文件中；用完后需调用close()。"""
+
+    def __init__(self, data: Optional[bytes], path: Optional[str], sha256: str, size: int) -> None:
+        self.data = data
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        """传给解析函数的输入：内存中的字节或临时文件路径。"""
+        return self.data if self.data is not None else self.path
+
+    def close(self) -> None:
+        """删除临时文件（若有）。"""
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+
+def check_response_headers(response, url: str, kind: Optional[str]) -> None:
+    """按Content-Length与Content-Type预检响应，不符合时抛出DownloadRejected。"""
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > MAX_DOWNLOAD_BYTES:
+        raise DownloadRejected(f"{url} is {int(length)} bytes, over the {MAX_DOWNLOAD_BYTES} byte limit")
+    content_type = (response.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+    if not content_type or not kind or content_type.startswith(GENERIC_CONTENT_TYPES):
+        return
+    if not content_type.startswith(EXPECTED_CONTENT_TYPES.get(kind, ())):
+        raise DownloadRejected(f"{url} returned unexpected Content-Type {content_type} for {kind}")
+
+
+async def abort_response(response) -> None:
+    """
+    中止并关闭流式响应。
+    curl_cffi 0.6 的 aclose() 只等待后台传输任务结束而不中止传输，其间响应体仍被不断写入无界队列；
+    这里先置位 quit_now 让写回调返回错误，再取消后台任务（服务端停止发送时写回调不会再被调用），
+    任务结束时curl句柄随之从multi中移除，连接断开。已完整读取的响应不受影响。
+    """
+    quit_now = getattr(response, "quit_now", None)
+    if quit_now is not None:
+        quit_now.set()
+    task = getattr(response, "stream_task", None)
+    if task is None:
+        await response.aclose()
+        return
+    if not task.done():
+        task.cancel()
+    await asyncio.wait([task])  # 等待取消完成；不直接await，避免吞掉调用方自身的取消
+
+
+def _open_spool() -> IO[bytes]:
+    return tempfile.NamedTemporaryFile(prefix="nrs-download-", dir=DOWNLOAD_SPOOL_DIR, delete=False)
+
+
+def _discard_spool(spool) -> None:
+    spool.close()
+    try:
+        os.remove(spool.name)
+    except FileNotFoundError:
+        pass
+
+
+async def spool_response(response, url: str) -> SpooledDownload:
+    """
+    流式读取响应体，增量计算SHA-256；超过落盘阈值后写入临时文件，超过大小上限时抛出DownloadRejected。
+    临时文件的创建与写入在线程中进行（每次写入 SPOOL_WRITE_SIZE 左右），不阻塞事件循环；
+    读取失败或任务被取消时删除临时文件。调用方负责用 abort_response() 关闭响应。
+    """
+    hasher = hashlib.sha256()
+    buffer = bytearray()  # 落盘前为全部内容，落盘后为尚未写入文件的部分
+    spool = None
+    size = 0
+    try:
+        async for chunk in response.aiter_content():
+            size += len(chunk)
+            if size > MAX_DOWNLOAD_BYTES:
+                raise DownloadRejected(f"{url} exceeded the {MAX_DOWNLOAD_BYTES} byte limit while downloading")
+            hasher.update(chunk)
+            buffer.extend(chunk)
+            if spool is None and size > DOWNLOAD_SPOOL_THRESHOLD:
+                spool = await asyncio.to_thread(_open_spool)
+            if spool is not None and len(buffer) >= SPOOL_WRITE_SIZE:
+                data, buffer = bytes(buffer), bytearray()
+                await asyncio.to_thread(spool.write, data)
+        if spool is None:
+            return SpooledDownload(bytes(buffer), None, hasher.hexdigest(), size)
+        await asyncio.to_thread(spool.write, bytes(buffer))
+        await asyncio.to_thread(spool.close)
+        return SpooledDownload(None, spool.name, hasher.hexdigest(), size)
+    except BaseException:
+        if spool is not None:
+            _discard_spool(spool)
+        raise
@@ -8,43 +8,134 @@ from __future__ import annotations  # 兼容未来类型注解语法
 import asyncio  # 异步任务调度
 import contextlib  # 异常抑制工具
 import logging  # 日志记录
+import time  # 调度时间戳
 from typing import Optional  # 类型注解
 
 from fastapi import FastAPI  # 导入FastAPI主类
 from contextlib import asynccontextmanager  # lifespan上下文管理器
 
-from .config import AUTO_CRAWL_ENABLED, CRAWL_INTERVAL, TARGET_SOURCES  # 配置项：自动抓取开关、间隔、目标源
+from .config import (  # 配置项：自动抓取开关、间隔、目标源、向量同步与重新同步参数
+    AUTO_CRAWL_ENABLED,
+    CRAWL_MIN_INTERVAL,
+    MAX_CONCURRENT_SOURCES,
+    SOURCE_CRAWL_TIMEOUT,
+    TARGET_SOURCES,
+    VECTOR_RESYNC_INTERVAL,
+    VECTOR_RESYNC_MAX_ATTEMPTS,
+    VECTOR_RESYNC_MAX_BACKOFF,
+    VECTOR_RESYNC_MIN_AGE,
+    VECTOR_SYNC_BATCH_SIZE,
+    VECTOR_SYNC_ENABLED,
+)
+from . import workers  # 解析/OCR进程池
+from .storage import database  # SQLite连接与写线程
+from .storage.text_cache import flush_text_cache  # 写回解析缓存的访问时间与URL映射
+from .scheduler import next_schedule  # 按源自适应计算下次抓取时间
 from .services import crawl_source  # 业务函数：执行实际爬取
+from .sync import resync_unsynced, vector_sync_queue  # 向量库批量同步队列与重新同步
 
 logger = logging.getLogger(__name__)  # 获取当前模块日志对象
 
 # 用于保存后台定时任务对象，便于启动/关闭管理
 _periodic_task: Optional[asyncio.Task] = None
+_resync_task: Optional[asyncio.Task] = None  # 未同步记录的后台重新同步任务
 
 
-async def _crawl_all_sources_once() -> None:
+async def _crawl_one_source(source_id: str, semaphore: asyncio.Semaphore) -> Optional[int]:
     """
-    依次遍历所有配置的目标源，顺序执行爬取任务。
-    每次爬取完成后记录日志，异常时警告。
+    在全局并发上限内爬取单个源，超时或异常只影响该源本身。
+    返回新增条目数，失败或超时返回None。
     """
-    for source in TARGET_SOURCES:
-        source_id = source["id"]
+    async with semaphore:
         try:
-            await crawl_source(source_id)  # 调用服务层异步爬取函数
-            logger.info("Periodic crawl finished for source %s", source_id)  # 正常完成日志
+            timeout = SOURCE_CRAWL_TIMEOUT if SOURCE_CRAWL_TIMEOUT > 0 else None
+            items = await asyncio.wait_for(crawl_source(source_id, incremental=True), timeout=timeout)  # 增量抓取，遇到已知条目即停止翻页
+            logger.info("Periodic crawl finished for source %s with %s new items", source_id, len(items))  # 正常完成日志
+            return len(items)
+        except asyncio.TimeoutError:
+            logger.warning("Periodic crawl timed out for source %s after %s seconds", source_id, SOURCE_CRAWL_TIMEOUT)  # 超时警告日志
         except Exception as exc:  # noqa: BLE001
             logger.warning("Periodic crawl failed for source %s: %s", source_id, exc)  # 异常警告日志
+        return None
 
 
-async def _periodic_crawl_loop() -> None:
+async def _run_scheduled_crawl(source_id: str, semaphore: asyncio.Semaphore) -> float:
+    """
+    执行一次调度：等到计划时间后抓取，再按新条目速率计算下次抓取时间并持久化。
+    返回距下次抓取的秒数。
+    """
+    schedule = await asyncio.to_thread(database.get_schedule, source_id)
+    delay = (schedule["next_run_at"] - time.time()) if schedule else 0
+    if delay > 0:
+        await asyncio.sleep(delay)
+    started = time.time()
+    new_items = await _crawl_one_source(source_id, semaphore)
+    updated = next_schedule(schedule, new_items, started)
+    logger.info(
+        "Next crawl for source %s in %.0f seconds (rate %.2f items/hour)",
+        source_id,
+        updated["next_run_at"] - time.time(),
+        updated["rate"],
+    )
+    try:
+        await asyncio.to_thread(database.save_schedule, source_id, **updated)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Failed to save crawl schedule for source %s: %s", source_id, exc)
+        return updated["next_run_at"] - time.time()  # 无法持久化时仍按计算出的时间等待
+    return 0
+
+
+async def _source_crawl_loop(source_id: str, semaphore: asyncio.Semaphore) -> None:
     """
-    后台循环任务，根据配置的间隔不断执行爬取。
+    单个源的调度循环，调度状态保存在SQLite中，重启后沿用；从未抓取过的源立即抓取一次。
+    读写调度状态出错（如数据库被锁）时记录日志，等待 CRAWL_MIN_INTERVAL 后重试，循环不会因此退出。
     """
     while True:
-        await _crawl_all_sources_once()  # 执行一次全源爬取
-        await asyncio.sleep(max(1, CRAWL_INTERVAL))  # 间隔等待后继续下一轮
+        try:
+            wait = await _run_scheduled_crawl(source_id, semaphore)
+        except Exception:  # noqa: BLE001
+            logger.exception("Crawl schedule failed for source %s, retrying in %s seconds", source_id, CRAWL_MIN_INTERVAL)
+            wait = CRAWL_MIN_INTERVAL
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+async def _periodic_crawl_loop() -> None:
+    """
+    后台任务：为每个目标源运行独立的调度循环，同时抓取的源数量受 MAX_CONCURRENT_SOURCES 限制。
+    每个源的循环是单独的任务，本任务被取消时一并取消所有源的循环。
+    """
+    semaphore = asyncio.Semaphore(max(1, MAX_CONCURRENT_SOURCES))
+    tasks = [
+        asyncio.create_task(_source_crawl_loop(source["id"], semaphore), name=f"crawl-{source['id']}")
+        for source in TARGET_SOURCES
+    ]
+    try:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 
+async def _resync_loop() -> None:
+    """
+    后台循环任务，定期把SQLite中未同步的记录重新写入向量库。
+    写入失败时按指数退避延长间隔（上限 VECTOR_RESYNC_MAX_BACKOFF），成功后恢复正常间隔。
+    """
+    delay = VECTOR_RESYNC_INTERVAL
+    while True:
+        await asyncio.sleep(max(1, delay))
+        try:
+            synced = await resync_unsynced(VECTOR_SYNC_BATCH_SIZE, VECTOR_RESYNC_MIN_AGE, VECTOR_RESYNC_MAX_ATTEMPTS)
+        except Exception as exc:  # noqa: BLE001
+            delay = min(max(delay, 1) * 2, VECTOR_RESYNC_MAX_BACKOFF)
+            logger.warning("Vector resync failed, retrying in %.0f seconds: %s", delay, exc)
+            continue
+        delay = VECTOR_RESYNC_INTERVAL
+        if synced:
+            logger.info("Resynced %s records to the vector store", synced)
+
 
 # lifespan事件管理器，替代原有startup/shutdown钩子
 @asynccontextmanager
@@ -53,10 +144,14 @@ async def crawler_lifespan(app: FastAPI):
     FastAPI推荐的生命周期管理方式。
     应用启动时自动开启定时任务，关闭时安全停止。
     """
-    global _periodic_task
+    global _periodic_task, _resync_task
+    await asyncio.to_thread(database.initialize)  # 初始化数据库表结构（不再在导入时执行）
+    if VECTOR_SYNC_ENABLED:
+        vector_sync_queue.start()  # 启动按时间刷新的向量同步任务
+        _resync_task = asyncio.create_task(_resync_loop())  # 启动未同步记录的重新同步任务
     if AUTO_CRAWL_ENABLED:
         _periodic_task = asyncio.create_task(_periodic_crawl_loop())  # 启动后台定时任务
-        logger.info("Started periodic crawler task with interval %s seconds", CRAWL_INTERVAL)  # 启动日志
+        logger.info("Started periodic crawler task for %s sources", len(TARGET_SOURCES))  # 启动日志
     yield  # 应用运行期间
     if _periodic_task:
         _periodic_task.cancel()  # 取消后台任务
@@ -64,3 +159,13 @@ async def crawler_lifespan(app: FastAPI):
             await _periodic_task  # 等待任务安全退出
         logger.info("Stopped periodic crawler task")  # 停止日志
         _periodic_task = None  # 清空任务对象
+    if _resync_task:
+        _resync_task.cancel()  # 停止重新同步任务
+        with contextlib.suppress(asyncio.CancelledError):
+            await _resync_task
+        _resync_task = None
+    if VECTOR_SYNC_ENABLED:
+        await vector_sync_queue.stop()  # 刷新剩余的待同步记录
+    workers.shutdown()  # 关闭解析/OCR进程池
+    flush_text_cache()  # 写回解析缓存中尚未落盘的访问时间与URL映射
+    database.close()  # 提交剩余写入并关闭数据库连接
@@ -16,8 +16,12 @@ class CrawlRequest(BaseModel):
         前端/客户端发起爬虫请求时的请求体结构。
         字段：
             source: str  # 要爬取的目标源ID（如 'bksy_ggtz'）
+            force: bool  # 是否强制重新抓取已入库的条目（默认False）
+            incremental: bool  # 是否增量抓取：逐页翻页，遇到整页已知条目即停止（默认False，抓取全部页）
         """
         source: str  # 目标源ID
+        force: bool = False  # 强制重新抓取，跳过“URL+标题+日期”预检
+        incremental: bool = False  # 增量抓取，遇到整页已知或早于水位线的条目即停止翻页
 
 
 class Attachments(BaseModel):
@@ -78,3 +82,21 @@ class CrawlResponse(BaseModel):
         """
         code: str = "200"  # 状态码
         data: List[CrawlItem]  # 爬取结果列表
+
+
+class ParseCacheStats(BaseModel):
+        """
+        /api/crawl/cache/stats接口的响应体（附件解析与OCR结果缓存指标）。
+        字段：
+            enabled: bool     # 是否启用缓存
+            entries/size_bytes/max_bytes  # 条目数、当前占用与上限（字节）
+            hits/misses/evictions/hit_rate  # 命中、未命中、淘汰次数及命中率
+        """
+        enabled: bool = True  # 是否启用缓存
+        entries: int = 0  # 缓存条目数
+        size_bytes: int = 0  # 当前占用字节数
+        max_bytes: int = 0  # 容量上限（字节）
+        hits: int = 0  # 命中次数
+        misses: int = 0  # 未命中次数
+        evictions: int = 0  # 淘汰次数
+        hit_rate: float = 0.0  # 命中率
@@ -0,0 +1,54 @@
+"""
+附件解析与OCR的纯函数实现。
+
+本模块只依赖解析库本身，不引入FastAPI、向量库等重量级依赖，
+以便在进程池（spawn）子进程中快速导入执行。
+"""
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import io  # 字节流处理
+from typing import BinaryIO, Union  # 类型注解
+
+from PyPDF2 import PdfReader  # PDF解析
+from docx import Document  # Word文档解析
+from PIL import Image  # 图片处理
+import pytesseract  # OCR文字识别
+
+
+def _open_input(source: Union[bytes, str]) -> Union[BinaryIO, str]:
+    """内存中的字节包装为字节流，文件路径原样返回（由解析库按需读取，不整体载入内存）。"""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def parse_pdf_bytes(file_bytes: Union[bytes, str]) -> str:
+    """Return concatenated text for all PDF pages (skipping empty extractions); accepts bytes or a file path."""
+    reader = PdfReader(_open_input(file_bytes))
+    texts = [page.extract_text() or "" for page in reader.pages]
+    return "\n".join(filter(None, texts))
+
+
+def parse_docx_bytes(file_bytes: Union[bytes, str]) -> str:
+    """Join all paragraph texts from a DOCX payload given as bytes or a file path."""
+    document = Document(_open_input(file_bytes))
+    return "\n".join(p.text for p in document.paragraphs if p.text)
+
+
+def ocr_image_bytes(
+    image_bytes: Union[bytes, str], tesseract_cmd: str, tessdata_dir: str, image_url: str = ""
+) -> str:
+    """
+    用pytesseract识别图片（字节或文件路径）中的文字（中文简体+英文）。
+    识别失败时打印警告并返回空字符串。
+    """
+    try:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        config_parts = []
+        if tessdata_dir:
+            config_parts.append(f'--tessdata-dir "{tessdata_dir}"')
+        config = " ".join(config_parts) or None
+        with Image.open(_open_input(image_bytes)) as img:
+            text = pytesseract.image_to_string(img, lang="chi_sim+eng", config=config)
+        return text.strip()
+    except (pytesseract.TesseractError, OSError) as exc:
+        print(f"[WARN] OCR failed for {image_url}: {exc}")
+        return ""
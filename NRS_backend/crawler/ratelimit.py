@@ -0,0 +1,180 @@
+"""
+按站点（host）的自适应限流。
+
+每个站点一个 HostLimiter，同时约束两件事：
+- 请求速率：令牌桶，平均 HOST_RATE_LIMIT 次/秒，允许 HOST_BURST 次突发；
+- 并发数：AIMD 自适应上限，在 [HOST_MIN_CONCURRENCY, HOST_MAX_CONCURRENCY] 之间调整。
+  请求成功且延迟未明显变差时缓慢加一，遇到 429/5xx/超时/网络错误时减半，令牌速率同步减半后逐步恢复；
+  响应带 Retry-After 时，该站点在指定时间之前不再发出新请求。
+
+列表页、详情页、附件与图片的请求都经由此模块，同一站点跨源、跨任务共享限流状态。
+附件与图片的许可只覆盖到响应头到达为止，响应体传输不计入延迟；传输中途失败由 report_transfer_failure() 单独退避。
+"""
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import asyncio  # 异步调度
+import time  # 单调时钟
+from email.utils import parsedate_to_datetime  # 解析HTTP日期格式的Retry-After
+from typing import Dict, Optional  # 类型注解
+from urllib.parse import urlparse  # 提取host
+
+from .config import (  # 限流参数
+    HOST_BURST,
+    HOST_INITIAL_CONCURRENCY,
+    HOST_MAX_CONCURRENCY,
+    HOST_MIN_CONCURRENCY,
+    HOST_RATE_LIMIT,
+)
+
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}  # 视为站点过载的状态码
+LATENCY_TOLERANCE = 2.0  # 延迟超过基线多少倍时停止增加并发
+RATE_RECOVERY = 0.05  # 每次成功请求恢复的令牌速率比例（相对上限）
+MAX_RETRY_AFTER = 600.0  # Retry-After 最长遵守时间（秒），防止异常值导致长时间停摆
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或HTTP日期），返回需要等待的秒数。"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class HostLimiter:
+    """单个站点的令牌桶 + AIMD 并发控制。"""
+
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.max_rate = max(0.01, HOST_RATE_LIMIT)
+        self.rate = self.max_rate
+        self.burst = max(1.0, float(HOST_BURST))
+        self.tokens = self.burst
+        self.min_limit = max(1, HOST_MIN_CONCURRENCY)
+        self.max_limit = max(self.min_limit, HOST_MAX_CONCURRENCY)
+        self.limit = float(min(max(HOST_INITIAL_CONCURRENCY, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.baseline_latency: Optional[float] = None
+        self._updated = time.monotonic()
+        self._condition = asyncio.Condition()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """等待并发名额、Retry-After 冷却期和令牌，三者都满足后返回。"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        try:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+        except BaseException:
+            await self._release()
+            raise
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def release(self, latency: float, status: Optional[int], retry_after: Optional[float]) -> None:
+        """
+        归还并发名额并根据结果调整限流参数。
+        status 为None表示请求异常（超时、连接失败等）。
+        """
+        if status is None or status in THROTTLE_STATUSES:
+            self._back_off(retry_after)
+        else:
+            self._on_success(latency)
+        await self._release()
+
+    def _on_success(self, latency: float) -> None:
+        if self.baseline_latency is None or latency < self.baseline_latency:
+            self.baseline_latency = latency
+        else:
+            self.baseline_latency = 0.95 * self.baseline_latency + 0.05 * latency  # 基线缓慢跟随
+        self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_RECOVERY)
+        if latency <= self.baseline_latency * LATENCY_TOLERANCE:
+            self.limit = min(float(self.max_limit), self.limit + 1 / max(self.limit, 1.0))  # 约每轮并发加一
+
+    def _back_off(self, retry_after: Optional[float]) -> None:
+        previous = int(self.limit)
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        if int(self.limit) < previous or retry_after:
+            print(
+                f"[WARN] throttling {self.host}: concurrency {previous} -> {int(self.limit)}, "
+                f"rate {self.rate:.2f}/s" + (f", retry after {retry_after:.0f}s" if retry_after else "")
+            )
+
+
+class HostPermit:
+    """
+    一次请求的限流许可：
+        async with host_permit(url) as permit:
+            response = await ...
+            permit.observe(response)
+    未调用 observe() 就退出（请求抛出异常）视为超时/网络错误。
+    """
+
+    def __init__(self, limiter: HostLimiter) -> None:
+        self._limiter = limiter
+        self._started = 0.0
+        self._status: Optional[int] = None
+        self._retry_after: Optional[float] = None
+
+    def observe(self, response) -> None:
+        """记录响应状态码与 Retry-After 头。"""
+        self._status = response.status_code
+        self._retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+    async def __aenter__(self) -> "HostPermit":
+        await self._limiter.acquire()
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        latency = time.monotonic() - self._started
+        await self._limiter.release(latency, self._status, self._retry_after)
+
+
+_LIMITERS: Dict[str, HostLimiter] = {}
+
+
+def _limiter_for(url: str) -> HostLimiter:
+    host = urlparse(url).netloc.lower()
+    limiter = _LIMITERS.get(host)
+    if limiter is None:
+        limiter = HostLimiter(host)
+        _LIMITERS[host] = limiter
+    return limiter
+
+
+def host_permit(url: str) -> HostPermit:
+    """获取指定URL所属站点的限流许可（站点限流器首次使用时创建）。"""
+    return HostPermit(_limiter_for(url))
+
+
+def report_transfer_failure(url: str) -> None:
+    """响应头之后的传输失败（连接中断、读超时）：按网络错误退避该站点，不影响延迟基线。"""
+    _limiter_for(url)._back_off(None)
@@ -6,12 +6,16 @@
 """
 from __future__ import annotations
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException
 
 # 数据模型：请求体、响应体、错误体
-from .models import CrawlRequest, CrawlResponse, ErrorResponse
+from .models import CrawlRequest, CrawlResponse, ErrorResponse, ParseCacheStats
 # 业务逻辑：实际抓取实现
 from .services import crawl_source
+# 附件解析与OCR结果缓存
+from .storage.text_cache import get_text_cache
 
 # 创建路由器实例
 router = APIRouter()
@@ -19,7 +23,9 @@ router = APIRouter()
 #
 # POST /api/crawl
 # 说明：
-#   - 请求体：{"source": "源ID"}
+#   - 请求体：{"source": "源ID", "force": false, "incremental": false}
+#   - force=true 时忽略已入库条目的预检，强制重新抓取详情页
+#   - incremental=true 时逐页翻页，遇到整页已知（或早于水位线）的条目即停止，默认并发抓取全部页
 #   - 用于触发某个官网/公众号的抓取任务
 #   - 返回抓取到的数据列表
 #   - 未知源返回 404，网络/解析异常返回 502
@@ -32,14 +38,14 @@ router = APIRouter()
 async def crawl_endpoint(payload: CrawlRequest) -> CrawlResponse:
     """
     触发指定 source 的抓取任务。
-    参数：payload.source（字符串，源标识）
+    参数：payload.source（字符串，源标识），payload.force（是否强制重新抓取），payload.incremental（是否增量抓取）
     返回：CrawlResponse（抓取结果数据）
     异常：
       - ValueError：源不存在，返回 404
       - RuntimeError：网络或解析失败，返回 502
     """
     try:
-        data = await crawl_source(payload.source)  # 调用服务层异步抓取
+        data = await crawl_source(payload.source, force=payload.force, incremental=payload.incremental)  # 调用服务层异步抓取
         return CrawlResponse(data=data)
     except ValueError as exc:
         # 未知源，返回 404
@@ -47,3 +53,19 @@ async def crawl_endpoint(payload: CrawlRequest) -> CrawlResponse:
     except RuntimeError as exc:
         # 网络/解析异常，返回 502
         raise HTTPException(status_code=502, detail=str(exc))
+
+
+#
+# GET /api/crawl/cache/stats
+# 说明：
+#   - 返回附件解析与OCR结果缓存的条目数、占用空间及命中/未命中/淘汰次数
+#   - 未启用缓存（PARSE_CACHE_ENABLED=false）时 enabled=false
+#
+@router.get("/api/crawl/cache/stats", response_model=ParseCacheStats)
+async def parse_cache_stats_endpoint() -> ParseCacheStats:
+    """返回附件解析与OCR结果缓存的运行指标。"""
+    cache = get_text_cache()
+    if cache is None:
+        return ParseCacheStats(enabled=False)
+    stats = await asyncio.to_thread(cache.stats)  # 读取SQLite索引，避免阻塞事件循环
+    return ParseCacheStats(**stats)
@@ -0,0 +1,65 @@
+"""
+按源自适应调整抓取间隔。
+
+每个源在SQLite的 source_schedule 表中保存上次成功抓取时间、观测到的新条目速率（指数加权平均，条/小时）
+和当前抓取间隔。每次抓取后按速率估算「平均每次抓到 CRAWL_TARGET_ITEMS_PER_RUN 条新公告」所需的间隔，
+没有新条目时间隔逐步翻倍；结果限制在 [CRAWL_MIN_INTERVAL, CRAWL_MAX_INTERVAL] 内并加入随机抖动，
+避免多个源总在同一时刻触发。
+"""
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import random  # 随机抖动
+from typing import Dict, Optional  # 类型注解
+
+from .config import (  # 调度参数
+    CRAWL_INTERVAL,
+    CRAWL_JITTER,
+    CRAWL_MAX_INTERVAL,
+    CRAWL_MIN_INTERVAL,
+    CRAWL_TARGET_ITEMS_PER_RUN,
+)
+
+RATE_SMOOTHING = 0.3  # 新条目速率的指数加权系数，越大越偏向最近一次观测
+IDLE_BACKOFF = 2.0  # 没有新条目时间隔的放大倍数
+
+
+def _clamp(interval: float) -> float:
+    low = max(1.0, CRAWL_MIN_INTERVAL)
+    return min(max(interval, low), max(low, CRAWL_MAX_INTERVAL))
+
+
+def _jittered(interval: float) -> float:
+    jitter = max(0.0, CRAWL_JITTER)
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+
+def next_schedule(
+    previous: Optional[Dict[str, Optional[float]]], new_items: Optional[int], now: float
+) -> Dict[str, Optional[float]]:
+    """
+    根据上一次的调度状态和本次抓取结果计算新的调度状态。
+    new_items 为本次新增条目数，抓取失败或超时时为None（保持速率与间隔不变）。
+    首次抓取（多为历史回填）不计入速率，使用 CRAWL_INTERVAL 作为初始间隔。
+    返回字段：last_run_at、next_run_at、interval（秒）、rate（条/小时）。
+    """
+    interval = _clamp(previous["interval"] if previous else CRAWL_INTERVAL)
+    rate = (previous["rate"] or 0.0) if previous else 0.0
+    last_run_at = previous["last_run_at"] if previous else None
+
+    if new_items is not None:
+        if last_run_at is not None:
+            elapsed_hours = max((now - last_run_at) / 3600, 1e-6)
+            observed = new_items / elapsed_hours
+            rate = RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * rate
+            if new_items > 0 and rate > 0:
+                interval = _clamp(CRAWL_TARGET_ITEMS_PER_RUN / rate * 3600)
+            else:
+                interval = _clamp(interval * IDLE_BACKOFF)
+        last_run_at = now
+
+    return {
+        "last_run_at": last_run_at,
+        "next_run_at": now + _jittered(interval),
+        "interval": interval,
+        "rate": rate,
+    }
@@ -13,9 +13,12 @@
 
 技术特性：
 - 异步并发：使用asyncio实现高并发抓取，控制最大并发数避免被封
+- 流水线：列表页按站点限流并发抓取，每页解析完成即开始处理详情页，无需等待全部列表页
 - 多格式支持：HTML文本、PDF文档、Word文档、图片OCR
+- 详情页并发：同一详情页的图片OCR、PDF/Word下载与解析并发执行，受全局下载/解析并发上限约束
 - 智能解析：CSS选择器配置化，支持复杂页面结构
 - 去重机制：基于内容SHA256哈希的去重，避免重复抓取
+- 条件请求：持久化ETag/Last-Modified，304时跳过未变化的列表页/详情页并复用附件文本
 - 错误处理：完善的异常处理和日志记录
 
 主要组件：
@@ -47,26 +50,25 @@
 
 import asyncio  # 异步任务调度
 import hashlib  # 用于生成唯一ID
-import io       # 字节流处理
 import json     # 附件序列化
 import os       # 环境变量与路径
 import re       # 正则表达式
-from datetime import datetime, timezone  # 时间处理，支持UTC
-from typing import List, Optional  # 类型注解
+from datetime import date, datetime, timezone  # 时间处理，支持UTC
+from typing import Dict, List, Optional  # 类型注解
 from urllib.parse import parse_qs, urljoin, urlparse  # URL处理
 
 
 from curl_cffi import requests as curl_requests  # 高性能异步HTTP库，支持浏览器伪装
-from PyPDF2 import PdfReader  # PDF解析
 from bs4 import BeautifulSoup  # HTML解析
-from docx import Document  # Word文档解析
-from PIL import Image  # 图片处理
 import pytesseract  # OCR文字识别
 
 
 # 导入配置项和数据模型
 from .config import (
     DETAIL_SELECTORS,      # 详情页选择器配置
+    DOWNLOAD_TIMEOUT,      # 附件/图片下载超时时间
+    MAX_CONCURRENT_DOWNLOADS,  # 全局附件/图片并发下载上限
+    MAX_CONCURRENT_PARSES,  # 全局解析/OCR并发上限
     MAX_RETRIES,           # 最大重试次数
     REQUEST_TIMEOUT,       # 请求超时时间
     TARGET_SOURCES,        # 目标网站源配置
@@ -75,12 +77,19 @@ from .config import (
     VECTOR_SYNC_ENABLED,   # 是否同步到向量库
 )
 from .models import Attachments, CrawlItem  # 附件和爬取结果数据结构
+from .downloads import (  # 流式下载与落盘
+    DownloadRejected,
+    SpooledDownload,
+    abort_response,
+    check_response_headers,
+    spool_response,
+)
+from .parsers import ocr_image_bytes, parse_docx_bytes, parse_pdf_bytes  # 纯解析函数（可在子进程中执行）
+from .ratelimit import host_permit, report_transfer_failure  # 按站点自适应限流
+from .workers import run_cpu_task  # 解析/OCR进程池
 from .storage import database  # SQLite数据库操作
-from ..vector_store.bridge import store_document  # 向量库同步接口
-
-
-# 初始化数据库，确保表结构存在
-database.initialize()
+from .storage.text_cache import get_text_cache  # 附件解析与OCR结果缓存
+from .sync import build_metadata, vector_sync_queue  # 向量库批量同步队列
 
 
 # 配置OCR环境变量和命令路径
@@ -97,22 +106,120 @@ PAGINATION_PATTERN = re.compile(r"(list)(\d+)(\.htm)$", re.IGNORECASE)
 ASYNC_HTTP = curl_requests.AsyncSession(impersonate="chrome120")
 
 
+class NotModifiedError(Exception):
+    """条件请求返回304：资源自上次成功处理后未发生变化。"""
+
+
+# 已成功响应但尚未确认处理完成的校验信息：url -> (etag, last_modified)
+_PENDING_VALIDATORS: Dict[str, tuple] = {}
+
+
+async def _with_conditional_headers(url: str, headers: dict) -> dict:
+    """在请求头中附加If-None-Match/If-Modified-Since（若有已保存的校验信息）。"""
+    stored = await asyncio.to_thread(database.get_validators, url)
+    if not stored:
+        return headers
+    conditional = dict(headers)
+    if stored.get("etag"):
+        conditional["If-None-Match"] = stored["etag"]
+    if stored.get("last_modified"):
+        conditional["If-Modified-Since"] = stored["last_modified"]
+    return conditional
+
+
+def _remember_validators(url: str, response) -> None:
+    """暂存响应中的校验信息，待调用方处理成功后通过commit_validators落库。"""
+    etag = response.headers.get("etag")
+    last_modified = response.headers.get("last-modified")
+    if etag or last_modified:
+        _PENDING_VALIDATORS[url] = (etag, last_modified)
+    else:
+        _PENDING_VALIDATORS.pop(url, None)
+
+
+async def commit_validators(url: str, content: Optional[str] = None) -> None:
+    """
+    资源处理成功后持久化其校验信息；content为可在304时直接复用的提取文本。
+    """
+    pending = _PENDING_VALIDATORS.pop(url, None)
+    if pending is None:
+        return
+    etag, last_modified = pending
+    await asyncio.to_thread(database.save_validators, url, etag, last_modified, content)
+
+
+def discard_validators(*urls: str) -> None:
+    """
+    丢弃尚未确认的校验信息。处理失败（解析异常、OCR为空、入库失败等）时不会调用commit_validators，
+    调用方须在 finally 中调用本函数，避免全局暂存表无限增长。
+    """
+    for url in urls:
+        _PENDING_VALIDATORS.pop(url, None)
+
+
+# 全局共享的附件/图片下载与解析/OCR并发限制，跨详情页、跨源生效
+_DOWNLOAD_SEMAPHORE = asyncio.Semaphore(max(1, MAX_CONCURRENT_DOWNLOADS))
+_PARSE_SEMAPHORE = asyncio.Semaphore(max(1, MAX_CONCURRENT_PARSES))
+
+
+async def run_parse(func, *args):
+    """在全局解析并发上限内，于进程池中执行CPU密集的解析/OCR函数。"""
+    async with _PARSE_SEMAPHORE:
+        return await run_cpu_task(func, *args)
+
+
+def _lookup_parsed_text(url: str, sha: str, kind: str) -> Optional[str]:
+    """记录URL对应的内容哈希并查询解析结果缓存，未命中返回None。"""
+    cache = get_text_cache()
+    if cache is None:
+        return None
+    cache.remember_url(url, sha)
+    return cache.get(sha, kind)
+
+
+async def parse_cached(kind: str, url: str, download: SpooledDownload, func, *args) -> str:
+    """
+    按下载内容的SHA-256（下载时已增量计算）查询解析结果缓存，未命中时执行解析/OCR并写入缓存。
+    kind 为结果类型（pdf/docx/ocr）；同一文件换了URL或被重新下载时仍可命中。
+    OCR结果为空时不写入缓存，以免一次识别失败被长期复用。解析结束后删除下载的临时文件。
+    """
+    try:
+        cached = await asyncio.to_thread(_lookup_parsed_text, url, download.sha256, kind)
+        if cached is not None:
+            return cached
+        text = await run_parse(func, download.source, *args)  # 大文件只传临时文件路径给解析进程
+    finally:
+        download.close()
+    cache = get_text_cache()
+    if cache is not None and (text or kind != "ocr"):
+        await asyncio.to_thread(cache.put, download.sha256, kind, text)
+    return text
+
 
 async def fetch_html(
     url: str,
     headers: dict,
     timeout: int = REQUEST_TIMEOUT,
     retries: int = MAX_RETRIES,
+    conditional: bool = False,
 ) -> str:
     """
     异步获取网页HTML内容，带重试和退避机制。
-    参数：url 网页地址，headers 请求头，timeout 超时，retries 最大重试。
-    失败时抛出RuntimeError。
+    参数：url 网页地址，headers 请求头，timeout 超时，retries 最大重试，
+    conditional 是否携带已保存的ETag/Last-Modified发起条件请求。
+    失败时抛出RuntimeError；条件请求返回304时抛出NotModifiedError。
     """
+    request_headers = await _with_conditional_headers(url, headers) if conditional else headers
     for attempt in range(retries):
         try:
-            response = await ASYNC_HTTP.get(url, headers=headers, timeout=timeout)
+            async with host_permit(url) as permit:  # 按站点限流：令牌桶 + 自适应并发
+                response = await ASYNC_HTTP.get(url, headers=request_headers, timeout=timeout)
+                permit.observe(response)
+            if conditional and response.status_code == 304:
+                break
             response.raise_for_status()
+            if conditional:
+                _remember_validators(url, response)
             return response.text
         except Exception as exc:
             if attempt == retries - 1:
@@ -120,33 +227,99 @@ async def fetch_html(
             wait_seconds = 1 + attempt
             print(f"[WARN] attempt {attempt + 1} for {url} failed: {exc}; retry in {wait_seconds}s.")
             await asyncio.sleep(wait_seconds)
-    raise RuntimeError(f"Failed to fetch {url}")
+    else:
+        raise RuntimeError(f"Failed to fetch {url}")
+    raise NotModifiedError(url)
 
 
 
 async def download_binary(
     url: str,
     headers: dict,
-    timeout: int = REQUEST_TIMEOUT,
+    timeout: int = DOWNLOAD_TIMEOUT,
     retries: int = MAX_RETRIES,
-) -> Optional[bytes]:
+    conditional: bool = False,
+    kind: Optional[str] = None,
+) -> Optional[SpooledDownload]:
     """
-    异步下载二进制文件（图片、PDF、Word等），带重试。
-    参数同fetch_html。失败时返回None。
+    异步流式下载二进制文件（图片、PDF、Word等），带重试。
+    参数同fetch_html；kind 为附件类型（pdf/docx/ocr），用于预检Content-Type。
+    超过 MAX_DOWNLOAD_BYTES 或类型不符时放弃且不重试；小文件保存在内存，大文件落盘到临时文件。
+    失败或内容为空时返回None；条件请求返回304时抛出NotModifiedError。
     """
+    request_headers = await _with_conditional_headers(url, headers) if conditional else headers
     for attempt in range(retries):
+        download: Optional[SpooledDownload] = None
         try:
-            response = await ASYNC_HTTP.get(url, headers=headers, timeout=timeout)
-            response.raise_for_status()
-            return response.content
+            response = None
+            try:
+                async with host_permit(url) as permit:  # 按站点限流：只覆盖到响应头到达，响应体传输不计入延迟
+                    response = await ASYNC_HTTP.get(url, headers=request_headers, timeout=timeout, stream=True)
+                    permit.observe(response)
+                if conditional and response.status_code == 304:
+                    break
+                response.raise_for_status()
+                check_response_headers(response, url, kind)
+                try:
+                    download = await spool_response(response, url)
+                except DownloadRejected:
+                    raise
+                except Exception:
+                    report_transfer_failure(url)  # 传输中途失败：单独计入站点退避
+                    raise
+            finally:
+                if response is not None:
+                    await abort_response(response)  # 被拒绝或出错时立即中断传输
+            if conditional:
+                _remember_validators(url, response)
+            if not download.size:
+                download.close()
+                return None
+            return download
+        except DownloadRejected as exc:
+            print(f"[WARN] skip download {url}: {exc}")
+            return None
         except Exception as exc:
+            if download is not None:
+                download.close()
             if attempt == retries - 1:
                 print(f"[WARN] failed to download binary {url}: {exc}")
                 return None
             wait_seconds = 1 + attempt
             print(f"[WARN] download attempt {attempt + 1} for {url} failed: {exc}; retry in {wait_seconds}s.")
             await asyncio.sleep(wait_seconds)
-    return None
+        except BaseException:
+            if download is not None:  # 下载完成后、交给调用方前被取消：删除临时文件
+                download.close()
+            raise
+    else:
+        return None
+    raise NotModifiedError(url)
+
+
+def _lookup_reusable_text(url: str, kind: str) -> Optional[str]:
+    """304时查找可复用的提取文本：优先已保存的校验信息，其次按URL最近内容哈希查询解析缓存。"""
+    stored = database.get_validators(url)
+    if stored and stored.get("content") is not None:
+        return stored["content"]
+    cache = get_text_cache()
+    return cache.get_by_url(url, kind) if cache is not None else None
+
+
+async def download_or_reuse(url: str, headers: dict, kind: str) -> tuple[Optional[SpooledDownload], Optional[str]]:
+    """
+    以条件请求下载附件/图片，受全局下载并发上限约束。
+    返回 (下载结果, None)；若服务端返回304且有已保存的提取文本，返回 (None, 已保存文本)。
+    下载结果交给 parse_cached() 解析，解析后自动删除临时文件。
+    """
+    async with _DOWNLOAD_SEMAPHORE:
+        try:
+            return await download_binary(url, headers, conditional=True, kind=kind), None
+        except NotModifiedError:
+            reused = await asyncio.to_thread(_lookup_reusable_text, url, kind)
+            if reused is not None:
+                return None, reused
+            return await download_binary(url, headers, kind=kind), None
 
 
 
@@ -227,14 +400,10 @@ def parse_publish_time(date_str: Optional[str]) -> datetime:
     """
     尽力解析日期字符串，支持多种格式，失败则返回当前UTC时间（带时区）。
     """
-    if not date_str:
+    listed_date = parse_listed_date(date_str)
+    if listed_date is None:
         return datetime.now(timezone.utc)
-    for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d"):
-        try:
-            return datetime.strptime(date_str, fmt)
-        except ValueError:
-            continue
-    return datetime.now(timezone.utc)
+    return datetime.combine(listed_date, datetime.min.time())
 
 
 
@@ -266,25 +435,24 @@ async def perform_ocr_from_url(image_url: str, headers: dict) -> str:
     if not TESSERACT_CMD:
         return ""
 
-    image_bytes = await download_binary(image_url, headers)
-    if not image_bytes:
-        return ""
-
-    def _ocr() -> str:
+    try:
+        download, reused_text = await download_or_reuse(image_url, headers, "ocr")
+        if reused_text is not None:
+            return reused_text
+        if download is None:
+            return ""
         try:
-            pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
-            config_parts = []
-            if TESSDATA_DIR:
-                config_parts.append(f'--tessdata-dir "{TESSDATA_DIR}"')
-            config = " ".join(config_parts) or None
-            with Image.open(io.BytesIO(image_bytes)) as img:
-                text = pytesseract.image_to_string(img, lang="chi_sim+eng", config=config)
-            return text.strip()
-        except (pytesseract.TesseractError, OSError) as exc:
+            text = await parse_cached(
+                "ocr", image_url, download, ocr_image_bytes, TESSERACT_CMD, TESSDATA_DIR, image_url
+            )
+        except RuntimeError as exc:
             print(f"[WARN] OCR failed for {image_url}: {exc}")
             return ""
-
-    return await asyncio.to_thread(_ocr)
+        if text:
+            await commit_validators(image_url, text)
+        return text
+    finally:
+        discard_validators(image_url)  # OCR失败或结果为空时不保存校验信息
 
 
 async def extract_image_texts(
@@ -299,28 +467,9 @@ async def extract_image_texts(
     image_selector = selector_cfg.get("images")
     if not image_selector:
         return []
-    texts: List[str] = []
-    for img in container.select(image_selector):
-        src = normalize_url(base_url, img.get("src"))
-        if not src:
-            continue
-        ocr_text = await perform_ocr_from_url(src, headers)
-        if ocr_text:
-            texts.append(ocr_text)
-    return texts
-
-
-def parse_pdf_bytes(file_bytes: bytes) -> str:
-    """Return concatenated text for all PDF pages (skipping empty extractions)."""
-    reader = PdfReader(io.BytesIO(file_bytes))
-    texts = [page.extract_text() or "" for page in reader.pages]
-    return "\n".join(filter(None, texts))
-
-
-def parse_docx_bytes(file_bytes: bytes) -> str:
-    """Join all paragraph texts from a DOCX binary payload."""
-    document = Document(io.BytesIO(file_bytes))
-    return "\n".join(p.text for p in document.paragraphs if p.text)
+    sources = [normalize_url(base_url, img.get("src")) for img in container.select(image_selector)]
+    ocr_texts = await asyncio.gather(*(perform_ocr_from_url(src, headers) for src in sources if src))
+    return [text for text in ocr_texts if text]
 
 
 async def extract_file_texts(
@@ -340,29 +489,42 @@ async def extract_file_texts(
     if not file_selector:
         return []
 
-    attachments: List[Attachments] = []
-    for link in container.select(file_selector):
+    async def handle_link(link) -> Optional[Attachments]:
         file_url = normalize_url(base_url, link)
         if not file_url:
-            continue
+            return None
         if not file_url.lower().endswith(allowed_ext):
-            continue
+            return None
         filename = link.get_text(strip=True) or "attachment"
-        binary = await download_binary(file_url, headers)
-        if not binary:
-            continue
-
         if file_url.lower().endswith(".pdf"):
-            text = await asyncio.to_thread(parse_pdf_bytes, binary)
+            parser = parse_pdf_bytes
+            kind = "pdf"
             mime = "application/pdf"
         elif file_url.lower().endswith(".docx"):
-            text = await asyncio.to_thread(parse_docx_bytes, binary)
+            parser = parse_docx_bytes
+            kind = "docx"
             mime = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         else:
-            continue
+            return None
+
+        try:
+            download, text = await download_or_reuse(file_url, headers, kind)
+            if text is None:
+                if download is None:
+                    return None
+                try:
+                    text = await parse_cached(kind, file_url, download, parser)
+                except RuntimeError as exc:
+                    print(f"[WARN] skip attachment {file_url}: {exc}")
+                    return None
+                await commit_validators(file_url, text)
+        finally:
+            discard_validators(file_url)
+
+        return Attachments(url=file_url, filename=filename, mime_type=mime, text=text)
 
-        attachments.append(Attachments(url=file_url, filename=filename, mime_type=mime, text=text))
-    return attachments
+    results = await asyncio.gather(*(handle_link(link) for link in container.select(file_selector)))
+    return [attachment for attachment in results if attachment]
 
 
 async def extract_embedded_pdf_attachment(
@@ -390,10 +552,19 @@ async def extract_embedded_pdf_attachment(
     pdf_url = normalize_url(base_url, file_param[0])
     if not pdf_url:
         return []
-    binary = await download_binary(pdf_url, headers)
-    if not binary:
-        return []
-    text = await asyncio.to_thread(parse_pdf_bytes, binary)
+    try:
+        download, text = await download_or_reuse(pdf_url, headers, "pdf")
+        if text is None:
+            if download is None:
+                return []
+            try:
+                text = await parse_cached("pdf", pdf_url, download, parse_pdf_bytes)
+            except RuntimeError as exc:
+                print(f"[WARN] skip embedded pdf {pdf_url}: {exc}")
+                return []
+            await commit_validators(pdf_url, text)
+    finally:
+        discard_validators(pdf_url)
     return [
         Attachments(
             url=pdf_url,
@@ -430,15 +601,11 @@ async def parse_detail_page(html: str, base_url: str, headers: dict) -> tuple[st
     """Parse a detail page and return aggregated text plus attachment metadata."""
     soup = BeautifulSoup(html, "lxml")
     text_content = extract_text_content(soup, DETAIL_SELECTORS.get("text_selector"))
-    image_texts = await extract_image_texts(soup, DETAIL_SELECTORS.get("img_selector"), base_url, headers)
-    pdf_attachments = await extract_file_texts(
-        soup, DETAIL_SELECTORS.get("pdf_selector"), base_url, headers, allowed_ext=(".pdf",)
-    )
-    doc_attachments = await extract_file_texts(
-        soup, DETAIL_SELECTORS.get("doc_selector"), base_url, headers, allowed_ext=(".docx",)
-    )
-    embedded_pdf = await extract_embedded_pdf_attachment(
-        soup, DETAIL_SELECTORS.get("embedded_pdf_selector"), base_url, headers
+    image_texts, pdf_attachments, doc_attachments, embedded_pdf = await asyncio.gather(
+        extract_image_texts(soup, DETAIL_SELECTORS.get("img_selector"), base_url, headers),
+        extract_file_texts(soup, DETAIL_SELECTORS.get("pdf_selector"), base_url, headers, allowed_ext=(".pdf",)),
+        extract_file_texts(soup, DETAIL_SELECTORS.get("doc_selector"), base_url, headers, allowed_ext=(".docx",)),
+        extract_embedded_pdf_attachment(soup, DETAIL_SELECTORS.get("embedded_pdf_selector"), base_url, headers),
     )
 
     attachments = pdf_attachments + doc_attachments + embedded_pdf
@@ -447,11 +614,35 @@ async def parse_detail_page(html: str, base_url: str, headers: dict) -> tuple[st
     return content, attachments
 
 
-MAX_CONCURRENT_DETAIL_REQUESTS = 5
+def parse_listed_date(date_str: Optional[str]) -> Optional[date]:
+    """
+    解析列表页上的日期，无法解析时返回None（不像parse_publish_time那样回退到当前时间）。
+    """
+    if not date_str:
+        return None
+    for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d"):
+        try:
+            return datetime.strptime(date_str.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
 
 
-async def crawl_source(source_id: str) -> List[CrawlItem]:
-    """Crawl a configured list page and return normalized CrawlItem records."""
+async def crawl_source(source_id: str, force: bool = False, incremental: bool = False) -> List[CrawlItem]:
+    """
+    Crawl a configured list page and return normalized CrawlItem records.
+
+    Entries whose detail URL, title and list date are already stored are skipped
+    before any detail download/OCR/attachment work, and list/detail pages are fetched
+    with conditional requests so a 304 skips them; pass ``force=True`` to re-crawl them.
+    Existence checks and inserts are batched per list page; new records are queued
+    for batched vector sync and marked synced once their batch has been stored.
+
+    With ``incremental=True`` list pages are walked newest-first and the walk stops at
+    the first page whose entries are all already known or dated before the watermark
+    (newest list date of the last fully successful incremental crawl); otherwise all
+    ``max_pages`` pages are fetched concurrently.
+    """
     source_cfg = next((src for src in TARGET_SOURCES if src["id"] == source_id), None)
     if not source_cfg:
         raise ValueError(f"Unknown source id: {source_id}")
@@ -459,95 +650,196 @@ async def crawl_source(source_id: str) -> List[CrawlItem]:
     max_pages = int(source_cfg.get("max_pages", 1))
     list_urls = build_paginated_urls(source_cfg["list_url"], max_pages)
 
-    entries: List[dict] = []
-    for page_number, list_url in enumerate(list_urls, start=1):
-        try:
-            list_html = await fetch_html(list_url, source_cfg["headers"])
-        except RuntimeError as exc:
-            print(f"[WARN] skip list page {list_url}: {exc}")
-            continue
-        page_entries = parse_list(list_html, source_cfg["selectors"], source_cfg["base_url"])
-        if not page_entries:
-            print(f"[INFO] list page {page_number} returned no entries")
-        entries.extend(page_entries)
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DETAIL_REQUESTS)
-
-    async def process_entry(entry: dict) -> Optional[CrawlItem]:
-        detail_url = entry.get("url")
-        if not detail_url:
+    seen_urls: set = set()  # 已分派的详情页URL，翻页期间有新公告置顶时会跨页重复
+    failed_urls: set = set()  # 抓取失败的详情页URL，所在列表页的校验信息不落库，下次仍完整处理
+    run_state = {"failed": False, "newest": None}  # 本次抓取是否有失败、列表页上见到的最新日期
+
+    watermark: Optional[date] = None
+    if incremental and not force:
+        stored_watermark = await asyncio.to_thread(database.get_watermark, source_id)
+        watermark = date.fromisoformat(stored_watermark) if stored_watermark else None
+
+    def listed_key(entry: dict) -> Optional[tuple]:
+        # 列表页预检键：(详情页URL, 标题, 列表日期)，日期缺失时仅比较URL和标题；
+        # 日期无法解析时入库的是抓取时刻，每次都不同，返回None表示不做预检、总是抓取
+        if not entry.get("date"):
+            return entry["url"], entry.get("title") or "", None
+        listed_date = parse_listed_date(entry["date"])
+        if listed_date is None:
             return None
+        return entry["url"], entry.get("title") or "", datetime.combine(listed_date, datetime.min.time()).isoformat()
+
+    async def fetch_entry(entry: dict) -> Optional[dict]:
+        # 抓取并解析单个详情页，返回待入库的候选记录；去重与落库在列表页级别批量完成
+        detail_url = entry["url"]
         try:
-            async with semaphore:
-                detail_html = await fetch_html(detail_url, source_cfg["headers"])
+            detail_html = await fetch_html(detail_url, source_cfg["headers"], conditional=not force)
+        except NotModifiedError:
+            return None  # 详情页自上次成功入库后未变化
         except RuntimeError as exc:
             print(f"[WARN] skip detail {detail_url}: {exc}")
+            failed_urls.add(detail_url)
             return None
 
         content, attachments = await parse_detail_page(detail_html, source_cfg["base_url"], source_cfg["headers"])
         content = content or ""
-
-        item_id = compute_sha256(content.strip() or detail_url or "", detail_url)
-        publish_time = parse_publish_time(entry.get("date"))
-
-        exists = await asyncio.to_thread(database.record_exists, item_id)
-        if exists:
-            return None
-
-        metadata = {
-            "url": detail_url,
-            "source_id": source_cfg["id"],
-            "source_name": source_cfg["name"],
-            "title": entry.get("title"),
-            "publish_time": publish_time.isoformat(),
+        return {
+            "id": compute_sha256(content.strip() or detail_url or "", detail_url),
+            "entry": entry,
+            "content": content,
+            "attachments": attachments,
+            "publish_time": parse_publish_time(entry.get("date")),
         }
-        if VECTOR_SYNC_ENABLED:
-            try:
-                await store_document(item_id, content, metadata)
-            except Exception as exc:
-                print(f"[WARN] Failed to store document {item_id} in vector service: {exc}")
-
-        attachments_payload = None
-        if attachments:
-            attachment_dicts = []
-            for attachment in attachments:
-                data = attachment.dict()
-                data["url"] = str(data.get("url") or "")
-                attachment_dicts.append(data)
-            attachments_payload = json.dumps(attachment_dicts, ensure_ascii=False)
-        await asyncio.to_thread(
-            database.insert_record,
-            item_id,
-            entry.get("title") or "",
-            detail_url,
-            publish_time.isoformat(),
-            source_cfg["id"],
-            source_cfg["name"],
-            True,
-            attachments_payload,
-        )
 
-        return CrawlItem(
-            id=item_id,
-            title=entry.get("title") or "",
-            content=content,
-            url=detail_url,
-            publish_time=publish_time,
-            source=source_cfg["name"],
-            attachments=attachments or None,
-            extra_meta={"category": entry.get("type")},
+    async def store_page(candidates: List[dict]) -> List[CrawlItem]:
+        # 一次查询批量去重，一个事务批量插入，替代逐条 record_exists()/insert_record()
+        existing = await asyncio.to_thread(database.records_exist, [candidate["id"] for candidate in candidates])
+        new_candidates = []
+        for candidate in candidates:
+            if candidate["id"] in existing:
+                await commit_validators(candidate["entry"]["url"])
+            else:
+                existing.add(candidate["id"])  # 同页重复内容只入库一次
+                new_candidates.append(candidate)
+        if not new_candidates:
+            return []
+
+        rows = []
+        for candidate in new_candidates:
+            entry, item_id, content = candidate["entry"], candidate["id"], candidate["content"]
+            publish_time = candidate["publish_time"]
+            attachments_payload = None
+            if candidate["attachments"]:
+                attachment_dicts = []
+                for attachment in candidate["attachments"]:
+                    data = attachment.dict()
+                    data["url"] = str(data.get("url") or "")
+                    attachment_dicts.append(data)
+                attachments_payload = json.dumps(attachment_dicts, ensure_ascii=False)
+            rows.append(
+                (
+                    item_id,
+                    entry.get("title") or "",
+                    entry["url"],
+                    publish_time.isoformat(),
+                    source_cfg["id"],
+                    source_cfg["name"],
+                    False,  # 刷新到向量库成功后由同步队列标记为已同步
+                    attachments_payload,
+                    content,
+                )
+            )
+        await asyncio.to_thread(database.insert_records, rows)
+        if VECTOR_SYNC_ENABLED:
+            for candidate in new_candidates:
+                entry = candidate["entry"]
+                metadata = build_metadata(
+                    entry["url"],
+                    source_cfg["id"],
+                    source_cfg["name"],
+                    entry.get("title"),
+                    candidate["publish_time"].isoformat(),
+                )
+                await vector_sync_queue.enqueue(candidate["id"], candidate["content"], metadata)
+        for candidate in new_candidates:
+            await commit_validators(candidate["entry"]["url"])
+
+        return [
+            CrawlItem(
+                id=candidate["id"],
+                title=candidate["entry"].get("title") or "",
+                content=candidate["content"],
+                url=candidate["entry"]["url"],
+                publish_time=candidate["publish_time"],
+                source=source_cfg["name"],
+                attachments=candidate["attachments"] or None,
+                extra_meta={"category": candidate["entry"].get("type")},
+            )
+            for candidate in new_candidates
+        ]
+
+    async def process_list_page(page_number: int, list_url: str) -> tuple[List[CrawlItem], bool]:
+        # 生产者：抓取并解析列表页；消费者：该页条目立即进入详情处理，不等待其他列表页
+        # 返回 (新入库条目, 该页是否有需要处理的未知条目)，增量模式据此决定是否继续翻页
+        try:
+            list_html = await fetch_html(list_url, source_cfg["headers"], conditional=not force)
+        except NotModifiedError:
+            print(f"[INFO] list page {page_number} not modified since last crawl")
+            return [], False
+        except RuntimeError as exc:
+            print(f"[WARN] skip list page {list_url}: {exc}")
+            run_state["failed"] = True
+            return [], False
+        fresh_entries: List[dict] = []
+        try:
+            page_entries = parse_list(list_html, source_cfg["selectors"], source_cfg["base_url"])
+            if not page_entries:
+                print(f"[INFO] list page {page_number} returned no entries")
+
+            for entry in page_entries:
+                entry_url = entry.get("url")
+                listed_date = parse_listed_date(entry.get("date"))
+                if listed_date and (run_state["newest"] is None or listed_date > run_state["newest"]):
+                    run_state["newest"] = listed_date
+                if not entry_url or entry_url in seen_urls:
+                    continue
+                seen_urls.add(entry_url)
+                if watermark and listed_date and listed_date < watermark:
+                    continue  # 早于上次成功增量抓取的水位线
+                fresh_entries.append(entry)
+
+            if fresh_entries and not force:
+                # 一次查询完成整页预检，已入库的公告不再抓取详情页
+                keys = [listed_key(entry) for entry in fresh_entries]
+                seen = await asyncio.to_thread(database.records_seen, [key for key in keys if key is not None])
+                fresh_entries = [entry for entry, key in zip(fresh_entries, keys) if key is None or key not in seen]
+
+            results = await asyncio.gather(*(fetch_entry(entry) for entry in fresh_entries), return_exceptions=True)
+            candidates: List[dict] = []
+            page_failed = False
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"[WARN] detail task failed: {result}")
+                    page_failed = True
+                    continue
+                if result:
+                    candidates.append(result)
+            page_items: List[CrawlItem] = []
+            if candidates:
+                try:
+                    page_items = await store_page(candidates)
+                except Exception as exc:  # noqa: BLE001
+                    print(f"[WARN] failed to store list page {page_number}: {exc}")
+                    page_failed = True
+            if not page_failed and not any(entry.get("url") in failed_urls for entry in page_entries):
+                await commit_validators(list_url)  # 整页处理成功后才记录校验信息
+            else:
+                run_state["failed"] = True
+            return page_items, bool(fresh_entries)
+        finally:
+            # 详情解析失败、入库失败或本页未完整处理时，暂存的校验信息不落库，这里统一丢弃
+            discard_validators(list_url, *(entry["url"] for entry in fresh_entries))
+
+    if incremental:
+        page_results = []
+        for page_number, list_url in enumerate(list_urls, start=1):
+            page_items, has_unknown = await process_list_page(page_number, list_url)
+            page_results.append(page_items)
+            if not has_unknown:
+                if page_number < len(list_urls):
+                    print(f"[INFO] incremental crawl of {source_id} stopped after list page {page_number}")
+                break
+        newest = run_state["newest"]
+        if not run_state["failed"] and newest and (watermark is None or newest > watermark):
+            await asyncio.to_thread(database.save_watermark, source_id, newest.isoformat())
+    else:
+        results = await asyncio.gather(
+            *(process_list_page(page_number, list_url) for page_number, list_url in enumerate(list_urls, start=1))
         )
-
-    tasks = [process_entry(entry) for entry in entries]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    crawl_items: List[CrawlItem] = []
-    for result in results:
-        if isinstance(result, Exception):
-            print(f"[WARN] detail task failed: {result}")
-            continue
-        if result:
-            crawl_items.append(result)
-    return crawl_items
+        page_results = [page_items for page_items, _ in results]
+    if VECTOR_SYNC_ENABLED:
+        await vector_sync_queue.flush()  # 返回前把本次抓取的剩余记录写入向量库
+    return [item for page_items in page_results for item in page_items]  # 保持列表页顺序
 
 
 def fetch_detail(parsed_lists, headers):
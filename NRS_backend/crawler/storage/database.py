@@ -2,15 +2,30 @@
 爬虫数据持久化的SQLite数据库操作工具。
 负责表结构初始化、连接管理、记录插入/查询/同步等。
 所有关键函数和字段均有详细注释。
+
+连接管理：
+- 数据库以WAL模式运行，读写互不阻塞；synchronous、页缓存等PRAGMA可通过环境变量调整；
+- 读操作复用按线程缓存的长连接（asyncio.to_thread 的工作线程会被复用）；
+- 写操作统一提交给单个写线程串行执行，写线程把同时排队的多个写请求合并到一个事务中提交（group commit），
+  大批量回填时不再每条记录一次fsync。对外接口保持同步调用方式不变。
 """
 from __future__ import annotations  # 兼容未来类型注解语法
 
+import queue  # 写请求队列
 import sqlite3  # 标准库SQLite操作
-from contextlib import contextmanager  # 上下文管理器，简化连接关闭
+import threading  # 写线程与按线程缓存的读连接
+from concurrent.futures import Future  # 写请求结果回传
+from contextlib import contextmanager  # 上下文管理器
 from pathlib import Path  # 路径处理
-from typing import Generator, Iterable, Optional  # 类型注解
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional  # 类型注解
 
-from ..config import DATABASE_PATH  # 数据库文件路径配置
+from ..config import (  # 数据库文件路径与连接参数配置
+    DATABASE_PATH,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_WRITE_BATCH_SIZE,
+)
 
 
 # 数据库表结构定义，包含爬取记录所有字段
@@ -23,24 +38,69 @@ CREATE TABLE IF NOT EXISTS crawled_records (
     source_id TEXT,                   -- 来源ID
     source_name TEXT,                 -- 来源名称
     attachments TEXT,                 -- 附件JSON
+    content TEXT,                     -- 聚合后的正文（含OCR与附件文本），供向量库重新同步
     synced INTEGER DEFAULT 0,         -- 是否已同步到向量库
+    sync_attempts INTEGER DEFAULT 0,  -- 单独重新同步失败的次数，达到上限后不再自动重试
     created_at TEXT DEFAULT CURRENT_TIMESTAMP -- 创建时间
 );
 CREATE INDEX IF NOT EXISTS idx_crawled_records_url ON crawled_records(url); -- 加速URL查询
+CREATE INDEX IF NOT EXISTS idx_crawled_records_synced ON crawled_records(synced); -- 加速未同步记录扫描
+CREATE TABLE IF NOT EXISTS http_validators (
+    url TEXT PRIMARY KEY,             -- 资源URL（列表页、详情页、附件、图片）
+    etag TEXT,                        -- 上次成功处理时的ETag
+    last_modified TEXT,               -- 上次成功处理时的Last-Modified
+    content TEXT,                     -- 附件/图片的提取文本，304时直接复用
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP -- 更新时间
+);
+CREATE TABLE IF NOT EXISTS source_schedule (
+    source_id TEXT PRIMARY KEY,       -- 来源ID
+    last_run_at REAL,                 -- 上次成功抓取时间（epoch秒）
+    next_run_at REAL,                 -- 下次计划抓取时间（epoch秒）
+    interval REAL,                    -- 当前抓取间隔（秒）
+    rate REAL,                        -- 新条目速率的指数加权平均（条/小时）
+    watermark TEXT                    -- 上次成功增量抓取时列表页上的最新日期（ISO日期）
+);
 """
 
 
 
+def _open_connection() -> sqlite3.Connection:
+    """
+    打开一个配置好PRAGMA的连接：WAL日志、synchronous级别、页缓存、内存临时表与忙等待超时。
+    """
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,  # 关闭时可能由其他线程调用close()
+        isolation_level=None,  # 事务由调用方显式控制
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size=-{int(SQLITE_CACHE_SIZE_KB)}")  # 负数表示以KB为单位
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+    return conn
+
+
+
 def initialize() -> None:
     """
     初始化数据库文件和表结构，确保可用。
-    若目录不存在则自动创建。
+    若目录不存在则自动创建。由爬虫 lifespan 在启动时调用，首次读写时也会自动执行。
     """
+    global _initialized
     path = Path(DATABASE_PATH)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(path) as conn:
+    conn = _open_connection()  # 同时把数据库切换为WAL模式（持久生效）
+    try:
         conn.executescript(SCHEMA)  # 执行表结构脚本
         _ensure_attachment_column(conn)  # 兼容旧表结构，补充附件字段
+        _ensure_content_column(conn)  # 兼容旧表结构，补充正文字段
+        _ensure_sync_attempts_column(conn)  # 兼容旧表结构，补充同步失败次数字段
+        _ensure_watermark_column(conn)  # 兼容旧表结构，补充增量水位线字段
+    finally:
+        conn.close()
+    _initialized = True
 
 
 
@@ -56,16 +116,202 @@ def _ensure_attachment_column(conn: sqlite3.Connection) -> None:
 
 
 
+
+def _ensure_content_column(conn: sqlite3.Connection) -> None:
+    """
+    检查并补充content字段，兼容老数据库（旧记录的正文为空，无法重新同步）。
+    """
+    cursor = conn.execute("PRAGMA table_info(crawled_records)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if "content" not in columns:
+        conn.execute("ALTER TABLE crawled_records ADD COLUMN content TEXT")
+        conn.commit()
+
+
+
+
+def _ensure_sync_attempts_column(conn: sqlite3.Connection) -> None:
+    """
+    检查并补充sync_attempts字段，兼容老数据库。
+    """
+    cursor = conn.execute("PRAGMA table_info(crawled_records)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if "sync_attempts" not in columns:
+        conn.execute("ALTER TABLE crawled_records ADD COLUMN sync_attempts INTEGER DEFAULT 0")
+        conn.commit()
+
+
+
+def _ensure_watermark_column(conn: sqlite3.Connection) -> None:
+    """
+    检查并补充source_schedule.watermark字段，兼容老数据库。
+    """
+    cursor = conn.execute("PRAGMA table_info(source_schedule)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if "watermark" not in columns:
+        conn.execute("ALTER TABLE source_schedule ADD COLUMN watermark TEXT")
+        conn.commit()
+
+
+
+class _SQLiteWriter:
+    """
+    单写线程：按提交顺序执行写操作，并把队列中已积压的写请求合并进同一事务提交。
+    每个写请求在独立的SAVEPOINT中执行，单个请求失败只回滚自身，不影响同批其他请求。
+    """
+
+    _STOP = object()
+
+    def __init__(self, batch_size: int) -> None:
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._batch_size = max(1, batch_size)
+        self._thread = threading.Thread(target=self._run, name="crawler-db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """提交写操作并阻塞等待其所在事务提交完成，返回func的返回值。"""
+        future: Future = Future()
+        self._queue.put((func, future))
+        return future.result()
+
+    def close(self) -> None:
+        """处理完已排队的写请求后停止写线程。"""
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        conn = _open_connection()
+        try:
+            while True:
+                job = self._queue.get()
+                if job is self._STOP:
+                    return
+                batch = [job]
+                stop = False
+                while len(batch) < self._batch_size:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is self._STOP:
+                        stop = True
+                        break
+                    batch.append(job)
+                self._commit_batch(conn, batch)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _commit_batch(conn: sqlite3.Connection, batch: List[Any]) -> None:
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for func, _ in batch:
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    result = func(conn)
+                    if isinstance(result, sqlite3.Cursor):  # 游标须在写线程内释放，交给调用线程回收会与写线程并发使用连接
+                        result.close()
+                        result = None
+                    outcomes.append((True, result))
+                    conn.execute("RELEASE write_job")
+                except Exception as exc:  # noqa: BLE001
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((False, exc))
+            conn.execute("COMMIT")
+        except Exception as exc:  # noqa: BLE001
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (ok, value), (_, future) in zip(outcomes, batch):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+# 连接状态：写线程、按线程缓存的读连接；_generation 在close()后递增，使各线程的旧连接失效
+_state_lock = threading.Lock()
+_writer: Optional[_SQLiteWriter] = None
+_readers: List[sqlite3.Connection] = []
+_local = threading.local()
+_generation = 0
+_initialized = False  # 表结构是否已初始化
+_init_lock = threading.Lock()  # 串行化首次初始化，避免并发执行迁移
+
+
+
+def _ensure_initialized() -> None:
+    """
+    首次读写前确保表结构已初始化（未经 lifespan 直接调用时兜底）。
+    """
+    if _initialized:
+        return
+    with _init_lock:
+        if not _initialized:
+            initialize()
+
+
+
+def _write(func: Callable[[sqlite3.Connection], Any]) -> Any:
+    """
+    把写操作交给单写线程执行，阻塞等待提交完成（应在 asyncio.to_thread 中调用）。
+    """
+    global _writer
+    _ensure_initialized()
+    with _state_lock:
+        if _writer is None:
+            _writer = _SQLiteWriter(SQLITE_WRITE_BATCH_SIZE)
+        writer = _writer
+    return writer.submit(func)
+
+
+
+def _reader() -> sqlite3.Connection:
+    """
+    获取当前线程复用的只读连接，首次使用时创建。
+    """
+    _ensure_initialized()
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        conn = _open_connection()
+        with _state_lock:
+            _readers.append(conn)
+            _local.conn = conn
+            _local.generation = _generation
+    return conn
+
+
+
 @contextmanager
 def get_connection() -> Generator[sqlite3.Connection, None, None]:
     """
-    获取数据库连接的上下文管理器，自动关闭连接。
-    用于所有读写操作，避免资源泄漏。
+    获取当前线程复用的数据库连接（不会在退出时关闭）。
+    仅用于读操作；写操作请通过单写线程执行。
     """
-    conn = sqlite3.connect(DATABASE_PATH)
-    try:
-        yield conn
-    finally:
+    yield _reader()
+
+
+
+def close() -> None:
+    """
+    停止写线程（先完成已排队的写入）并关闭所有读连接，应在应用关闭时调用。
+    之后再次调用读写函数会重新建立连接。
+    """
+    global _writer, _generation
+    with _state_lock:
+        writer, _writer = _writer, None
+        readers = list(_readers)
+        _readers.clear()
+        _generation += 1
+    if writer is not None:
+        writer.close()
+    for conn in readers:
         conn.close()
 
 
@@ -81,6 +327,54 @@ def record_exists(record_id: str) -> bool:
 
 
 
+# 单条 IN (...) 查询携带的最大参数个数，低于旧版SQLite的999变量上限
+_IN_CHUNK_SIZE = 500
+
+
+
+def records_exist(record_ids: Iterable[str]) -> set:
+    """
+    批量判断记录是否已存在，返回其中已入库的ID集合。
+    用于按列表页批量去重，替代逐条调用 record_exists()。
+    """
+    id_list = list(dict.fromkeys(record_ids))
+    found = set()
+    with get_connection() as conn:
+        for start in range(0, len(id_list), _IN_CHUNK_SIZE):
+            chunk = id_list[start : start + _IN_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(f"SELECT id FROM crawled_records WHERE id IN ({placeholders})", chunk)
+            found.update(row[0] for row in cursor.fetchall())
+    return found
+
+
+
+def records_seen(entries: Iterable[tuple]) -> set:
+    """
+    判断列表页上的条目（详情页URL + 标题 + 发布时间）是否已入库，用于在抓取详情页、OCR和附件解析之前短路已知公告。
+    entries 为 (url, title, publish_time) 元组，返回其中已入库的元组集合；publish_time为空时仅比较URL和标题。
+    """
+    entry_list = list(dict.fromkeys(entries))
+    urls = list(dict.fromkeys(entry[0] for entry in entry_list))
+    stored: Dict[tuple, set] = {}
+    with get_connection() as conn:
+        for start in range(0, len(urls), _IN_CHUNK_SIZE):
+            chunk = urls[start : start + _IN_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                f"SELECT url, title, publish_time FROM crawled_records WHERE url IN ({placeholders})",
+                chunk,
+            )
+            for url, title, publish_time in cursor.fetchall():
+                stored.setdefault((url, title), set()).add(publish_time)
+    return {
+        entry
+        for entry in entry_list
+        if (entry[0], entry[1]) in stored and (entry[2] is None or entry[2] in stored[(entry[0], entry[1])])
+    }
+
+
+
 def insert_record(
     record_id: str,
     title: str,
@@ -90,30 +384,80 @@ def insert_record(
     source_name: str,
     synced: bool,
     attachments: Optional[str] = None,
+    content: Optional[str] = None,
 ) -> None:
     """
     插入一条爬取记录，若已存在则忽略。
-    附件以JSON字符串存储。
+    附件以JSON字符串存储，正文用于向量库同步失败后的重新同步。
     """
-    with get_connection() as conn:
-        conn.execute(
+    insert_records([(record_id, title, url, publish_time, source_id, source_name, synced, attachments, content)])
+
+
+
+def insert_records(rows: Iterable[tuple]) -> None:
+    """
+    在同一事务中批量插入爬取记录（executemany），已存在的ID忽略。
+    每行字段顺序与 insert_record() 参数一致：
+    (record_id, title, url, publish_time, source_id, source_name, synced, attachments, content)。
+    """
+    params = [
+        (record_id, title, url, publish_time, source_id, source_name, attachments, content, int(synced))
+        for record_id, title, url, publish_time, source_id, source_name, synced, attachments, content in rows
+    ]
+    if not params:
+        return
+    _write(
+        lambda conn: conn.executemany(
             """
             INSERT OR IGNORE INTO crawled_records
-            (id, title, url, publish_time, source_id, source_name, attachments, synced)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            (id, title, url, publish_time, source_id, source_name, attachments, content, synced)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (
-                record_id,
-                title,
-                url,
-                publish_time,
-                source_id,
-                source_name,
-                attachments,
-                int(synced),
-            ),
+            params,
         )
-        conn.commit()
+    )
+
+
+
+def fetch_unsynced(
+    limit: int, after_rowid: int = 0, min_age_seconds: float = 0, max_attempts: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    按rowid顺序分页读取未同步（synced=0）且保存了正文的记录，用于后台重新同步。
+    after_rowid 为上一页最后一条的rowid；min_age_seconds 跳过刚入库、可能仍在同步队列中的记录；
+    max_attempts>0 时跳过已单独同步失败达到该次数的记录。
+    """
+    with get_connection() as conn:
+        cursor = conn.execute(
+            """
+            SELECT rowid, id, title, url, publish_time, source_id, source_name, content
+            FROM crawled_records
+            WHERE synced=0 AND content IS NOT NULL AND rowid>?
+              AND created_at <= datetime('now', ?)
+              AND (? <= 0 OR COALESCE(sync_attempts, 0) < ?)
+            ORDER BY rowid
+            LIMIT ?
+            """,
+            (after_rowid, f"-{int(min_age_seconds)} seconds", max_attempts, max_attempts, limit),
+        )
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+
+def record_sync_failures(record_ids: Iterable[str]) -> None:
+    """
+    批量把指定记录的同步失败次数加一（单条重新同步仍失败时调用）。
+    """
+    record_list = list(record_ids)
+    if not record_list:
+        return
+    _write(
+        lambda conn: conn.executemany(
+            "UPDATE crawled_records SET sync_attempts=COALESCE(sync_attempts, 0)+1 WHERE id=?",
+            [(record_id,) for record_id in record_list],
+        )
+    )
 
 
 
@@ -125,9 +469,115 @@ def mark_synced(record_ids: Iterable[str]) -> None:
     record_list = list(record_ids)
     if not record_list:
         return
-    with get_connection() as conn:
-        conn.executemany(
+    _write(
+        lambda conn: conn.executemany(
             "UPDATE crawled_records SET synced=1 WHERE id=?",
-            ((record_id,) for record_id in record_list),
+            [(record_id,) for record_id in record_list],
         )
-        conn.commit()
+    )
+
+
+
+def get_validators(url: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    读取指定URL上次成功处理时保存的HTTP校验信息（ETag/Last-Modified）及提取文本。
+    不存在时返回None。
+    """
+    with get_connection() as conn:
+        cursor = conn.execute(
+            "SELECT etag, last_modified, content FROM http_validators WHERE url=?",
+            (url,),
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return {"etag": row[0], "last_modified": row[1], "content": row[2]}
+
+
+
+def save_validators(
+    url: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    content: Optional[str] = None,
+) -> None:
+    """
+    保存（覆盖）指定URL的HTTP校验信息及可复用的提取文本。
+    应在资源被成功处理之后调用，避免304时跳过尚未处理完的内容。
+    """
+    _write(
+        lambda conn: conn.execute(
+            """
+            INSERT OR REPLACE INTO http_validators (url, etag, last_modified, content, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+            (url, etag, last_modified, content),
+        )
+    )
+
+
+
+def get_schedule(source_id: str) -> Optional[Dict[str, Optional[float]]]:
+    """
+    读取指定来源的调度状态（上次抓取时间、下次计划时间、间隔、新条目速率）。
+    不存在或尚未调度过（只保存了水位线）时返回None。
+    """
+    with get_connection() as conn:
+        cursor = conn.execute(
+            "SELECT last_run_at, next_run_at, interval, rate FROM source_schedule WHERE source_id=?",
+            (source_id,),
+        )
+        row = cursor.fetchone()
+    if row is None or row[1] is None or row[2] is None:
+        return None
+    return {"last_run_at": row[0], "next_run_at": row[1], "interval": row[2], "rate": row[3]}
+
+
+
+def save_schedule(
+    source_id: str, last_run_at: Optional[float], next_run_at: float, interval: float, rate: float
+) -> None:
+    """
+    保存（覆盖）指定来源的调度状态，不影响已保存的增量水位线。
+    """
+    _write(
+        lambda conn: conn.execute(
+            """
+            INSERT INTO source_schedule (source_id, last_run_at, next_run_at, interval, rate)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(source_id) DO UPDATE SET
+                last_run_at=excluded.last_run_at,
+                next_run_at=excluded.next_run_at,
+                interval=excluded.interval,
+                rate=excluded.rate
+            """,
+            (source_id, last_run_at, next_run_at, interval, rate),
+        )
+    )
+
+
+
+def get_watermark(source_id: str) -> Optional[str]:
+    """
+    读取指定来源的增量抓取水位线（ISO日期），不存在时返回None。
+    """
+    with get_connection() as conn:
+        cursor = conn.execute("SELECT watermark FROM source_schedule WHERE source_id=?", (source_id,))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+
+def save_watermark(source_id: str, watermark: str) -> None:
+    """
+    保存指定来源的增量抓取水位线，应在一次无失败的增量抓取之后调用。
+    """
+    _write(
+        lambda conn: conn.execute(
+            """
+            INSERT INTO source_schedule (source_id, watermark) VALUES (?, ?)
+            ON CONFLICT(source_id) DO UPDATE SET watermark=excluded.watermark
+            """,
+            (source_id, watermark),
+        )
+    )
@@ -0,0 +1,196 @@
+"""
+附件解析结果与OCR文本的内容寻址磁盘缓存。
+
+- 以下载内容的 SHA-256 + 结果类型（pdf/docx/ocr）为键，文本存放在 <root>/<sha前两位>/<sha>.<kind>.txt；
+- 同时记录 URL -> SHA-256 映射，条件请求返回304时可按URL直接取回文本；
+- 索引（条目大小、最近访问时间、URL映射）保存在 <root>/index.db；
+- 总大小超过上限时按最近访问时间淘汰（LRU）；
+- 命中时只在内存中记录访问时间与 URL 映射，写入、淘汰前或距上次落盘超过 ACCESS_FLUSH_SECONDS 时批量写回索引，
+  避免每次命中都触发一次提交（fsync）。
+"""
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import sqlite3  # 索引存储
+import threading  # 线程锁，缓存会在多个工作线程中被访问
+import time  # 记录访问时间
+from pathlib import Path  # 路径处理
+from typing import Dict, Optional, Tuple  # 类型注解
+
+from ..config import PARSE_CACHE_DIR, PARSE_CACHE_ENABLED, PARSE_CACHE_MAX_BYTES  # 缓存配置
+
+ACCESS_FLUSH_SECONDS = 60.0  # 内存中的访问时间最长多久写回一次索引
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    sha TEXT NOT NULL,                -- 下载内容的SHA-256
+    kind TEXT NOT NULL,               -- 结果类型：pdf / docx / ocr
+    size INTEGER NOT NULL,            -- 文本文件字节数
+    last_access REAL NOT NULL,        -- 最近访问时间（epoch秒），用于LRU淘汰
+    PRIMARY KEY (sha, kind)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+CREATE TABLE IF NOT EXISTS url_hashes (
+    url TEXT PRIMARY KEY,             -- 附件/图片URL
+    sha TEXT NOT NULL,                -- 最近一次下载内容的SHA-256
+    updated_at REAL NOT NULL          -- 更新时间（epoch秒）
+);
+"""
+
+
+class ParsedTextCache:
+    """按内容哈希缓存解析文本，带大小上限与命中统计。"""
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.root / "index.db", check_same_thread=False)
+        self._conn.executescript(INDEX_SCHEMA)
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries").fetchone()
+        self._total_bytes = int(row[0])
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._pending_access: Dict[Tuple[str, str], float] = {}  # 尚未写回索引的访问时间
+        self._pending_urls: Dict[str, Tuple[str, float]] = {}  # 尚未写回索引的 URL -> (哈希, 更新时间)
+        self._last_flush = time.monotonic()
+
+    def _path(self, sha: str, kind: str) -> Path:
+        return self.root / sha[:2] / f"{sha}.{kind}.txt"
+
+    def get(self, sha: str, kind: str) -> Optional[str]:
+        """按内容哈希读取文本，未命中返回None。"""
+        with self._lock:
+            path = self._path(sha, kind)
+            try:
+                text = path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                self._pending_access.pop((sha, kind), None)
+                self._conn.execute("DELETE FROM entries WHERE sha=? AND kind=?", (sha, kind))
+                self._conn.commit()
+                self._misses += 1
+                return None
+            self._pending_access[(sha, kind)] = time.time()
+            if time.monotonic() - self._last_flush >= ACCESS_FLUSH_SECONDS:
+                self._flush_pending_locked()
+                self._conn.commit()
+            self._hits += 1
+            return text
+
+    def put(self, sha: str, kind: str, text: str) -> None:
+        """写入文本并在超出容量时淘汰最久未访问的条目。"""
+        data = text.encode("utf-8")
+        with self._lock:
+            path = self._path(sha, kind)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            previous = self._conn.execute(
+                "SELECT size FROM entries WHERE sha=? AND kind=?", (sha, kind)
+            ).fetchone()
+            path.write_bytes(data)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (sha, kind, size, last_access) VALUES (?, ?, ?, ?)",
+                (sha, kind, len(data), time.time()),
+            )
+            self._pending_access.pop((sha, kind), None)
+            self._total_bytes += len(data) - (previous[0] if previous else 0)
+            self._flush_pending_locked()  # 淘汰按最近访问时间排序，先写回内存中的访问记录
+            self._evict_locked()
+            self._conn.commit()
+
+    def remember_url(self, url: str, sha: str) -> None:
+        """记录URL最近一次下载内容的哈希（先缓存在内存中，随访问时间一起写回索引）。"""
+        with self._lock:
+            self._pending_urls[url] = (sha, time.time())
+            if time.monotonic() - self._last_flush >= ACCESS_FLUSH_SECONDS:
+                self._flush_pending_locked()
+                self._conn.commit()
+
+    def get_by_url(self, url: str, kind: str) -> Optional[str]:
+        """按URL最近一次下载内容的哈希读取文本（用于304复用）。"""
+        with self._lock:
+            pending = self._pending_urls.get(url)
+            if pending is not None:
+                sha: Optional[str] = pending[0]
+            else:
+                row = self._conn.execute("SELECT sha FROM url_hashes WHERE url=?", (url,)).fetchone()
+                sha = row[0] if row else None
+            if sha is None:
+                self._misses += 1
+                return None
+        return self.get(sha, kind)
+
+    def flush(self) -> None:
+        """将内存中的访问时间与URL映射写回索引。"""
+        with self._lock:
+            if self._pending_access or self._pending_urls:
+                self._flush_pending_locked()
+                self._conn.commit()
+
+    def _flush_pending_locked(self) -> None:
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE entries SET last_access=? WHERE sha=? AND kind=?",
+                [(accessed, sha, kind) for (sha, kind), accessed in self._pending_access.items()],
+            )
+            self._pending_access.clear()
+        if self._pending_urls:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO url_hashes (url, sha, updated_at) VALUES (?, ?, ?)",
+                [(url, sha, updated_at) for url, (sha, updated_at) in self._pending_urls.items()],
+            )
+            self._pending_urls.clear()
+        self._last_flush = time.monotonic()
+
+    def _evict_locked(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT sha, kind, size FROM entries ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._total_bytes = 0
+                return
+            sha, kind, size = row
+            self._path(sha, kind).unlink(missing_ok=True)
+            self._conn.execute("DELETE FROM entries WHERE sha=? AND kind=?", (sha, kind))
+            self._total_bytes -= size
+            self._evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """命中/未命中/淘汰次数、条目数与占用空间。"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self._hits + self._misses
+            return {
+                "entries": entries,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# 全局缓存实例，首次使用时创建
+_cache: Optional[ParsedTextCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_text_cache() -> Optional[ParsedTextCache]:
+    """获取全局缓存实例；未启用缓存时返回None。"""
+    global _cache
+    if not PARSE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ParsedTextCache(PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES)
+        return _cache
+
+
+def flush_text_cache() -> None:
+    """将全局缓存中尚未落盘的访问时间与URL映射写回索引（关闭服务时调用）。"""
+    with _cache_lock:
+        cache = _cache
+    if cache is not None:
+        cache.flush()
@@ -0,0 +1,166 @@
+"""
+爬取结果到向量库的批量同步队列。
+
+新记录先以 synced=0 写入SQLite，再加入本队列；队列攒满 VECTOR_SYNC_BATCH_SIZE 条
+或距上次刷新超过 VECTOR_SYNC_FLUSH_INTERVAL 秒时，整批做一次嵌入、一次 upsert，
+成功后才调用 mark_synced() 把这批记录标记为已同步。整批失败时逐条重试，只有出错的记录保持 synced=0，
+由 resync_unsynced() 根据SQLite中保存的正文在后台重新同步。
+"""
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import asyncio  # 异步任务调度
+import contextlib  # 异常抑制工具
+from typing import Any, Dict, List, Optional, Tuple  # 类型注解
+
+from .config import VECTOR_SYNC_BATCH_SIZE, VECTOR_SYNC_FLUSH_INTERVAL  # 批大小与刷新间隔
+from .storage import database  # SQLite数据库操作
+from ..vector_store.bridge import store_documents  # 向量库批量写入接口
+
+
+Document = Tuple[str, str, Dict[str, Any]]  # (记录ID, 正文, 元数据)
+
+
+async def _store(batch: List[Document]) -> None:
+    if not await store_documents(batch):
+        raise RuntimeError("vector service rejected the batch")
+
+
+async def store_batch(batch: List[Document]) -> Tuple[List[str], List[str]]:
+    """
+    整批写入向量库；整批失败时逐条重试，避免一条无法嵌入/写入的记录拖累同批其他记录。
+    返回 (写入成功的ID, 写入失败的ID)，不抛出异常。
+    """
+    try:
+        await _store(batch)
+        return [doc_id for doc_id, _, _ in batch], []
+    except Exception as exc:  # noqa: BLE001
+        if len(batch) == 1:
+            print(f"[WARN] Failed to sync document {batch[0][0]} to vector service: {exc}")
+            return [], [batch[0][0]]
+        print(f"[WARN] Failed to sync {len(batch)} documents to vector service, retrying one by one: {exc}")
+    synced: List[str] = []
+    failed: List[str] = []
+    for document in batch:
+        try:
+            await _store([document])
+        except Exception as exc:  # noqa: BLE001
+            print(f"[WARN] Failed to sync document {document[0]} to vector service: {exc}")
+            failed.append(document[0])
+        else:
+            synced.append(document[0])
+    return synced, failed
+
+
+class VectorSyncQueue:
+    """按条数或时间批量刷新到向量库的内存队列。"""
+
+    def __init__(self, batch_size: int, flush_interval: float) -> None:
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.1, flush_interval)
+        self._pending: List[Document] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def enqueue(self, document_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        """加入一条待同步记录，攒满一批时立即刷新。"""
+        self._pending.append((document_id, text, metadata))
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> int:
+        """
+        把当前队列按批写入向量库，成功的记录标记为已同步。
+        返回成功同步的条数；失败的记录仅记录警告，在SQLite中保持未同步。
+        """
+        synced = 0
+        async with self._get_lock():
+            while self._pending:
+                batch = self._pending[: self.batch_size]
+                del self._pending[: self.batch_size]
+                synced_ids, _ = await store_batch(batch)
+                try:
+                    await asyncio.to_thread(database.mark_synced, synced_ids)
+                except Exception as exc:  # noqa: BLE001
+                    print(f"[WARN] Failed to mark {len(synced_ids)} documents as synced: {exc}")
+                    continue
+                synced += len(synced_ids)
+        return synced
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._pending:
+                await self.flush()
+
+    def start(self) -> None:
+        """启动按时间刷新的后台任务。"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务并刷新剩余记录。"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+
+def build_metadata(
+    url: str, source_id: str, source_name: str, title: Optional[str], publish_time: Optional[str]
+) -> Dict[str, Any]:
+    """构造写入向量库的文档元数据（抓取入库与重新同步共用）。"""
+    return {
+        "url": url,
+        "source_id": source_id,
+        "source_name": source_name,
+        "title": title,
+        "publish_time": publish_time,
+    }
+
+
+async def resync_unsynced(batch_size: int, min_age_seconds: float, max_attempts: int = 0) -> int:
+    """
+    分页扫描SQLite中未同步的记录，按批重新写入向量库并标记为已同步；返回本轮同步成功的条数。
+    整批失败时逐条重试，仍失败的记录跳过（游标照常前进）并累计失败次数，达到 max_attempts 后不再扫描，
+    避免一条无法写入的记录反复阻塞其后的所有记录。
+    本轮没有任何记录写入成功时，失败更可能是向量库不可用而非记录本身的问题：此时不累计失败次数，
+    扫描结束后抛出异常，由调用方退避后重试。
+    """
+    synced = 0
+    after_rowid = 0
+    unconfirmed: List[str] = []  # 本轮尚无成功写入时失败的记录，确认向量库可用后才累计失败次数
+    while True:
+        rows = await asyncio.to_thread(database.fetch_unsynced, batch_size, after_rowid, min_age_seconds, max_attempts)
+        if not rows:
+            break
+        after_rowid = rows[-1]["rowid"]
+        batch = [
+            (
+                row["id"],
+                row["content"],
+                build_metadata(row["url"], row["source_id"], row["source_name"], row["title"], row["publish_time"]),
+            )
+            for row in rows
+        ]
+        synced_ids, failed_ids = await store_batch(batch)
+        await asyncio.to_thread(database.mark_synced, synced_ids)
+        synced += len(synced_ids)
+        if synced:
+            await asyncio.to_thread(database.record_sync_failures, unconfirmed + failed_ids)
+            unconfirmed = []
+        else:
+            unconfirmed.extend(failed_ids)
+    if unconfirmed:
+        raise RuntimeError(f"vector service rejected all {len(unconfirmed)} documents in this pass")
+    return synced
+
+
+# 全局同步队列实例，由爬虫生命周期启动/停止
+vector_sync_queue = VectorSyncQueue(VECTOR_SYNC_BATCH_SIZE, VECTOR_SYNC_FLUSH_INTERVAL)
@@ -0,0 +1,107 @@
+"""
+CPU密集型解析任务（PDF/Word解析、OCR）的进程池执行器。
+
+PyPDF2等纯Python解析在线程中会被GIL串行化，这里用ProcessPoolExecutor把任务分摊到多核：
+- PARSE_WORKERS 控制进程数（0 表示退回线程执行）；
+- PARSE_TASK_TIMEOUT 为单个任务的超时时间；
+- PARSE_MAX_TASKS_PER_CHILD 让子进程处理一定数量的任务后自动重建，遏制解析库的内存泄漏。
+子进程使用 spawn 方式启动，只导入 parsers.py 等轻量模块。
+"""
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import asyncio  # 异步任务调度
+import functools  # 偏函数，用于包装带参数的任务
+import multiprocessing  # 进程启动方式
+import weakref  # 记录已回收的进程池
+from concurrent.futures import ProcessPoolExecutor  # 进程池
+from concurrent.futures.process import BrokenProcessPool  # 子进程异常退出
+from typing import Any, Callable, Optional  # 类型注解
+
+from .config import PARSE_MAX_TASKS_PER_CHILD, PARSE_TASK_TIMEOUT, PARSE_WORKERS  # 进程池配置
+
+
+# 全局进程池，首次使用时创建
+_pool: Optional[ProcessPoolExecutor] = None
+# 因超时或崩溃被回收的进程池；其中其他任务的失败属于连带失败，会在新进程池中重试
+_recycled_pools: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+COLLATERAL_RETRIES = 2  # 连带失败的最大重试次数
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """获取（必要时创建）全局进程池。"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=PARSE_MAX_TASKS_PER_CHILD or None,
+        )
+    return _pool
+
+
+def _terminate_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    关闭进程池并强制结束其子进程。
+    shutdown(wait=False) 不会停止正在执行的任务，卡住的子进程会一直存活，
+    标准库又没有提供结束子进程的接口，这里通过私有属性 _processes 逐个terminate。
+    """
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+def _recycle_pool(pool: ProcessPoolExecutor) -> None:
+    """
+    丢弃出问题的进程池并结束其子进程，下次调用时重建。
+    旧进程池中其他正在执行或排队的任务由 run_cpu_task 在新进程池中重试。
+    """
+    global _pool
+    if _pool is pool:
+        _pool = None
+    _recycled_pools.add(pool)
+    _terminate_pool(pool)
+
+
+async def run_cpu_task(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    在进程池中执行CPU密集型函数，超时或进程池损坏时抛出RuntimeError。
+    其他任务超时（或子进程崩溃）导致进程池被回收时，本任务会在新进程池中重试，
+    避免并发解析的附件被连带丢弃。func及参数必须可被pickle（模块级函数）。
+    """
+    call = functools.partial(func, *args)
+    name = getattr(func, "__name__", func)
+    if PARSE_WORKERS <= 0:
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(call), timeout=PARSE_TASK_TIMEOUT)
+        except asyncio.TimeoutError as exc:
+            raise RuntimeError(f"{name} timed out after {PARSE_TASK_TIMEOUT}s") from exc
+    for _ in range(COLLATERAL_RETRIES + 1):
+        pool = _get_pool()
+        future = asyncio.get_running_loop().run_in_executor(pool, call)
+        try:
+            done, _ = await asyncio.wait({future}, timeout=PARSE_TASK_TIMEOUT)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        if not done:
+            future.cancel()
+            _recycle_pool(pool)  # 超时任务可能卡住子进程，换一个新进程池承接后续任务
+            raise RuntimeError(f"{name} timed out after {PARSE_TASK_TIMEOUT}s")
+        broken = future.cancelled() or isinstance(future.exception(), BrokenProcessPool)
+        if not broken:
+            return future.result()
+        if pool in _recycled_pools:  # 进程池已被其他任务回收，本任务属于连带失败
+            continue
+        _recycle_pool(pool)
+        raise RuntimeError(f"parse worker crashed while running {name}")
+    raise RuntimeError(f"{name} was interrupted {COLLATERAL_RETRIES + 1} times by other parse tasks failing")
+
+
+def shutdown() -> None:
+    """关闭进程池并结束所有子进程（应用退出时调用）。"""
+    global _pool
+    if _pool is not None:
+        _terminate_pool(_pool)
+        _pool = None
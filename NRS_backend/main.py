@@ -10,18 +10,36 @@ NJU Unified Backend 主入口
 from __future__ import annotations
 
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-# 导入爬虫模块的 lifespan 生命周期管理器
+from fastapi.responses import JSONResponse
+# 导入各子模块的 lifespan 生命周期管理器
 from .crawler.lifecycle import crawler_lifespan  # 用于定时任务生命周期管理
+from .rag.lifecycle import rag_lifespan  # 用于 LLM/向量服务连接池生命周期管理
+from .vector_store.lifecycle import vector_store_lifespan  # 用于向量库线程池生命周期管理
 
 # 导入各子模块的路由注册函数
 from .crawler import setup_crawler      # 挂载爬虫相关 API（/api/crawl）
 from .rag import setup_rag              # 挂载 RAG 问答 API（/api/rag）
 from .vector_store import setup_vector_store  # 挂载向量库 API（/vectors/*）
+from .vector_store.bridge import readiness as vector_store_readiness  # 向量库预热状态
+
+
+@asynccontextmanager
+async def app_lifespan(app: FastAPI):
+    """
+    组合各子模块的 lifespan。
+    向量库最先启动、最后关闭，保证爬虫任务退出前仍可写入向量库。
+    """
+    async with vector_store_lifespan(app):
+        async with rag_lifespan(app):
+            async with crawler_lifespan(app):
+                yield
 
 
 # 创建主 FastAPI 应用，指定 lifespan 参数实现定时任务自动管理
-app = FastAPI(title="NJU Unified Backend", version="1.0.0", lifespan=crawler_lifespan)
+app = FastAPI(title="NJU Unified Backend", version="1.0.0", lifespan=app_lifespan)
 
 # 挂载各子服务到主应用
 setup_crawler(app)         # 注册 /api/crawl 路由
@@ -37,6 +55,17 @@ async def health_check() -> dict[str, str]:
     """
     return {"status": "ok"}
 
+# 就绪检查接口，供负载均衡/滚动发布探测
+@app.get("/ready")
+async def readiness_check() -> JSONResponse:
+    """
+    返回服务是否已就绪。
+    与 /health 不同：进程启动后立即可用的是 /health，嵌入模型与向量库预热完成前 /ready 返回 503。
+    预热进行中 status 为 warming_up；预热失败（后台退避重试中）为 warmup_failed，并附带失败原因与尝试次数。
+    """
+    status = vector_store_readiness()
+    return JSONResponse(status_code=200 if status["status"] == "ready" else 503, content=status)
+
 # 提供给 ASGI/Uvicorn 的应用实例获取方法
 def get_app() -> FastAPI:
     return app
@@ -0,0 +1,92 @@
+"""Semantic answer cache placed in front of the LLM call."""  # 位于LLM调用之前的语义答案缓存
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import time  # 计时，用于条目过期判断
+from collections import OrderedDict  # 有序字典，实现LRU淘汰
+from dataclasses import dataclass  # 数据类，描述缓存条目
+from typing import Optional, Sequence, Tuple  # 类型注解
+
+import numpy as np  # 向量相似度计算
+
+from .models import AnswerResponse  # RAG响应模型
+
+
+@dataclass
+class _CachedAnswer:
+    vector: np.ndarray  # 问题的归一化嵌入向量
+    source_ids: Tuple[str, ...]  # 生成答案时检索到的来源ID
+    response: AnswerResponse  # 缓存的完整响应
+    stored_at: float  # 写入时间（单调时钟）
+
+
+class AnswerCache:
+    """Reuses answers for semantically similar questions with unchanged sources."""  # 对语义相近且来源未变的问题复用答案
+
+    def __init__(self, max_size: int, threshold: float, ttl_seconds: float) -> None:
+        self._max_size = max(0, max_size)  # 最大条目数，0表示禁用
+        self._threshold = threshold  # 余弦相似度阈值
+        self._ttl = ttl_seconds  # 条目存活时间（秒），<=0表示永不过期
+        self._entries: "OrderedDict[int, _CachedAnswer]" = OrderedDict()  # 自增键 -> 缓存条目
+        self._next_key = 0  # 下一个条目键
+        self._data_version: Optional[int] = None  # 条目对应的向量库数据版本
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0  # 容量为0时视为禁用
+
+    def _sync_version(self, data_version: int) -> bool:
+        if self._data_version is None or data_version > self._data_version:  # 向量库有新写入，旧答案全部失效
+            self._entries.clear()
+            self._data_version = data_version
+        return data_version == self._data_version  # 调用方持有的版本已过时则返回False
+
+    def lookup(
+        self, vector: Sequence[float], source_ids: Sequence[str], data_version: int
+    ) -> Optional[AnswerResponse]:
+        if not self.enabled:
+            return None
+        if not self._sync_version(data_version):  # 先按数据版本失效；调用方版本过时视为未命中
+            self.misses += 1
+            return None
+        query = np.asarray(vector, dtype=np.float32)  # 问题向量（已归一化）
+        wanted = tuple(source_ids)  # 本次检索到的来源ID
+        now = time.monotonic()
+        best_key: Optional[int] = None  # 最相似且来源一致的条目
+        best_score = self._threshold
+        for key, entry in list(self._entries.items()):
+            if self._ttl > 0 and now - entry.stored_at > self._ttl:  # 清理过期条目
+                del self._entries[key]
+                continue
+            if entry.source_ids != wanted:  # 来源已变化，答案可能过时
+                continue
+            score = float(np.dot(entry.vector, query))  # 归一化向量的点积即余弦相似度
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best_key)  # 标记为最近使用
+        self.hits += 1
+        return self._entries[best_key].response.model_copy(deep=True)  # 返回副本，避免调用方修改缓存
+
+    def store(
+        self, vector: Sequence[float], source_ids: Sequence[str], data_version: int, response: AnswerResponse
+    ) -> None:
+        if not self.enabled:
+            return
+        if not self._sync_version(data_version):  # 生成答案期间向量库已更新，答案可能基于旧数据，不缓存
+            return
+        self._entries[self._next_key] = _CachedAnswer(
+            vector=np.asarray(vector, dtype=np.float32),
+            source_ids=tuple(source_ids),
+            response=response.model_copy(deep=True),
+            stored_at=time.monotonic(),
+        )
+        self._next_key += 1
+        while len(self._entries) > self._max_size:  # 超出容量时淘汰最久未使用的条目
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()  # 清空全部条目
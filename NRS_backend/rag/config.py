@@ -42,6 +42,16 @@ class RagSettings(BaseSettings):
         description="Base URL for OpenAI-compatible APIs (set this to Qwen cloud endpoint when needed).",  # 描述：OpenAI兼容API的基础URL（需要时设置为Qwen云端点）
     )
 
+    # 连接池配置（外部向量服务与LLM调用共用）
+    http_max_connections: int = Field(default=100, alias="HTTP_MAX_CONNECTIONS")  # 连接池最大连接数
+    http_max_keepalive_connections: int = Field(default=20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS")  # 最大空闲保活连接数
+    http_keepalive_expiry: float = Field(default=30.0, alias="HTTP_KEEPALIVE_EXPIRY")  # 空闲连接保活时长（秒）
+    http2_enabled: bool = Field(  # 是否启用HTTP/2
+        default=False,  # 默认关闭
+        alias="HTTP2_ENABLED",  # 环境变量别名
+        description="Negotiate HTTP/2 for pooled clients (requires the h2 package).",  # 描述：连接池客户端使用HTTP/2（需安装h2包）
+    )
+
     # 检索配置
     top_k: int = Field(default=3, alias="TOP_K")  # 检索结果数量，默认3
     similarity_threshold: float = Field(default=0.7, alias="SIMILARITY_THRESHOLD")  # 相似度阈值，默认0.7
@@ -56,6 +66,15 @@ class RagSettings(BaseSettings):
         alias="PROMPT_TEMPLATE",  # 环境变量别名
     )
 
+    # 语义答案缓存配置
+    answer_cache_size: int = Field(default=256, alias="ANSWER_CACHE_SIZE")  # 答案缓存容量，0表示禁用
+    answer_cache_threshold: float = Field(  # 命中缓存所需的最低问题相似度
+        default=0.95,  # 默认0.95
+        alias="ANSWER_CACHE_THRESHOLD",  # 环境变量别名
+        description="Minimum cosine similarity between questions for a cached answer to be reused.",  # 描述：复用缓存答案所需的最低问题余弦相似度
+    )
+    answer_cache_ttl: float = Field(default=86400.0, alias="ANSWER_CACHE_TTL")  # 答案缓存条目存活时间（秒），<=0表示永不过期
+
     # Pydantic配置
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")  # 模型配置：从.env文件读取，忽略额外字段
 
@@ -0,0 +1,23 @@
+"""Lifespan hooks for the RAG module."""  # RAG模块的生命周期钩子
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import logging  # 日志记录
+from contextlib import asynccontextmanager  # lifespan上下文管理器
+
+from fastapi import FastAPI  # 导入FastAPI主类
+
+from .service import rag_service  # 导入RAG服务实例
+
+logger = logging.getLogger(__name__)  # 获取当前模块日志对象
+
+
+@asynccontextmanager
+async def rag_lifespan(app: FastAPI):
+    """Open pooled LLM/vector HTTP clients on startup and close them on shutdown."""  # 启动时创建连接池客户端，关闭时释放
+    await rag_service.startup()  # 创建连接池客户端
+    logger.info("Started RAG HTTP client pool")  # 启动日志
+    try:
+        yield  # 应用运行期间
+    finally:
+        await rag_service.shutdown()  # 关闭连接池
+        logger.info("Stopped RAG HTTP client pool")  # 停止日志
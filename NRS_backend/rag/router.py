@@ -4,13 +4,17 @@ RAG 问答 API 路由
 
 本文件负责暴露 /api/rag 相关接口，包括：
   - POST /api/rag      问答主接口（前端 Thinking 模式用）
+  - POST /api/rag/stream 流式问答接口（NDJSON，先返回来源再逐个返回 token）
   - GET /api/rag/health  RAG 子系统健康检查
 """
 from __future__ import annotations  # 兼容未来类型注解语法
 
+import json  # 序列化流式事件
 import logging  # 日志记录，用于异常追踪
+from typing import AsyncIterator  # 类型注解：异步迭代器
 
 from fastapi import APIRouter, HTTPException, status  # FastAPI路由器、异常处理、状态码
+from fastapi.responses import StreamingResponse  # 流式响应
 
 # 数据模型：问答请求体、响应体、错误体
 from .models import AnswerResponse, ErrorResponse, QuestionRequest  # 导入Pydantic数据模型
@@ -56,6 +60,41 @@ async def rag_endpoint(payload: QuestionRequest) -> AnswerResponse:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
 
 
+#
+# POST /api/rag/stream
+# 说明：
+#   - 请求体：{"question": "你的问题"}
+#   - 返回：application/x-ndjson，每行一个 JSON 事件：
+#       {"type": "sources", "code": "200", "sources": [...]}  先返回引用来源
+#       {"type": "token", "content": "..."}                  LLM 生成的增量文本
+#       {"type": "done", "cached": false}                    生成结束
+#       {"type": "error", "detail": "..."}                   生成中途出错
+#   - 首个 token 到达即可渲染，缩短用户感知的等待时间
+#
+@router.post("/stream", responses={400: {"model": ErrorResponse}})
+async def rag_stream_endpoint(payload: QuestionRequest) -> StreamingResponse:
+    """
+    流式 RAG 问答接口。
+    参数：payload.question（用户问题字符串）
+    返回：NDJSON 流（sources → token... → done）
+    异常：
+      - 问题为空：返回 400（流开始前校验）
+      - 生成中途异常：以 error 事件结束流
+    """
+    if not payload.question.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="问题不能为空")
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in rag_service.stream_answer(payload.question):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("RAG streaming pipeline failed")
+            yield json.dumps({"type": "error", "detail": str(exc)}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
 # GET /api/rag/health
 # 说明：
 #   - 返回 RAG 子系统健康状态
@@ -1,16 +1,22 @@
 """Core RAG orchestration logic."""  # RAG核心编排逻辑模块
 from __future__ import annotations  # 兼容未来类型注解语法
 
+import importlib.util  # 检测可选依赖h2是否安装
+import json  # 解析Ollama流式响应的逐行JSON
 import logging  # 日志记录，用于异常追踪
-from typing import Iterable, List, Sequence  # 类型注解：Iterable用于迭代，List和Sequence用于序列
+from typing import Any, AsyncIterator, Dict, Iterable, List, Sequence  # 类型注解：Iterable用于迭代，List和Sequence用于序列，AsyncIterator用于流式输出
 
 import httpx  # HTTP客户端，用于调用外部向量服务和LLM API
 
+# 语义答案缓存
+from .cache import AnswerCache  # 导入答案缓存
 # 配置：RAG设置类和获取函数
 from .config import RagSettings, get_settings  # 导入配置类和工厂函数
 # 数据模型：回答响应和源文档
 from .models import AnswerResponse, SourceDocument  # 导入Pydantic数据模型
 # 向量存储桥接：搜索文档函数
+from ..vector_store.bridge import data_version as bridge_data_version  # 导入向量库数据版本函数
+from ..vector_store.bridge import embed_query as bridge_embed  # 导入查询嵌入桥接函数
 from ..vector_store.bridge import search_documents as bridge_search  # 导入向量搜索桥接函数
 # 向量存储模型：向量匹配和搜索响应
 from ..vector_store.models import VectorMatch, VectorSearchResponse  # 导入向量存储数据模型
@@ -23,6 +29,42 @@ class RAGService:
 
     def __init__(self, settings: RagSettings | None = None) -> None:
         self.settings = settings or get_settings()  # 初始化设置，如果未提供则使用默认配置
+        self._answer_cache = AnswerCache(  # 语义答案缓存
+            max_size=self.settings.answer_cache_size,  # 容量
+            threshold=self.settings.answer_cache_threshold,  # 相似度阈值
+            ttl_seconds=self.settings.answer_cache_ttl,  # 存活时间
+        )
+        if self._answer_cache.enabled and self.settings.vector_service_url:  # 外部向量库的写入无法感知，缓存答案可能过时
+            logger.info("Answer cache disabled: external vector service configured")
+        self._http_client: httpx.AsyncClient | None = None  # 共享的连接池HTTP客户端，在lifespan中创建
+        self._openai: Any = None  # 共享的OpenAI客户端，复用上面的连接池
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:  # 首次使用或已关闭时创建
+            http2 = self.settings.http2_enabled  # 是否启用HTTP/2
+            if http2 and importlib.util.find_spec("h2") is None:  # HTTP/2需要安装h2包
+                logger.warning("HTTP2_ENABLED is set but the h2 package is not installed; using HTTP/1.1")
+                http2 = False
+            self._http_client = httpx.AsyncClient(  # 创建长连接客户端
+                limits=httpx.Limits(  # 连接池限制
+                    max_connections=self.settings.http_max_connections,  # 最大连接数
+                    max_keepalive_connections=self.settings.http_max_keepalive_connections,  # 最大空闲保活连接数
+                    keepalive_expiry=self.settings.http_keepalive_expiry,  # 空闲连接保活时长（秒）
+                ),
+                http2=http2,  # HTTP/2开关
+            )
+        return self._http_client  # 返回共享客户端
+
+    async def startup(self) -> None:
+        """Create the pooled clients (called from the application lifespan)."""  # 在应用启动时创建连接池客户端
+        self._get_http_client()
+
+    async def shutdown(self) -> None:
+        """Close pooled connections (called from the application lifespan)."""  # 在应用关闭时释放连接
+        self._openai = None  # OpenAI客户端复用同一连接池，随之失效
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()  # 关闭连接池
+        self._http_client = None
 
     async def _search_via_http(self, question: str, top_k: int) -> Sequence[VectorMatch]:
         if not self.settings.vector_service_url:  # 如果未配置外部向量服务URL，直接返回空结果
@@ -32,10 +74,10 @@ class RAGService:
         url = f"{base}{endpoint}"  # 构建完整搜索URL
         payload = {"query": question, "top_k": top_k}  # 构建请求载荷
         timeout = httpx.Timeout(self.settings.vector_request_timeout)  # 设置请求超时
-        async with httpx.AsyncClient(timeout=timeout) as client:  # 创建异步HTTP客户端
-            response = await client.post(url, json=payload)  # 发送POST请求
-            response.raise_for_status()  # 检查响应状态，如果失败则抛出异常
-            data = response.json()  # 解析JSON响应
+        client = self._get_http_client()  # 复用连接池客户端
+        response = await client.post(url, json=payload, timeout=timeout)  # 发送POST请求
+        response.raise_for_status()  # 检查响应状态，如果失败则抛出异常
+        data = response.json()  # 解析JSON响应
         result = VectorSearchResponse(**data)  # 将响应数据转换为VectorSearchResponse对象
         return result.results  # 返回搜索结果列表
 
@@ -64,16 +106,18 @@ class RAGService:
         url = self.settings.ollama_base_url.rstrip("/") + "/api/generate"  # 构建Ollama生成API URL
         payload = {"model": self.settings.ollama_model, "prompt": prompt, "stream": False}  # 构建请求载荷
         timeout = httpx.Timeout(self.settings.ollama_timeout)  # 设置超时
-        async with httpx.AsyncClient(timeout=timeout) as client:  # 创建异步HTTP客户端
-            response = await client.post(url, json=payload)  # 发送POST请求
-            response.raise_for_status()  # 检查响应状态
-            data = response.json()  # 解析JSON响应
+        client = self._get_http_client()  # 复用连接池客户端
+        response = await client.post(url, json=payload, timeout=timeout)  # 发送POST请求
+        response.raise_for_status()  # 检查响应状态
+        data = response.json()  # 解析JSON响应
         answer = (data.get("response") or data.get("output") or "").strip()  # 提取回答内容
         if not answer:  # 如果回答为空
             raise RuntimeError("Ollama returned an empty response")  # 抛出运行时异常
         return answer  # 返回回答
 
-    async def _call_openai(self, prompt: str) -> str:  # pragma: no cover - optional provider  # 调用OpenAI接口（可选提供商）
+    def _openai_client(self):  # pragma: no cover - optional provider  # 获取共享的OpenAI客户端
+        if self._openai is not None:  # 已创建则直接复用
+            return self._openai
         api_key = self.settings.openai_api_key  # 获取API密钥
         if not api_key:  # 如果未配置API密钥
             raise RuntimeError("OPENAI_API_KEY is not configured")  # 抛出运行时异常
@@ -81,7 +125,15 @@ class RAGService:
             from openai import AsyncOpenAI  # type: ignore  # 动态导入OpenAI客户端
         except ImportError as exc:  # pragma: no cover - optional dependency  # 捕获导入异常
             raise RuntimeError("The openai package is not installed") from exc  # 抛出运行时异常
-        client = AsyncOpenAI(api_key=api_key, base_url=self.settings.openai_base_url)  # 创建OpenAI客户端
+        self._openai = AsyncOpenAI(  # 创建OpenAI客户端，底层复用共享连接池
+            api_key=api_key,
+            base_url=self.settings.openai_base_url,
+            http_client=self._get_http_client(),
+        )
+        return self._openai
+
+    async def _call_openai(self, prompt: str) -> str:  # pragma: no cover - optional provider  # 调用OpenAI接口（可选提供商）
+        client = self._openai_client()  # 获取OpenAI客户端
         response = await client.chat.completions.create(  # 调用聊天完成API
             model=self.settings.openai_model,  # 指定模型
             messages=[{"role": "user", "content": prompt}],  # 构建消息列表
@@ -89,6 +141,51 @@ class RAGService:
         )
         return response.choices[0].message.content.strip()  # 返回第一个选择的内容
 
+    async def stream_llm(self, prompt: str) -> AsyncIterator[str]:
+        provider = self.settings.llm_provider.lower()  # 获取LLM提供商名称，转小写
+        if provider == "ollama":  # 如果是Ollama提供商
+            stream = self._stream_ollama(prompt)  # Ollama流式接口
+        elif provider == "openai":  # 如果是OpenAI提供商
+            stream = self._stream_openai(prompt)  # OpenAI流式接口
+        else:
+            raise ValueError(f"Unsupported LLM provider: {self.settings.llm_provider}")  # 抛出异常：不支持的提供商
+        async for token in stream:  # 逐个转发生成的token
+            yield token
+
+    async def _stream_ollama(self, prompt: str) -> AsyncIterator[str]:
+        url = self.settings.ollama_base_url.rstrip("/") + "/api/generate"  # 构建Ollama生成API URL
+        payload = {"model": self.settings.ollama_model, "prompt": prompt, "stream": True}  # 开启流式输出
+        timeout = httpx.Timeout(self.settings.ollama_timeout)  # 设置超时（作用于每次读取）
+        client = self._get_http_client()  # 复用连接池客户端
+        async with client.stream("POST", url, json=payload, timeout=timeout) as response:  # 以流方式发送请求
+            response.raise_for_status()  # 检查响应状态
+            async for line in response.aiter_lines():  # Ollama每行返回一个JSON对象
+                if not line.strip():
+                    continue
+                data = json.loads(line)  # 解析当前行
+                if data.get("error"):  # 生成过程中出错
+                    raise RuntimeError(f"Ollama error: {data['error']}")
+                token = data.get("response") or ""  # 本次增量文本
+                if token:
+                    yield token
+                if data.get("done"):  # 生成结束
+                    break
+
+    async def _stream_openai(self, prompt: str) -> AsyncIterator[str]:  # pragma: no cover - optional provider  # OpenAI流式接口
+        client = self._openai_client()  # 获取OpenAI客户端
+        stream = await client.chat.completions.create(  # 调用聊天完成API（流式）
+            model=self.settings.openai_model,  # 指定模型
+            messages=[{"role": "user", "content": prompt}],  # 构建消息列表
+            temperature=0.2,  # 设置温度参数
+            stream=True,  # 开启流式输出
+        )
+        async for chunk in stream:  # 逐块读取增量
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content  # 本次增量文本
+            if delta:
+                yield delta
+
     def build_prompt(self, question: str, matches: Sequence[VectorMatch]) -> str:
         parts: List[str] = []  # 初始化部分列表
         for idx, match in enumerate(matches, start=1):  # 遍历匹配结果，从1开始编号
@@ -118,13 +215,76 @@ class RAGService:
         question = question.strip()  # 去除问题首尾空白字符
         if not question:  # 如果问题为空
             raise ValueError("问题不能为空")  # 抛出值错误异常
+        version = self._answer_cache_version()  # 检索前记录向量库数据版本，用于答案缓存失效判断（不使用缓存时为None）
         matches = await self.search_vector_db(question)  # 搜索向量数据库获取相关文档
         if not matches:  # 如果没有找到匹配的文档
             return AnswerResponse(code="404", answer="抱歉，没有检索到相关的参考信息。", sources=[])  # 返回无结果响应
+        cache_key = await self._answer_cache_key(question, matches, version)  # 计算语义缓存键（未启用时为None）
+        if cache_key is not None:
+            cached = self._answer_cache.lookup(*cache_key)  # 查找相似问题且来源一致的历史答案
+            if cached is not None:
+                return cached  # 命中缓存，跳过LLM调用
         prompt = self.build_prompt(question, matches)  # 基于问题和匹配结果构建提示
         answer = await self.call_llm(prompt)  # 调用LLM生成回答
         sources = self.format_sources(matches)  # 格式化源文档列表
-        return AnswerResponse(answer=answer, sources=sources)  # 返回包含回答和源文档的响应
+        response = AnswerResponse(answer=answer, sources=sources)  # 构建包含回答和源文档的响应
+        if cache_key is not None:
+            self._answer_cache.store(*cache_key, response=response)  # 写入缓存（检索后向量库若有新写入则不缓存）
+        return response  # 返回响应
+
+    async def stream_answer(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a sources event, then answer tokens as the LLM produces them."""  # 先输出来源，再随LLM生成逐个输出token
+        question = question.strip()  # 去除问题首尾空白字符
+        if not question:  # 如果问题为空
+            raise ValueError("问题不能为空")  # 抛出值错误异常
+        version = self._answer_cache_version()  # 检索前记录向量库数据版本
+        matches = await self.search_vector_db(question)  # 搜索向量数据库获取相关文档
+        if not matches:  # 如果没有找到匹配的文档
+            yield {"type": "sources", "code": "404", "sources": []}  # 空来源
+            yield {"type": "token", "content": "抱歉，没有检索到相关的参考信息。"}  # 无结果提示
+            yield {"type": "done", "cached": False}  # 结束
+            return
+        cache_key = await self._answer_cache_key(question, matches, version)  # 计算语义缓存键
+        if cache_key is not None:
+            cached = self._answer_cache.lookup(*cache_key)  # 查找历史答案
+            if cached is not None:  # 命中缓存，整段答案作为一个token返回
+                yield {"type": "sources", "code": cached.code, "sources": [src.model_dump() for src in cached.sources]}
+                yield {"type": "token", "content": cached.answer}
+                yield {"type": "done", "cached": True}
+                return
+        sources = self.format_sources(matches)  # 格式化源文档列表
+        yield {"type": "sources", "code": "200", "sources": [src.model_dump() for src in sources]}  # 先输出来源
+        prompt = self.build_prompt(question, matches)  # 构建提示
+        parts: List[str] = []  # 收集完整答案，用于写入缓存
+        async for token in self.stream_llm(prompt):  # 逐个输出token
+            parts.append(token)
+            yield {"type": "token", "content": token}
+        answer = "".join(parts).strip()  # 完整答案
+        if answer and cache_key is not None:
+            self._answer_cache.store(*cache_key, response=AnswerResponse(answer=answer, sources=sources))  # 写入缓存
+        yield {"type": "done", "cached": False}  # 结束
+
+    @property
+    def _answer_cache_active(self) -> bool:
+        # 配置外部向量服务时不使用答案缓存：本进程无法得知外部库的数据版本，也无需为此加载本地嵌入模型
+        return self._answer_cache.enabled and not self.settings.vector_service_url
+
+    def _answer_cache_version(self) -> int | None:
+        if not self._answer_cache_active:
+            return None
+        return bridge_data_version()
+
+    async def _answer_cache_key(
+        self, question: str, matches: Sequence[VectorMatch], version: int | None
+    ) -> tuple[List[float], List[str], int] | None:
+        if version is None or not self._answer_cache_active:  # 缓存未启用或不适用
+            return None
+        try:
+            vector = await bridge_embed(question)  # 问题向量（命中查询嵌入缓存时无需重新计算）
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Answer cache disabled for this request: %s", exc)  # 嵌入失败不影响主流程
+            return None
+        return vector, [match.document_id for match in matches], version  # 问题向量、来源ID、数据版本
 
 
 # 创建RAG服务实例，供路由器使用
@@ -0,0 +1 @@
+"""后端单元测试（在仓库根目录运行：python -m pytest NRS_backend/tests）。"""
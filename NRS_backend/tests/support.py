@@ -0,0 +1,37 @@
+"""测试公用工具。"""
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from NRS_backend.crawler.storage import database
+
+
+class TempDatabaseTestCase(unittest.TestCase):
+    """每个用例使用独立的临时SQLite文件，结束时关闭写线程与读连接。"""
+
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.db_path = os.path.join(tmp_dir.name, "crawler.db")
+        patcher = mock.patch.multiple(database, DATABASE_PATH=self.db_path, _initialized=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close)
+
+    @staticmethod
+    def insert(record_id: str, content: str = "正文", synced: bool = False, **fields) -> None:
+        database.insert_record(
+            record_id,
+            fields.get("title", f"title {record_id}"),
+            fields.get("url", f"http://x/{record_id}"),
+            fields.get("publish_time"),
+            fields.get("source_id", "src"),
+            fields.get("source_name", "Source"),
+            synced,
+            None,
+            content,
+        )
@@ -0,0 +1,104 @@
+"""crawler/services.py 的 crawl_source：列表页预检与HTTP校验信息（网络与解析均替换为假实现）。"""
+from __future__ import annotations
+
+import asyncio
+from unittest import mock
+
+from NRS_backend.crawler import services
+from NRS_backend.crawler.storage import database
+
+from .support import TempDatabaseTestCase
+
+SOURCE = {
+    "id": "test",
+    "name": "Test Source",
+    "list_url": "http://example.edu/list.htm",
+    "base_url": "http://example.edu",
+    "headers": {},
+    "selectors": {},
+    "max_pages": 1,
+}
+
+
+class CrawlSourceTests(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.entries = []
+        self.detail_fetches = []
+        self.detail_error = None
+        patcher = mock.patch.multiple(
+            services,
+            TARGET_SOURCES=[SOURCE],
+            VECTOR_SYNC_ENABLED=False,
+            fetch_html=self.fake_fetch_html,
+            parse_list=lambda html, selectors, base_url: list(self.entries),
+            parse_detail_page=self.fake_parse_detail_page,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        services._PENDING_VALIDATORS.clear()
+
+    async def fake_fetch_html(self, url, headers, conditional=False, **kwargs):
+        if url == SOURCE["list_url"]:
+            return "<list>"
+        self.detail_fetches.append(url)
+        services._remember_validators(url, mock.Mock(headers={"etag": f'"{url}"'}))
+        return f"<detail {url}>"
+
+    async def fake_parse_detail_page(self, html, base_url, headers):
+        if self.detail_error:
+            raise self.detail_error
+        return f"content of {html}", []
+
+    def crawl(self):
+        return asyncio.run(services.crawl_source(SOURCE["id"]))
+
+    def test_known_entries_are_not_fetched_again(self):
+        self.entries = [
+            {"url": "http://example.edu/a.htm", "title": "A", "date": "2024-03-01"},
+            {"url": "http://example.edu/b.htm", "title": "B", "date": " 2024/03/02 "},
+            {"url": "http://example.edu/c.htm", "title": "C"},
+        ]
+        self.assertEqual(len(self.crawl()), 3)
+        self.detail_fetches.clear()
+        self.assertEqual(self.crawl(), [])
+        self.assertEqual(self.detail_fetches, [])
+
+    def test_unparseable_date_is_always_fetched(self):
+        self.entries = [
+            {"url": "http://example.edu/a.htm", "title": "A", "date": "2024-03-01"},
+            {"url": "http://example.edu/d.htm", "title": "D", "date": "三月一日"},
+        ]
+        self.crawl()
+        self.detail_fetches.clear()
+        self.crawl()
+        self.assertEqual(self.detail_fetches, ["http://example.edu/d.htm"])
+
+    def test_validators_are_saved_only_after_store(self):
+        self.entries = [{"url": "http://example.edu/a.htm", "title": "A", "date": "2024-03-01"}]
+        self.crawl()
+        self.assertEqual(database.get_validators("http://example.edu/a.htm")["etag"], '"http://example.edu/a.htm"')
+        self.assertEqual(services._PENDING_VALIDATORS, {})
+
+    def test_failed_detail_parse_does_not_leak_pending_validators(self):
+        self.entries = [{"url": "http://example.edu/a.htm", "title": "A", "date": "2024-03-01"}]
+        self.detail_error = RuntimeError("parse failed")
+        self.assertEqual(self.crawl(), [])
+        self.assertEqual(services._PENDING_VALIDATORS, {})
+        self.assertIsNone(database.get_validators("http://example.edu/a.htm"))
+
+    def test_empty_ocr_result_does_not_leak_pending_validators(self):
+        url = "http://example.edu/img.png"
+
+        async def fake_download(image_url, headers, kind):
+            services._remember_validators(image_url, mock.Mock(headers={"etag": '"img"'}))
+            return mock.Mock(), None
+
+        async def fake_parse(*args):
+            return ""
+
+        with mock.patch.multiple(
+            services, TESSERACT_CMD="tesseract", download_or_reuse=fake_download, parse_cached=fake_parse
+        ):
+            self.assertEqual(asyncio.run(services.perform_ocr_from_url(url, {})), "")
+        self.assertEqual(services._PENDING_VALIDATORS, {})
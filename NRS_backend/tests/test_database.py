@@ -0,0 +1,159 @@
+"""crawler/storage/database.py：单写线程的批量提交与失败隔离、批量去重查询、HTTP校验信息与增量水位线。"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from NRS_backend.crawler.storage import database
+
+from .support import TempDatabaseTestCase
+
+
+class WriterTests(TempDatabaseTestCase):
+    def count(self):
+        with database.get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM crawled_records").fetchone()[0]
+
+    def test_concurrent_inserts_are_all_committed(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda index: self.insert(f"r{index:03d}"), range(200)))
+        self.assertEqual(self.count(), 200)
+
+    def test_failed_job_only_rolls_back_itself(self):
+        release = threading.Event()
+        started = threading.Event()
+        results = {}
+
+        def blocking_job(conn):  # 占住写线程，使后续请求进入同一批次
+            started.set()
+            release.wait(5)
+            conn.execute("INSERT INTO crawled_records (id, title, url) VALUES ('first', 't', 'u')")
+
+        def failing_job(conn):
+            conn.execute("INSERT INTO crawled_records (id, title, url) VALUES ('bad', 't', 'u')")
+            raise sqlite3.IntegrityError("boom")
+
+        def ok_job(conn):
+            conn.execute("INSERT INTO crawled_records (id, title, url) VALUES ('last', 't', 'u')")
+            return "done"
+
+        def submit(name, job):
+            try:
+                results[name] = database._write(job)
+            except Exception as exc:  # noqa: BLE001
+                results[name] = exc
+
+        threads = [threading.Thread(target=submit, args=("first", blocking_job))]
+        threads[0].start()
+        started.wait(5)
+        for name, job in (("bad", failing_job), ("last", ok_job)):
+            thread = threading.Thread(target=submit, args=(name, job))
+            thread.start()
+            threads.append(thread)
+        while database._writer._queue.qsize() < 2:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertIsInstance(results["bad"], sqlite3.IntegrityError)
+        self.assertEqual(results["last"], "done")
+        self.assertTrue(database.record_exists("first"))
+        self.assertTrue(database.record_exists("last"))
+        self.assertFalse(database.record_exists("bad"))
+
+    def test_close_flushes_writes_and_connections_reopen(self):
+        self.insert("before")
+        database.close()
+        self.assertTrue(database.record_exists("before"))
+        self.insert("after")
+        self.assertEqual(self.count(), 2)
+
+
+class BatchLookupTests(TempDatabaseTestCase):
+    def test_records_exist_returns_stored_ids(self):
+        self.insert("a")
+        self.insert("b")
+        self.assertEqual(database.records_exist(["a", "missing", "b", "a"]), {"a", "b"})
+        self.assertEqual(database.records_exist([]), set())
+
+    def test_records_exist_splits_large_queries(self):
+        database.insert_records(
+            (f"r{index}", "t", "u", None, "src", "Source", False, None, None) for index in range(12)
+        )
+        with mock.patch.object(database, "_IN_CHUNK_SIZE", 5):
+            found = database.records_exist([f"r{index}" for index in range(15)])
+        self.assertEqual(found, {f"r{index}" for index in range(12)})
+
+    def test_records_seen_matches_date_only_when_given(self):
+        self.insert("a", url="http://x/a", title="A", publish_time="2024-03-01T00:00:00")
+        entries = [
+            ("http://x/a", "A", "2024-03-01T00:00:00"),
+            ("http://x/a", "A", None),
+            ("http://x/a", "A", "2024-03-02T00:00:00"),  # 日期变化视为新条目
+            ("http://x/a", "A2", None),  # 标题变化视为新条目
+            ("http://x/b", "B", None),
+        ]
+        self.assertEqual(database.records_seen(entries), set(entries[:2]))
+
+    def test_insert_records_ignores_existing_ids(self):
+        self.insert("a", title="原标题")
+        database.insert_records(
+            [
+                ("a", "新标题", "u", None, "src", "Source", False, None, None),
+                ("b", "t", "u", None, "src", "Source", True, None, None),
+            ]
+        )
+        with database.get_connection() as conn:
+            rows = dict(conn.execute("SELECT id, title FROM crawled_records").fetchall())
+        self.assertEqual(rows, {"a": "原标题", "b": "t"})
+        self.assertEqual([row["id"] for row in database.fetch_unsynced(10)], ["a"])
+
+
+class ValidatorTests(TempDatabaseTestCase):
+    def test_round_trip_and_overwrite(self):
+        url = "http://x/file.pdf"
+        self.assertIsNone(database.get_validators(url))
+        database.save_validators(url, '"v1"', "Mon, 04 Mar 2024 00:00:00 GMT", "附件文本")
+        self.assertEqual(
+            database.get_validators(url),
+            {"etag": '"v1"', "last_modified": "Mon, 04 Mar 2024 00:00:00 GMT", "content": "附件文本"},
+        )
+        database.save_validators(url, '"v2"', None)
+        self.assertEqual(database.get_validators(url), {"etag": '"v2"', "last_modified": None, "content": None})
+
+
+class WatermarkTests(TempDatabaseTestCase):
+    def test_watermark_and_schedule_do_not_overwrite_each_other(self):
+        database.save_watermark("src", "2024-03-01")
+        self.assertIsNone(database.get_schedule("src"))  # 只有水位线时视为尚未调度
+        database.save_schedule("src", 10.0, 3610.0, 3600.0, 1.5)
+        self.assertEqual(database.get_watermark("src"), "2024-03-01")
+        database.save_watermark("src", "2024-03-05")
+        self.assertEqual(
+            database.get_schedule("src"),
+            {"last_run_at": 10.0, "next_run_at": 3610.0, "interval": 3600.0, "rate": 1.5},
+        )
+        self.assertEqual(database.get_watermark("src"), "2024-03-05")
+        self.assertIsNone(database.get_watermark("other"))
+
+    def test_old_schedule_table_gains_watermark_column(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE source_schedule (source_id TEXT PRIMARY KEY, last_run_at REAL, "
+            "next_run_at REAL, interval REAL, rate REAL)"
+        )
+        conn.execute("INSERT INTO source_schedule VALUES ('src', 1.0, 2.0, 3.0, 4.0)")
+        conn.commit()
+        conn.close()
+        self.assertIsNone(database.get_watermark("src"))
+        database.save_watermark("src", "2024-03-01")
+        self.assertEqual(database.get_watermark("src"), "2024-03-01")
+        self.assertEqual(database.get_schedule("src")["interval"], 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
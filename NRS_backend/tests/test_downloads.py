@@ -0,0 +1,243 @@
+"""crawler/downloads.py：流式下载的大小上限、落盘与中止；services.download_binary 的站点限流记账。"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from NRS_backend.crawler import downloads, ratelimit, services
+
+try:
+    from curl_cffi import requests as curl_requests
+except ImportError:  # 未安装curl_cffi时跳过真实传输测试
+    curl_requests = None
+
+
+class FakeResponse:
+    """按给定分块返回响应体的流式响应。"""
+
+    def __init__(self, chunks, headers=None, delay: float = 0.0):
+        self.chunks = list(chunks)
+        self.headers = headers or {}
+        self.delay = delay
+
+    async def aiter_content(self):
+        for chunk in self.chunks:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield chunk
+
+
+class SpoolResponseTests(unittest.TestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.spool_dir.cleanup)
+        patcher = mock.patch.multiple(
+            downloads,
+            DOWNLOAD_SPOOL_DIR=self.spool_dir.name,
+            DOWNLOAD_SPOOL_THRESHOLD=1000,
+            MAX_DOWNLOAD_BYTES=10_000,
+            SPOOL_WRITE_SIZE=512,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def spooled_files(self):
+        return os.listdir(self.spool_dir.name)
+
+    def test_small_body_stays_in_memory(self):
+        chunks = [b"a" * 300, b"b" * 300]
+        download = asyncio.run(downloads.spool_response(FakeResponse(chunks), "http://x/a.pdf"))
+        self.assertEqual(download.source, b"".join(chunks))
+        self.assertIsNone(download.path)
+        self.assertEqual(download.size, 600)
+        self.assertEqual(download.sha256, hashlib.sha256(b"".join(chunks)).hexdigest())
+        self.assertEqual(self.spooled_files(), [])
+
+    def test_large_body_is_spooled_to_disk(self):
+        chunks = [bytes([i]) * 700 for i in range(6)]
+        download = asyncio.run(downloads.spool_response(FakeResponse(chunks), "http://x/a.pdf"))
+        try:
+            self.assertIsNone(download.data)
+            with open(download.source, "rb") as handle:
+                self.assertEqual(handle.read(), b"".join(chunks))
+            self.assertEqual(download.sha256, hashlib.sha256(b"".join(chunks)).hexdigest())
+        finally:
+            download.close()
+        self.assertEqual(self.spooled_files(), [])
+
+    def test_oversized_body_is_rejected_and_spool_removed(self):
+        chunks = [b"x" * 900] * 20
+        with self.assertRaises(downloads.DownloadRejected):
+            asyncio.run(downloads.spool_response(FakeResponse(chunks), "http://x/a.pdf"))
+        self.assertEqual(self.spooled_files(), [])
+
+    def test_cancelled_download_removes_spool(self):
+        async def scenario():
+            task = asyncio.create_task(
+                downloads.spool_response(FakeResponse([b"x" * 900] * 8, delay=0.01), "http://x/a.pdf")
+            )
+            await asyncio.sleep(0.04)  # 已超过落盘阈值
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        self.assertEqual(self.spooled_files(), [])
+
+
+class CheckResponseHeadersTests(unittest.TestCase):
+    def test_rejects_declared_length_over_limit(self):
+        response = FakeResponse([], {"Content-Length": str(downloads.MAX_DOWNLOAD_BYTES + 1)})
+        with self.assertRaises(downloads.DownloadRejected):
+            downloads.check_response_headers(response, "http://x/a.pdf", "pdf")
+
+    def test_rejects_html_error_page_for_pdf(self):
+        response = FakeResponse([], {"Content-Type": "text/html; charset=utf-8"})
+        with self.assertRaises(downloads.DownloadRejected):
+            downloads.check_response_headers(response, "http://x/a.pdf", "pdf")
+
+    def test_accepts_expected_and_generic_types(self):
+        for content_type in ("application/pdf", "application/octet-stream", ""):
+            response = FakeResponse([], {"Content-Type": content_type, "Content-Length": "10"})
+            downloads.check_response_headers(response, "http://x/a.pdf", "pdf")
+
+
+class _EndlessHandler(BaseHTTPRequestHandler):
+    """持续发送响应体，记录实际发出的字节数和连接是否被客户端断开。"""
+
+    total = 64 * 1024 * 1024
+    sent = 0
+    finished = threading.Event()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(self.total))
+        self.end_headers()
+        chunk = b"x" * 65536
+        try:
+            while type(self).sent < self.total:
+                self.wfile.write(chunk)
+                type(self).sent += len(chunk)
+        except (BrokenPipeError, ConnectionResetError, socket.error):
+            pass
+        finally:
+            type(self).finished.set()
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipIf(curl_requests is None, "curl_cffi is not installed")
+class AbortResponseTests(unittest.TestCase):
+    def test_oversized_transfer_is_aborted(self):
+        _EndlessHandler.sent = 0
+        _EndlessHandler.finished = threading.Event()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _EndlessHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_port}/big.pdf"
+
+        async def scenario():
+            session = curl_requests.AsyncSession()  # 与服务中的全局会话一致，不显式关闭
+            response = await session.get(url, stream=True, timeout=30)
+            with mock.patch.object(downloads, "MAX_DOWNLOAD_BYTES", 256 * 1024):
+                try:
+                    with self.assertRaises(downloads.DownloadRejected):
+                        await downloads.spool_response(response, url)
+                finally:
+                    started = time.monotonic()
+                    await downloads.abort_response(response)
+                    elapsed = time.monotonic() - started
+            self.assertTrue(response.stream_task.done())
+            return elapsed
+
+        elapsed = asyncio.run(scenario())
+        self.assertLess(elapsed, 5)
+        self.assertTrue(_EndlessHandler.finished.wait(5), "server kept sending after abort")
+        self.assertLess(_EndlessHandler.sent, _EndlessHandler.total // 4)
+
+
+class FakeStreamResponse(FakeResponse):
+    """带状态码的流式响应；fail_after 个分块之后模拟连接中断。"""
+
+    def __init__(self, chunks, delay: float = 0.0, fail_after=None):
+        super().__init__(chunks, {"Content-Type": "application/pdf"}, delay)
+        self.status_code = 200
+        self.fail_after = fail_after
+
+    def raise_for_status(self):
+        pass
+
+    async def aiter_content(self):
+        index = 0
+        async for chunk in super().aiter_content():
+            if self.fail_after is not None and index >= self.fail_after:
+                raise ConnectionResetError("connection reset mid-body")
+            index += 1
+            yield chunk
+
+    async def aclose(self):
+        pass
+
+
+class DownloadBinaryRateLimitTests(unittest.TestCase):
+    URL = "http://files.example.edu/big.pdf"
+
+    def setUp(self):
+        patcher = mock.patch.dict(ratelimit._LIMITERS, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = ratelimit._limiter_for(self.URL)
+        self.latencies = []
+        on_success = self.limiter._on_success
+        self.limiter._on_success = lambda latency: (self.latencies.append(latency), on_success(latency))
+        self.in_flight_during_body = []
+
+    def download(self, response):
+        limiter = self.limiter
+
+        async def fake_get(url, **kwargs):
+            original = response.aiter_content
+
+            async def watched():
+                async for chunk in original():
+                    self.in_flight_during_body.append(limiter.in_flight)
+                    yield chunk
+
+            response.aiter_content = watched
+            return response
+
+        async def scenario():
+            with mock.patch.object(services, "ASYNC_HTTP", mock.Mock(get=fake_get)), mock.patch(
+                "builtins.print"
+            ):
+                return await services.download_binary(self.URL, {}, retries=1, kind="pdf")
+
+        return asyncio.run(scenario())
+
+    def test_body_transfer_is_not_counted_as_request_latency(self):
+        download = self.download(FakeStreamResponse([b"x" * 100] * 5, delay=0.05))
+        self.assertEqual(download.size, 500)
+        self.assertEqual(len(self.latencies), 1)
+        self.assertLess(self.latencies[0], 0.05)  # 只计到响应头到达
+        self.assertEqual(set(self.in_flight_during_body), {0})  # 传输响应体时不占用站点并发名额
+
+    def test_failure_mid_body_backs_off_host(self):
+        rate_before = self.limiter.rate
+        self.assertIsNone(self.download(FakeStreamResponse([b"x" * 100] * 5, fail_after=2)))
+        self.assertLess(self.limiter.rate, rate_before)
+        self.assertEqual(self.limiter.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
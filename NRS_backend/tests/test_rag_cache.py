@@ -0,0 +1,111 @@
+"""rag/cache.py 的语义答案缓存，以及 rag/service.py 中缓存的启用条件。"""
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from NRS_backend.rag import cache as cache_module
+from NRS_backend.rag.cache import AnswerCache
+from NRS_backend.rag.models import AnswerResponse
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _response(answer: str) -> AnswerResponse:
+    return AnswerResponse(answer=answer)
+
+
+class AnswerCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = AnswerCache(max_size=2, threshold=0.95, ttl_seconds=60)
+
+    def test_similar_question_with_same_sources_hits(self):
+        self.cache.store(_unit(1, 0), ["a", "b"], 1, _response("答案"))
+        self.assertEqual(self.cache.lookup(_unit(1, 0.1), ["a", "b"], 1).answer, "答案")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 0))
+
+    def test_dissimilar_question_misses(self):
+        self.cache.store(_unit(1, 0), ["a"], 1, _response("答案"))
+        self.assertIsNone(self.cache.lookup(_unit(1, 1), ["a"], 1))  # 相似度约0.71
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_changed_sources_miss(self):
+        self.cache.store(_unit(1, 0), ["a", "b"], 1, _response("答案"))
+        self.assertIsNone(self.cache.lookup(_unit(1, 0), ["a", "c"], 1))
+
+    def test_new_data_version_invalidates_entries(self):
+        self.cache.store(_unit(1, 0), ["a"], 1, _response("旧答案"))
+        self.assertIsNone(self.cache.lookup(_unit(1, 0), ["a"], 2))
+        self.cache.store(_unit(1, 0), ["a"], 1, _response("基于旧数据"))  # 生成期间数据已更新，不缓存
+        self.assertIsNone(self.cache.lookup(_unit(1, 0), ["a"], 2))
+
+    def test_expired_entries_miss(self):
+        with mock.patch.object(cache_module.time, "monotonic", return_value=100.0):
+            self.cache.store(_unit(1, 0), ["a"], 1, _response("答案"))
+        with mock.patch.object(cache_module.time, "monotonic", return_value=161.0):
+            self.assertIsNone(self.cache.lookup(_unit(1, 0), ["a"], 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.store(_unit(1, 0), ["a"], 1, _response("A"))
+        self.cache.store(_unit(0, 1), ["b"], 1, _response("B"))
+        self.cache.lookup(_unit(1, 0), ["a"], 1)  # A 变为最近使用
+        self.cache.store(_unit(1, 1), ["c"], 1, _response("C"))
+        self.assertIsNone(self.cache.lookup(_unit(0, 1), ["b"], 1))
+        self.assertEqual(self.cache.lookup(_unit(1, 0), ["a"], 1).answer, "A")
+
+    def test_returned_response_is_a_copy(self):
+        self.cache.store(_unit(1, 0), ["a"], 1, _response("答案"))
+        self.cache.lookup(_unit(1, 0), ["a"], 1).answer = "被修改"
+        self.assertEqual(self.cache.lookup(_unit(1, 0), ["a"], 1).answer, "答案")
+
+    def test_zero_size_disables_cache(self):
+        cache = AnswerCache(max_size=0, threshold=0.95, ttl_seconds=60)
+        cache.store(_unit(1, 0), ["a"], 1, _response("答案"))
+        self.assertFalse(cache.enabled)
+        self.assertIsNone(cache.lookup(_unit(1, 0), ["a"], 1))
+
+
+class RagServiceAnswerCacheTests(unittest.TestCase):
+    def setUp(self):
+        from NRS_backend.rag import service  # 依赖httpx与向量库桥接模块
+        from NRS_backend.rag.config import RagSettings
+        from NRS_backend.vector_store.models import VectorMatch
+
+        self.service_module = service
+        self.settings_class = RagSettings
+        self.matches = [VectorMatch(document_id="doc", score=0.9, text="正文", metadata={})]
+        self.embed = mock.AsyncMock(return_value=_unit(1, 0))
+        self.data_version = mock.Mock(return_value=1)
+        patcher = mock.patch.multiple(service, bridge_embed=self.embed, bridge_data_version=self.data_version)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ask_twice(self, **settings):
+        rag = self.service_module.RAGService(self.settings_class(ANSWER_CACHE_SIZE=8, **settings))
+        rag.search_vector_db = mock.AsyncMock(return_value=self.matches)
+        rag.call_llm = mock.AsyncMock(return_value="答案")
+
+        async def scenario():
+            await rag.generate_answer("问题")
+            await rag.generate_answer("问题")
+
+        asyncio.run(scenario())
+        return rag.call_llm.await_count
+
+    def test_repeated_question_is_answered_from_cache(self):
+        self.assertEqual(self.ask_twice(VECTOR_SERVICE_URL=None), 1)
+
+    def test_external_vector_service_skips_cache_and_local_model(self):
+        self.assertEqual(self.ask_twice(VECTOR_SERVICE_URL="http://vectors.example"), 2)
+        self.embed.assert_not_awaited()
+        self.data_version.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
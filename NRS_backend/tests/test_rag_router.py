@@ -0,0 +1,72 @@
+"""rag/router.py 的流式问答接口：NDJSON 事件顺序与出错时的 error 事件。"""
+from __future__ import annotations
+
+import json
+import unittest
+from unittest import mock
+
+
+class RagStreamEndpointTests(unittest.TestCase):
+    def setUp(self):
+        from fastapi import FastAPI  # 依赖FastAPI与RAG服务
+        from fastapi.testclient import TestClient
+
+        from NRS_backend.rag import router as router_module
+        from NRS_backend.vector_store.models import VectorMatch
+
+        self.service = router_module.rag_service
+        matches = [VectorMatch(document_id="doc", score=0.9, text="正文", metadata={"url": "http://x/doc", "title": "通知"})]
+        self.tokens = ["你好", "，", "世界"]
+        self.fail_after = None
+        patcher = mock.patch.multiple(
+            self.service,
+            search_vector_db=mock.AsyncMock(return_value=matches),
+            stream_llm=self.fake_stream_llm,
+            _answer_cache_key=mock.AsyncMock(return_value=None),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        app = FastAPI()
+        app.include_router(router_module.router)
+        self.client = TestClient(app)
+
+    async def fake_stream_llm(self, prompt):
+        for index, token in enumerate(self.tokens):
+            if self.fail_after is not None and index >= self.fail_after:
+                raise RuntimeError("LLM connection dropped")
+            yield token
+
+    def stream(self, question="什么是RAG？"):
+        response = self.client.post("/api/rag/stream", json={"question": question})
+        return response, [json.loads(line) for line in response.text.splitlines() if line]
+
+    def test_events_arrive_as_sources_tokens_done(self):
+        response, events = self.stream()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        self.assertEqual([event["type"] for event in events], ["sources", "token", "token", "token", "done"])
+        self.assertEqual(events[0]["code"], "200")
+        self.assertEqual(events[0]["sources"][0]["url"], "http://x/doc")
+        self.assertEqual("".join(event["content"] for event in events[1:4]), "你好，世界")
+        self.assertEqual(events[-1], {"type": "done", "cached": False})
+
+    def test_failure_mid_stream_ends_with_error_event(self):
+        self.fail_after = 1
+        with self.assertLogs("NRS_backend.rag.router", "ERROR"):
+            _, events = self.stream()
+        self.assertEqual([event["type"] for event in events], ["sources", "token", "error"])
+        self.assertEqual(events[-1]["detail"], "LLM connection dropped")
+
+    def test_blank_question_is_rejected_before_streaming(self):
+        response, _ = self.stream("   ")
+        self.assertEqual(response.status_code, 400)
+
+    def test_no_matches_streams_fallback_answer(self):
+        self.service.search_vector_db.return_value = []
+        _, events = self.stream()
+        self.assertEqual([event["type"] for event in events], ["sources", "token", "done"])
+        self.assertEqual(events[0]["code"], "404")
+
+
+if __name__ == "__main__":
+    unittest.main()
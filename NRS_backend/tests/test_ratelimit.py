@@ -0,0 +1,133 @@
+"""crawler/ratelimit.py：Retry-After 解析、令牌桶与 AIMD 并发调整。"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import time
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+from NRS_backend.crawler import ratelimit
+from NRS_backend.crawler.ratelimit import HostLimiter, parse_retry_after
+
+
+class ParseRetryAfterTests(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after(" 30 "), 30.0)
+
+    def test_http_date(self):
+        seconds = parse_retry_after(formatdate(time.time() + 120, usegmt=True))
+        self.assertTrue(110 <= seconds <= 120)
+
+    def test_values_are_clamped(self):
+        self.assertEqual(parse_retry_after("-5"), 0.0)
+        self.assertEqual(parse_retry_after("86400"), ratelimit.MAX_RETRY_AFTER)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+class HostLimiterTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            ratelimit,
+            HOST_RATE_LIMIT=1000.0,
+            HOST_BURST=100,
+            HOST_MIN_CONCURRENCY=1,
+            HOST_MAX_CONCURRENCY=8,
+            HOST_INITIAL_CONCURRENCY=4,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        stdout = contextlib.redirect_stdout(io.StringIO())  # 屏蔽限流时的 [WARN] 输出
+        stdout.__enter__()
+        self.addCleanup(stdout.__exit__, None, None, None)
+
+    def run_requests(self, limiter, count, status=200, latency=0.01, retry_after=None):
+        async def one():
+            await limiter.acquire()
+            await limiter.release(latency, status, retry_after)
+
+        async def scenario():
+            for _ in range(count):
+                await one()
+
+        asyncio.run(scenario())
+
+    def test_throttling_halves_concurrency_and_rate(self):
+        limiter = HostLimiter("example.edu")
+        self.run_requests(limiter, 1, status=503)
+        self.assertEqual(limiter.limit, 2.0)
+        self.assertEqual(limiter.rate, 500.0)
+        self.run_requests(limiter, 3, status=None)  # 超时/网络错误同样退避，但不低于下限
+        self.assertEqual(limiter.limit, 1.0)
+        self.assertEqual(limiter.rate, 1000.0 / 16)
+
+    def test_success_recovers_gradually(self):
+        limiter = HostLimiter("example.edu")
+        self.run_requests(limiter, 1, status=429)
+        self.run_requests(limiter, 1)
+        self.assertEqual(limiter.limit, 2.5)
+        self.assertEqual(limiter.rate, 550.0)
+        self.run_requests(limiter, 200)
+        self.assertEqual(limiter.limit, 8.0)
+        self.assertEqual(limiter.rate, 1000.0)
+
+    def test_slow_responses_do_not_raise_concurrency(self):
+        limiter = HostLimiter("example.edu")
+        self.run_requests(limiter, 1, latency=0.01)
+        self.run_requests(limiter, 5, latency=1.0)
+        self.assertEqual(limiter.limit, 4.25)  # 仅首个请求加并发
+
+    def test_retry_after_blocks_new_requests(self):
+        limiter = HostLimiter("example.edu")
+        self.run_requests(limiter, 1, status=429, retry_after=0.2)
+        started = time.monotonic()
+        self.run_requests(limiter, 1)
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+    def test_token_bucket_limits_request_rate(self):
+        with mock.patch.multiple(ratelimit, HOST_RATE_LIMIT=20.0, HOST_BURST=2):
+            limiter = HostLimiter("example.edu")
+        started = time.monotonic()
+        self.run_requests(limiter, 4)  # 2 次突发 + 2 次各等 1/20 秒
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_concurrency_limit_is_enforced(self):
+        limiter = HostLimiter("example.edu")
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            await limiter.acquire()
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+            await limiter.release(1.0, 200, None)  # 延迟较高，不增加并发
+
+        async def scenario():
+            await asyncio.gather(*(request() for _ in range(12)))
+
+        asyncio.run(scenario())
+        self.assertEqual(peak, 4)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_cancelled_acquire_releases_slot(self):
+        limiter = HostLimiter("example.edu")
+
+        async def scenario():
+            limiter.blocked_until = time.monotonic() + 60
+            task = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        self.assertEqual(limiter.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""vector_store/lifecycle.py 的后台预热重试，以及 /ready 对预热状态的报告。"""
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest import mock
+
+from NRS_backend.vector_store import lifecycle
+from NRS_backend.vector_store.services import vector_service
+
+
+class WarmUpTests(unittest.TestCase):
+    def setUp(self):
+        settings = vector_service.settings.model_copy(
+            update={"warmup_on_startup": True, "warmup_retry_initial": 0.01, "warmup_retry_max": 0.02}
+        )
+        self.failures = [OSError("chroma.sqlite3 is locked"), RuntimeError("model download failed")]
+        self.loaded = False
+        patcher = mock.patch.multiple(
+            vector_service,
+            settings=settings,
+            warm_up=self.fake_warm_up,
+            warmup_attempts=0,
+            warmup_error=None,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        ready = mock.patch.object(type(vector_service), "ready", property(lambda service: self.loaded))
+        ready.start()
+        self.addCleanup(ready.stop)
+
+    async def fake_warm_up(self):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.loaded = True
+
+    def get_ready(self):
+        from fastapi.testclient import TestClient
+
+        from NRS_backend.main import app  # 不进入lifespan，只调用路由
+
+        return TestClient(app).get("/ready")
+
+    def test_failed_warm_up_is_retried_until_ready(self):
+        with self.assertLogs(lifecycle.logger, "WARNING") as logs:
+            asyncio.run(lifecycle._warm_up())
+        self.assertTrue(self.loaded)
+        self.assertEqual(vector_service.warmup_attempts, 3)
+        self.assertIsNone(vector_service.warmup_error)
+        self.assertEqual(len(logs.output), 2)
+        response = self.get_ready()
+        self.assertEqual((response.status_code, response.json()), (200, {"status": "ready"}))
+
+    def test_ready_reports_failed_warm_up(self):
+        self.assertEqual(self.get_ready().json(), {"status": "warming_up"})
+
+        async def scenario():
+            task = asyncio.create_task(lifecycle._warm_up())
+            await asyncio.sleep(0)  # 第一次预热失败后进入退避等待
+            try:
+                return self.get_ready()
+            finally:
+                task.cancel()
+
+        with self.assertLogs(lifecycle.logger, "WARNING"):
+            response = asyncio.run(scenario())
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            response.json(),
+            {"status": "warmup_failed", "error": "OSError: chroma.sqlite3 is locked", "attempts": 1},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""crawler/scheduler.py 的自适应间隔计算，以及 lifecycle.py 中按源调度循环的容错。"""
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from NRS_backend.crawler import scheduler
+
+
+class NextScheduleTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            scheduler,
+            CRAWL_INTERVAL=3600,
+            CRAWL_MIN_INTERVAL=600,
+            CRAWL_MAX_INTERVAL=86400,
+            CRAWL_TARGET_ITEMS_PER_RUN=1.0,
+            CRAWL_JITTER=0.0,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_first_run_uses_initial_interval_and_ignores_backfill(self):
+        state = scheduler.next_schedule(None, 500, now=1000.0)
+        self.assertEqual(state["interval"], 3600)
+        self.assertEqual(state["rate"], 0.0)
+        self.assertEqual(state["last_run_at"], 1000.0)
+        self.assertEqual(state["next_run_at"], 1000.0 + 3600)
+
+    def test_busy_source_is_polled_more_often(self):
+        previous = {"last_run_at": 0.0, "next_run_at": 3600.0, "interval": 3600.0, "rate": 0.0}
+        state = scheduler.next_schedule(previous, 10, now=3600.0)  # 1小时10条
+        self.assertAlmostEqual(state["rate"], 3.0)  # 0.3 * 10 + 0.7 * 0
+        self.assertEqual(state["interval"], 1200.0)  # 1 / 3 小时
+
+    def test_idle_source_backs_off_and_is_clamped(self):
+        previous = {"last_run_at": 0.0, "next_run_at": 0.0, "interval": 60000.0, "rate": 0.0}
+        state = scheduler.next_schedule(previous, 0, now=60000.0)
+        self.assertEqual(state["interval"], 86400)
+
+    def test_interval_never_drops_below_minimum(self):
+        previous = {"last_run_at": 0.0, "next_run_at": 0.0, "interval": 600.0, "rate": 100.0}
+        state = scheduler.next_schedule(previous, 1000, now=600.0)
+        self.assertEqual(state["interval"], 600)
+
+    def test_failed_run_keeps_previous_state(self):
+        previous = {"last_run_at": 10.0, "next_run_at": 0.0, "interval": 1800.0, "rate": 2.0}
+        state = scheduler.next_schedule(previous, None, now=5000.0)
+        self.assertEqual((state["last_run_at"], state["interval"], state["rate"]), (10.0, 1800.0, 2.0))
+
+    def test_zero_last_run_is_a_real_timestamp(self):
+        previous = {"last_run_at": 0.0, "next_run_at": 0.0, "interval": 3600.0, "rate": 0.0}
+        state = scheduler.next_schedule(previous, 0, now=3600.0)
+        self.assertEqual(state["interval"], 7200.0)
+
+    def test_jitter_stays_within_bounds(self):
+        with mock.patch.object(scheduler, "CRAWL_JITTER", 0.1):
+            for _ in range(100):
+                state = scheduler.next_schedule(None, 0, now=0.0)
+                self.assertTrue(3240 <= state["next_run_at"] <= 3960)
+
+
+class SourceCrawlLoopTests(unittest.TestCase):
+    def setUp(self):
+        from NRS_backend.crawler import lifecycle  # 依赖FastAPI与爬虫服务
+
+        self.lifecycle = lifecycle
+
+    def test_database_error_does_not_kill_the_loop(self):
+        lifecycle = self.lifecycle
+        crawled = []
+        get_schedule = mock.Mock(side_effect=[RuntimeError("database is locked"), None, None, None])
+
+        async def fake_crawl(source_id, semaphore):
+            crawled.append(source_id)
+            if len(crawled) == 2:
+                raise asyncio.CancelledError  # 第二次抓取后结束循环
+            return 0
+
+        async def scenario():
+            with mock.patch.multiple(
+                lifecycle,
+                _crawl_one_source=fake_crawl,
+                CRAWL_MIN_INTERVAL=0.01,
+            ), mock.patch.object(lifecycle.database, "get_schedule", get_schedule), mock.patch.object(
+                lifecycle.database, "save_schedule", mock.Mock()
+            ):
+                with self.assertRaises(asyncio.CancelledError):
+                    await lifecycle._source_crawl_loop("src", asyncio.Semaphore(1))
+
+        with self.assertLogs(lifecycle.logger, "ERROR") as logs:
+            asyncio.run(scenario())
+        self.assertEqual(crawled, ["src", "src"])
+        self.assertIn("database is locked", "\n".join(logs.output))
+
+    def test_hanging_source_times_out_without_blocking_others(self):
+        lifecycle = self.lifecycle
+        cancelled = []
+        saved = {}
+
+        async def fake_crawl_source(source_id, incremental=False):
+            if source_id == "slow":
+                try:
+                    await asyncio.sleep(3600)
+                except asyncio.CancelledError:
+                    cancelled.append(source_id)
+                    raise
+            return [{"id": f"{source_id}-1"}, {"id": f"{source_id}-2"}]
+
+        def save_schedule(source_id, last_run_at, next_run_at, interval, rate):
+            saved[source_id] = (last_run_at, interval, rate)
+
+        async def scenario():
+            semaphore = asyncio.Semaphore(1)  # 单个名额：超时的源必须及时释放
+            started = time.monotonic()
+            counts = await asyncio.gather(
+                *(lifecycle._crawl_one_source(source_id, semaphore) for source_id in ("slow", "a", "b"))
+            )
+            elapsed = time.monotonic() - started
+            await lifecycle._run_scheduled_crawl("slow", semaphore)
+            return counts, elapsed
+
+        previous = {"last_run_at": 10.0, "next_run_at": 0.0, "interval": 1800.0, "rate": 2.0}
+        with mock.patch.multiple(
+            lifecycle, crawl_source=fake_crawl_source, SOURCE_CRAWL_TIMEOUT=0.1
+        ), mock.patch.multiple(
+            lifecycle.database, get_schedule=mock.Mock(return_value=previous), save_schedule=save_schedule
+        ), self.assertLogs(lifecycle.logger, "WARNING") as logs:
+            counts, elapsed = asyncio.run(scenario())
+
+        self.assertEqual(counts, [None, 2, 2])
+        self.assertLess(elapsed, 2)
+        self.assertEqual(cancelled, ["slow", "slow"])
+        self.assertEqual(saved["slow"], (10.0, 1800.0, 2.0))  # 超时按失败处理，保留原有速率与间隔
+        self.assertIn("timed out for source slow", "\n".join(logs.output))
+
+    def test_cancelling_periodic_loop_cancels_every_source(self):
+        lifecycle = self.lifecycle
+        started = []
+        cancelled = []
+
+        async def fake_loop(source_id, semaphore):
+            started.append(source_id)
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(source_id)
+                raise
+
+        async def failing_loop(source_id, semaphore):
+            if source_id == "a":
+                raise RuntimeError("boom")
+            await fake_loop(source_id, semaphore)
+
+        async def scenario():
+            sources = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+            with mock.patch.multiple(lifecycle, _source_crawl_loop=failing_loop, TARGET_SOURCES=sources):
+                task = asyncio.create_task(lifecycle._periodic_crawl_loop())
+                await asyncio.sleep(0.05)
+                self.assertFalse(task.done())  # 单个源失败不会结束整体任务
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+
+        asyncio.run(scenario())
+        self.assertEqual(sorted(cancelled), ["b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
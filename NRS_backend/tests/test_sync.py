@@ -0,0 +1,109 @@
+"""crawler/sync.py：向量库批量同步在部分记录失败时的行为。"""
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest import mock
+
+from NRS_backend.crawler import sync
+from NRS_backend.crawler.storage import database
+
+from .support import TempDatabaseTestCase
+
+
+class FakeVectorStore:
+    """记录写入的假向量库；poison 中的ID总是写入失败，down 为True时全部失败。"""
+
+    def __init__(self, poison=()):
+        self.poison = set(poison)
+        self.down = False
+        self.stored = []
+        self.calls = 0
+
+    async def store_documents(self, documents):
+        self.calls += 1
+        if self.down or any(doc_id in self.poison for doc_id, _, _ in documents):
+            raise RuntimeError("embedding failed")
+        self.stored.extend(doc_id for doc_id, _, _ in documents)
+        return True
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.synced = []
+
+    def mark_synced(self, record_ids):
+        self.synced.extend(record_ids)
+
+
+def _document(doc_id: str):
+    return doc_id, f"text {doc_id}", {"url": f"http://x/{doc_id}"}
+
+
+class VectorSyncQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.store = FakeVectorStore(poison={"bad"})
+        self.database = FakeDatabase()
+        patcher = mock.patch.multiple(sync, store_documents=self.store.store_documents, database=self.database)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def flush(self, ids, batch_size=64):
+        queue = sync.VectorSyncQueue(batch_size=batch_size, flush_interval=60)
+        for doc_id in ids:
+            queue._pending.append(_document(doc_id))
+        return asyncio.run(queue.flush())
+
+    def test_successful_batch_uses_one_call(self):
+        self.assertEqual(self.flush(["a", "b", "c"]), 3)
+        self.assertEqual(self.store.calls, 1)
+        self.assertEqual(self.database.synced, ["a", "b", "c"])
+
+    def test_one_bad_document_only_leaves_itself_unsynced(self):
+        self.assertEqual(self.flush(["a", "bad", "c"]), 2)
+        self.assertEqual(self.database.synced, ["a", "c"])
+        self.assertEqual(self.store.stored, ["a", "c"])
+
+    def test_outage_leaves_everything_unsynced(self):
+        self.store.down = True
+        self.assertEqual(self.flush(["a", "b"]), 0)
+        self.assertEqual(self.database.synced, [])
+
+
+class ResyncUnsyncedTests(TempDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = FakeVectorStore(poison={"r00"})
+        patcher = mock.patch.object(sync, "store_documents", self.store.store_documents)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for index in range(10):
+            self.insert(f"r{index:02d}")
+
+    def resync(self, max_attempts=3):
+        return asyncio.run(sync.resync_unsynced(batch_size=4, min_age_seconds=0, max_attempts=max_attempts))
+
+    def unsynced_ids(self):
+        return [row["id"] for row in database.fetch_unsynced(100)]
+
+    def test_poison_document_does_not_block_later_rows(self):
+        self.assertEqual(self.resync(), 9)
+        self.assertEqual(self.unsynced_ids(), ["r00"])
+
+    def test_poison_document_is_given_up_after_max_attempts(self):
+        for attempt in range(3):
+            self.insert(f"new{attempt}")  # 每轮都有可写入的记录，证明向量库可用
+            self.resync()
+        self.assertEqual(database.fetch_unsynced(100, max_attempts=3), [])
+        self.assertEqual(self.unsynced_ids(), ["r00"])
+
+    def test_outage_raises_without_counting_attempts(self):
+        self.store.down = True
+        with self.assertRaises(RuntimeError):
+            self.resync(max_attempts=1)
+        self.store.down = False
+        self.assertEqual(self.resync(max_attempts=1), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
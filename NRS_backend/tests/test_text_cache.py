@@ -0,0 +1,139 @@
+"""crawler/storage/text_cache.py：解析结果缓存的命中、淘汰与访问时间落盘。"""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from NRS_backend.crawler import services
+from NRS_backend.crawler.downloads import SpooledDownload
+from NRS_backend.crawler.storage import text_cache
+from NRS_backend.crawler.storage.text_cache import ParsedTextCache
+
+SHA_A = "aa" + "0" * 62
+SHA_B = "bb" + "0" * 62
+SHA_C = "cc" + "0" * 62
+
+
+class ParsedTextCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = tmp_dir.name
+        self.clock = 1000.0
+        patcher = mock.patch.object(text_cache.time, "time", side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_cache(self, max_bytes=1000):
+        cache = ParsedTextCache(self.root, max_bytes)
+        self.addCleanup(cache._conn.close)
+        return cache
+
+    def stored_access(self, sha, kind="pdf"):
+        conn = sqlite3.connect(f"{self.root}/index.db")
+        try:
+            row = conn.execute("SELECT last_access FROM entries WHERE sha=? AND kind=?", (sha, kind)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def test_hit_and_miss(self):
+        cache = self.open_cache()
+        cache.put(SHA_A, "pdf", "正文")
+        self.assertEqual(cache.get(SHA_A, "pdf"), "正文")
+        self.assertIsNone(cache.get(SHA_A, "ocr"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_hits_do_not_write_index_until_flush(self):
+        cache = self.open_cache()
+        cache.put(SHA_A, "pdf", "正文")
+        self.clock = 2000.0
+        with mock.patch.object(cache, "_conn", wraps=cache._conn) as conn:
+            for _ in range(5):
+                cache.get(SHA_A, "pdf")
+            conn.commit.assert_not_called()
+        self.assertEqual(self.stored_access(SHA_A), 1000.0)
+        cache.flush()
+        self.assertEqual(self.stored_access(SHA_A), 2000.0)
+
+    def test_pending_access_is_flushed_after_interval(self):
+        cache = self.open_cache()
+        cache.put(SHA_A, "pdf", "正文")
+        self.clock = 2000.0
+        with mock.patch.object(text_cache, "ACCESS_FLUSH_SECONDS", 0.0):
+            cache.get(SHA_A, "pdf")
+        self.assertEqual(self.stored_access(SHA_A), 2000.0)
+
+    def test_eviction_uses_unflushed_access_times(self):
+        cache = self.open_cache(max_bytes=20)
+        cache.put(SHA_A, "pdf", "a" * 8)
+        self.clock = 1001.0
+        cache.put(SHA_B, "pdf", "b" * 8)
+        self.clock = 1002.0
+        cache.get(SHA_A, "pdf")  # A 比 B 更近被访问，但尚未写回索引
+        self.clock = 1003.0
+        cache.put(SHA_C, "pdf", "c" * 8)
+        self.assertIsNone(cache.get(SHA_B, "pdf"))
+        self.assertEqual(cache.get(SHA_A, "pdf"), "a" * 8)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["size_bytes"], 16)
+
+    def test_lookup_by_url(self):
+        cache = self.open_cache()
+        cache.put(SHA_A, "ocr", "图片文字")
+        cache.remember_url("http://x/img.png", SHA_A)
+        self.assertEqual(cache.get_by_url("http://x/img.png", "ocr"), "图片文字")
+        self.assertIsNone(cache.get_by_url("http://x/other.png", "ocr"))
+
+    def test_url_mapping_is_written_on_flush(self):
+        cache = self.open_cache()
+        cache.put(SHA_A, "ocr", "图片文字")
+        cache.remember_url("http://x/img.png", SHA_A)
+        cache.remember_url("http://x/img.png", SHA_B)  # 同一URL内容变化，保留最新哈希
+        cache.remember_url("http://x/img.png", SHA_A)
+        self.assertIsNone(self.open_cache().get_by_url("http://x/img.png", "ocr"))  # 尚未落盘
+        cache.flush()
+        self.assertEqual(self.open_cache().get_by_url("http://x/img.png", "ocr"), "图片文字")
+
+    def test_repeated_parse_cached_hit_does_not_commit(self):
+        cache = self.open_cache()
+        parses = []
+
+        async def fake_run_parse(func, source, *args):
+            parses.append(source)
+            return "解析文本"
+
+        def download():
+            return SpooledDownload(b"%PDF", None, SHA_A, 4)
+
+        async def parse():
+            return await services.parse_cached("pdf", "http://x/file.pdf", download(), None)
+
+        with mock.patch.multiple(services, get_text_cache=lambda: cache, run_parse=fake_run_parse):
+            self.assertEqual(asyncio.run(parse()), "解析文本")
+            with mock.patch.object(cache, "_conn", wraps=cache._conn) as conn:
+                for _ in range(3):
+                    self.assertEqual(asyncio.run(parse()), "解析文本")
+                conn.commit.assert_not_called()
+        self.assertEqual(len(parses), 1)
+
+    def test_missing_file_is_dropped_from_index(self):
+        cache = self.open_cache()
+        cache.put(SHA_A, "pdf", "正文")
+        cache._path(SHA_A, "pdf").unlink()
+        self.assertIsNone(cache.get(SHA_A, "pdf"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_size_survives_reopen(self):
+        cache = self.open_cache()
+        cache.put(SHA_A, "pdf", "正文")
+        cache.put(SHA_A, "pdf", "更长的正文")  # 覆盖写入只计最新大小
+        self.assertEqual(self.open_cache().stats()["size_bytes"], len("更长的正文".encode("utf-8")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,246 @@
+"""vector_store/services.py：按外部ID幂等写入、查询嵌入缓存等核心逻辑（使用内存中的假集合与假模型）。"""
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from NRS_backend.vector_store import services
+from NRS_backend.vector_store.config import VectorSettings
+from NRS_backend.vector_store.models import DocumentPayload
+from NRS_backend.vector_store.services import QueryEmbeddingCache, VectorService
+
+
+def _matches(metadata: dict, where: dict) -> bool:
+    if "$or" in where:
+        return any(_matches(metadata, clause) for clause in where["$or"])
+    for field, condition in where.items():
+        if isinstance(condition, dict) and "$in" in condition:
+            if metadata.get(field) not in condition["$in"]:
+                return False
+        elif metadata.get(field) != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    """实现本服务用到的Chroma集合接口子集。"""
+
+    def __init__(self):
+        self.rows = {}  # id -> (document, metadata)
+        self.fail_upsert = False
+
+    def get(self, ids=None, where=None, include=None):
+        selected = [
+            row_id
+            for row_id, (_, metadata) in self.rows.items()
+            if (ids is None or row_id in ids) and (where is None or _matches(metadata, where))
+        ]
+        return {"ids": selected}
+
+    def delete(self, ids=None, where=None):
+        for row_id in self.get(ids=ids, where=where)["ids"]:
+            del self.rows[row_id]
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        if self.fail_upsert:
+            raise RuntimeError("disk error")
+        for row_id, document, metadata in zip(ids, documents, metadatas):
+            self.rows[row_id] = (document, metadata)
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.fail = False
+        self.encoded = []
+
+    def encode(self, texts, batch_size, normalize_embeddings):
+        self.encoded.extend(texts)
+        if self.fail:
+            raise MemoryError("model OOM")
+        return np.ones((len(texts), 4))
+
+
+class UpsertDocumentsTests(unittest.TestCase):
+    def setUp(self):
+        db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(db_dir.cleanup)
+        self.service = VectorService(VectorSettings(db_path=db_dir.name, chunk_size=10, chunk_overlap=0))
+        self.addCleanup(self.service.shutdown)
+        self.collection = FakeCollection()
+        self.embedder = FakeEmbedder()
+        self.service._collection = self.collection
+        self.service._embedder = self.embedder
+
+    def upsert(self, document_id: str, text: str):
+        return self.service._upsert_documents_sync([DocumentPayload(document_id=document_id, text=text)])
+
+    def test_reupsert_replaces_chunks(self):
+        self.upsert("doc", "第一段内容很长。" * 5)
+        old_ids = set(self.collection.rows)
+        self.assertGreater(len(old_ids), 1)
+        self.upsert("doc", "短文本")
+        self.assertEqual(set(self.collection.rows), {"doc"})
+
+    def test_shrinking_document_drops_extra_chunks(self):
+        self.upsert("doc", "第一段内容很长。" * 8)
+        self.upsert("doc", "第二段内容。" * 3)
+        parents = {metadata.get("parent_doc") for _, metadata in self.collection.rows.values()}
+        self.assertEqual(parents, {"doc"})
+        self.assertTrue(all("第一段" not in document for document, _ in self.collection.rows.values()))
+        self.assertTrue(all(meta["total_chunks"] == len(self.collection.rows) for _, meta in self.collection.rows.values()))
+
+    def test_embedding_failure_keeps_existing_chunks(self):
+        self.upsert("doc", "第一段内容很长。" * 5)
+        before = dict(self.collection.rows)
+        self.embedder.fail = True
+        with self.assertRaises(MemoryError):
+            self.upsert("doc", "新版本")
+        self.assertEqual(self.collection.rows, before)
+
+    def test_upsert_failure_keeps_existing_chunks(self):
+        self.upsert("doc", "短文本")
+        before = dict(self.collection.rows)
+        self.collection.fail_upsert = True
+        with self.assertRaises(RuntimeError):
+            self.upsert("doc", "第一段内容很长。" * 5)
+        self.assertEqual(self.collection.rows, before)
+
+
+class IdAllocationTests(unittest.TestCase):
+    def setUp(self):
+        db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(db_dir.cleanup)
+        self.db_path = db_dir.name
+
+    def service(self):
+        service = VectorService(VectorSettings(db_path=self.db_path, id_block_size=10))
+        self.addCleanup(service.shutdown)
+        return service
+
+    def allocate(self, service, count):
+        return [int(service._allocate_id()) for _ in range(count)]
+
+    def test_reload_continues_past_reserved_ceiling(self):
+        first = self.service()
+        self.assertEqual(self.allocate(first, 3), [1, 2, 3])
+        self.assertEqual(self.allocate(self.service(), 2), [11, 12])  # 重启后跳过未用完的号段
+
+    def test_services_sharing_a_store_get_disjoint_blocks(self):
+        first, second = self.service(), self.service()
+        ids = self.allocate(first, 1) + self.allocate(second, 1) + self.allocate(first, 10) + self.allocate(second, 10)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids[:2], [1, 11])
+
+    def test_clear_restarts_numbering(self):
+        service = self.service()
+        service._collection = FakeCollection()
+        service._client = mock.Mock()
+        self.allocate(service, 3)
+        with mock.patch.object(service, "_get_collection"):
+            service._clear_db_sync()
+        self.assertEqual(self.allocate(service, 1), [1])
+
+
+class QueryEmbeddingCacheTests(unittest.TestCase):
+    def test_normalized_queries_share_an_entry(self):
+        cache = QueryEmbeddingCache(max_size=4, ttl_seconds=60)
+        cache.put("m", "ＲＡＧ  是什么", np.ones(2))
+        self.assertIsNotNone(cache.get("m", " rag 是什么 "))
+        self.assertIsNone(cache.get("other-model", "rag 是什么"))
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.hit_rate), (1, 1, 0.5))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryEmbeddingCache(max_size=2, ttl_seconds=60)
+        cache.put("m", "a", np.ones(2))
+        cache.put("m", "b", np.ones(2))
+        cache.get("m", "a")
+        cache.put("m", "c", np.ones(2))
+        self.assertIsNone(cache.get("m", "b"))
+        self.assertIsNotNone(cache.get("m", "a"))
+        self.assertEqual(cache.stats().evictions, 1)
+
+    def test_expired_entries_miss(self):
+        cache = QueryEmbeddingCache(max_size=2, ttl_seconds=60)
+        with mock.patch.object(services.time, "monotonic", return_value=100.0):
+            cache.put("m", "a", np.ones(2))
+        with mock.patch.object(services.time, "monotonic", return_value=161.0):
+            self.assertIsNone(cache.get("m", "a"))
+        self.assertEqual((cache.stats().expirations, cache.stats().size), (1, 0))
+
+    def test_zero_size_disables_cache(self):
+        cache = QueryEmbeddingCache(max_size=0, ttl_seconds=60)
+        cache.put("m", "a", np.ones(2))
+        self.assertIsNone(cache.get("m", "a"))
+        self.assertEqual(cache.stats().size, 0)
+
+
+class EmbedQueryTests(unittest.TestCase):
+    def test_repeated_query_is_encoded_once(self):
+        db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(db_dir.cleanup)
+        service = VectorService(VectorSettings(db_path=db_dir.name))
+        self.addCleanup(service.shutdown)
+        service._embedder = FakeEmbedder()
+
+        async def scenario():
+            await service.embed_query("校历")
+            await service.embed_query(" 校历 ")
+
+        asyncio.run(scenario())
+        self.assertEqual(service._embedder.encoded, ["校历"])
+
+
+class QueryEmbeddingBatcherTests(unittest.TestCase):
+    def setUp(self):
+        db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(db_dir.cleanup)
+        self.service = VectorService(VectorSettings(db_path=db_dir.name, query_batch_wait_ms=50))
+        self.addCleanup(self.service.shutdown)
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+        def fake_embed_texts(texts):
+            self.batches.append(list(texts))
+            self.started.set()
+            self.release.wait(5)
+            return np.ones((len(texts), 4))
+
+        self.service._embed_texts = fake_embed_texts
+        self.batcher = self.service._query_batcher
+
+    def test_concurrent_queries_share_one_encode_call(self):
+        async def scenario():
+            return await asyncio.gather(*(self.batcher.embed(f"问题{index}") for index in range(5)))
+
+        vectors = asyncio.run(scenario())
+        self.assertEqual(len(vectors), 5)
+        self.assertEqual(self.batches, [[f"问题{index}" for index in range(5)]])
+        stats = self.batcher.stats()
+        self.assertEqual((stats.batches, stats.items, stats.max_batch_size, stats.avg_batch_size), (1, 5, 5, 5.0))
+        self.assertGreater(stats.max_queue_wait_ms, 0)
+
+    def test_close_during_flush_does_not_strand_callers(self):
+        self.release.clear()
+        self.addCleanup(self.release.set)
+
+        async def scenario():
+            pending = [asyncio.ensure_future(self.batcher.embed(text)) for text in ("a", "b")]
+            while not self.started.is_set():
+                await asyncio.sleep(0.01)
+            self.batcher.close()
+            return await asyncio.wait_for(asyncio.gather(*pending, return_exceptions=True), timeout=2)
+
+        results = asyncio.run(scenario())
+        self.assertTrue(all(isinstance(result, asyncio.CancelledError) for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""crawler/workers.py：解析任务超时后回收进程池、结束卡住的子进程并重试被连带中断的任务。"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+import unittest
+from unittest import mock
+
+from NRS_backend.crawler import workers
+
+
+def _wait_for_no_children(timeout: float) -> list:
+    deadline = time.monotonic() + timeout
+    while True:
+        children = multiprocessing.active_children()
+        if not children or time.monotonic() > deadline:
+            return children
+        time.sleep(0.1)
+
+
+class RunCpuTaskTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(workers, PARSE_WORKERS=1, PARSE_TASK_TIMEOUT=1.0, _pool=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(workers.shutdown)
+
+    def test_returns_result(self):
+        self.assertEqual(asyncio.run(workers.run_cpu_task(max, 3, 7)), 7)
+
+    def test_timeouts_do_not_leak_hung_processes(self):
+        for _ in range(3):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(workers.run_cpu_task(time.sleep, 60))
+        self.assertEqual(_wait_for_no_children(5), [])
+
+    def test_concurrent_task_survives_another_tasks_timeout(self):
+        async def scenario():
+            hung = asyncio.ensure_future(workers.run_cpu_task(time.sleep, 60))
+            await asyncio.sleep(1.5)
+            bystander = asyncio.ensure_future(workers.run_cpu_task(time.sleep, 1.0))  # 回收进程池时仍在运行
+            with self.assertRaises(RuntimeError):
+                await hung
+            self.assertIsNone(await bystander)
+
+        with mock.patch.multiple(workers, PARSE_WORKERS=2, PARSE_TASK_TIMEOUT=2.0):
+            asyncio.run(scenario())
+        workers.shutdown()  # 重试使用的新进程池
+        self.assertEqual(_wait_for_no_children(5), [])
+
+    def test_shutdown_terminates_running_tasks(self):
+        async def scenario():
+            task = asyncio.ensure_future(workers.run_cpu_task(time.sleep, 60))
+            await asyncio.sleep(0.5)
+            workers.shutdown()
+            with self.assertRaises(Exception):
+                await task
+
+        with mock.patch.object(workers, "PARSE_TASK_TIMEOUT", 30.0):
+            asyncio.run(scenario())
+        self.assertEqual(_wait_for_no_children(5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
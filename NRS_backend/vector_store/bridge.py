@@ -1,21 +1,58 @@
 """Lightweight helpers for intra-process vector service calls."""  # 进程内向量服务调用的轻量级助手
 from __future__ import annotations  # 兼容未来类型注解语法
 
-from typing import Any, Dict  # 类型注解：Any用于任意类型，Dict用于字典
+from typing import Any, Dict, List, Tuple  # 类型注解：Any用于任意类型，Dict用于字典，List用于列表，Tuple用于元组
 
 from .models import DocumentPayload, VectorSearchRequest, VectorSearchResponse  # 导入向量存储数据模型
 from .services import vector_service  # 导入向量存储服务实例
 
 
-async def store_document(document_id: str, text: str, metadata: Dict[str, Any]) -> bool:
+def _build_payload(document_id: str, text: str, metadata: Dict[str, Any]) -> DocumentPayload:
     safe_metadata = dict(metadata or {})  # 创建元数据的安全副本，避免修改原字典
     safe_metadata.setdefault("original_id", document_id)  # 设置默认的原始ID
     url = safe_metadata.get("url")  # 从元数据中获取URL
-    payload = DocumentPayload(text=text, metadata=safe_metadata, url=url)  # 创建文档载荷对象
+    return DocumentPayload(text=text, metadata=safe_metadata, url=url, document_id=document_id)  # 以爬虫ID幂等写入
+
+
+async def store_document(document_id: str, text: str, metadata: Dict[str, Any]) -> bool:
+    payload = _build_payload(document_id, text, metadata)  # 创建文档载荷对象
     response = await vector_service.upsert_document(payload)  # 调用向量服务的文档插入/更新方法
     return response.status.lower() in {"stored", "queued", "updated"}  # 返回操作是否成功的布尔值
 
 
+async def store_documents(documents: List[Tuple[str, str, Dict[str, Any]]]) -> bool:
+    payloads = [_build_payload(doc_id, text, metadata) for doc_id, text, metadata in documents]  # (ID, 文本, 元数据) 转为载荷
+    responses = await vector_service.upsert_documents(payloads)  # 一次批量嵌入 + 一次upsert
+    return all(r.status.lower() in {"stored", "queued", "updated"} for r in responses)  # 全部成功才返回True
+
+
 async def search_documents(query: str, top_k: int = 5) -> VectorSearchResponse:
     request = VectorSearchRequest(query=query, top_k=top_k)  # 创建搜索请求对象
     return await vector_service.search(request)  # 调用向量服务的搜索方法并返回响应
+
+
+async def embed_query(query: str) -> List[float]:
+    vector = await vector_service.embed_query(query)  # 复用查询嵌入缓存与合批器
+    return vector.tolist()  # 转为普通列表，避免调用方依赖numpy
+
+
+def data_version() -> int:
+    return vector_service.data_version  # 向量库数据版本号，写入/清库后变化
+
+
+def is_ready() -> bool:
+    if vector_service.ready:  # 模型与客户端均已加载
+        return True
+    return not vector_service.settings.warmup_on_startup  # 未启用预热时按需加载，不阻塞就绪
+
+
+def readiness() -> Dict[str, Any]:
+    if is_ready():
+        return {"status": "ready"}
+    if vector_service.warmup_error:  # 预热失败，后台正在退避重试
+        return {
+            "status": "warmup_failed",
+            "error": vector_service.warmup_error,
+            "attempts": vector_service.warmup_attempts,
+        }
+    return {"status": "warming_up"}  # 预热进行中
@@ -17,6 +17,17 @@ class VectorSettings(BaseSettings):
     enable_chunking: bool = False  # 是否启用分块，默认False
     chunk_size: int = 500  # 分块大小，默认500字符
     chunk_overlap: int = 50  # 分块重叠大小，默认50字符
+    embedding_batch_size: int = 32  # 单次encode的批大小，默认32条
+    id_block_size: int = 1000  # 文档ID每次预留的号段大小，号段用完才写一次counter.json
+    executor_workers: int = 2  # 嵌入与Chroma I/O专用线程池的工作线程数
+    executor_queue_size: int = 64  # 线程池有界队列长度（排队+执行中的任务上限）
+    query_batch_max_size: int = 32  # 查询嵌入合批的最大批大小
+    query_batch_wait_ms: float = 5.0  # 查询嵌入合批的等待窗口（毫秒）
+    query_cache_size: int = 1024  # 查询嵌入LRU缓存容量，0表示禁用
+    query_cache_ttl: float = 3600.0  # 查询嵌入缓存条目存活时间（秒），<=0表示永不过期
+    warmup_on_startup: bool = True  # 应用启动后是否在后台预热嵌入模型与ChromaDB客户端
+    warmup_retry_initial: float = 5.0  # 预热失败后首次重试前的等待秒数，之后每次翻倍
+    warmup_retry_max: float = 300.0  # 预热重试的最长等待秒数
     HOST: str = "0.0.0.0"  # 服务主机地址，默认所有接口
     PORT: int = 8000  # 服务端口，默认8000
     DEBUG: bool = True  # 调试模式，默认True
@@ -0,0 +1,54 @@
+"""Lifespan hooks for the vector store module."""  # 向量存储模块的生命周期钩子
+from __future__ import annotations  # 兼容未来类型注解语法
+
+import asyncio  # 后台预热任务
+import contextlib  # 异常抑制工具
+import logging  # 日志记录
+from contextlib import asynccontextmanager  # lifespan上下文管理器
+
+from fastapi import FastAPI  # 导入FastAPI主类
+
+from .services import vector_service  # 导入向量存储服务实例
+
+logger = logging.getLogger(__name__)  # 获取当前模块日志对象
+
+
+async def _warm_up() -> None:
+    """Warm up until it succeeds, backing off between failed attempts."""  # 预热直到成功，失败后指数退避重试
+    settings = vector_service.settings
+    delay = max(0.1, settings.warmup_retry_initial)  # 首次重试前的等待秒数
+    while True:
+        vector_service.warmup_attempts += 1
+        try:
+            await vector_service.warm_up()  # 加载嵌入模型并打开ChromaDB客户端
+        except Exception as exc:  # noqa: BLE001
+            vector_service.warmup_error = f"{type(exc).__name__}: {exc}"  # 供 /ready 展示失败原因
+            logger.warning(
+                "Vector store warm-up failed (attempt %d), retrying in %.0fs: %s",
+                vector_service.warmup_attempts,
+                delay,
+                exc,
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.warmup_retry_max)  # 指数退避，不超过上限
+            continue
+        vector_service.warmup_error = None
+        logger.info("Vector store warm-up finished")  # 预热完成日志
+        return
+
+
+@asynccontextmanager
+async def vector_store_lifespan(app: FastAPI):
+    """Warm up the model in the background and release the executor on shutdown."""  # 后台预热模型，关闭时释放线程池
+    warmup_task = None  # 预热任务，不阻塞应用启动
+    if vector_service.settings.warmup_on_startup:
+        warmup_task = asyncio.create_task(_warm_up())  # 启动后台预热
+    try:
+        yield  # 应用运行期间
+    finally:
+        if warmup_task is not None and not warmup_task.done():
+            warmup_task.cancel()  # 关闭时取消尚未完成的预热
+            with contextlib.suppress(asyncio.CancelledError):
+                await warmup_task
+        vector_service.shutdown()  # 关闭专用线程池
+        logger.info("Stopped vector store executor")  # 停止日志
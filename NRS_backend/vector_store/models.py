@@ -12,6 +12,7 @@ class DocumentPayload(BaseModel):
     text: str = Field(..., description="需要做嵌入的原始文本内容")  # 文本字段：必填，描述需要嵌入的原始文本
     metadata: Dict[str, Any] = Field(default_factory=dict)  # 元数据字段：默认空字典
     url: Optional[str] = Field(default=None, description="文档来源链接")  # URL字段：可选，默认None，描述文档来源链接
+    document_id: Optional[str] = Field(default=None, description="稳定的外部文档ID，重复写入时替换旧分块")  # 外部ID字段：可选，提供时按该ID幂等写入
 
 
 class VectorSearchRequest(BaseModel):
@@ -53,3 +54,28 @@ class DocumentGetResponse(BaseModel):
 
 class ClearDbResponse(BaseModel):
     status: str  # 状态字段：字符串类型
+
+
+class EmbeddingBatcherStats(BaseModel):
+    batches: int = 0  # 已执行的批次数
+    items: int = 0  # 已嵌入的查询总数
+    avg_batch_size: float = 0.0  # 平均批大小
+    max_batch_size: int = 0  # 最大批大小
+    avg_queue_wait_ms: float = 0.0  # 平均排队时长（毫秒）
+    max_queue_wait_ms: float = 0.0  # 最大排队时长（毫秒）
+    pending: int = 0  # 当前排队中的查询数
+
+
+class QueryCacheStats(BaseModel):
+    size: int = 0  # 当前条目数
+    max_size: int = 0  # 容量上限
+    hits: int = 0  # 命中次数
+    misses: int = 0  # 未命中次数
+    evictions: int = 0  # 容量淘汰次数
+    expirations: int = 0  # 过期淘汰次数
+    hit_rate: float = 0.0  # 命中率
+
+
+class VectorStatsResponse(BaseModel):
+    query_batcher: EmbeddingBatcherStats  # 查询嵌入合批指标
+    query_cache: QueryCacheStats  # 查询嵌入缓存指标
@@ -7,6 +7,7 @@
   - /vectors/documents  文档写入/更新
   - /vectors/cleardb    清空向量库
   - /vectors/search/{id} 查询单个文档
+  - /vectors/stats      运行指标（查询合批、查询嵌入缓存等）
 """
 from __future__ import annotations  # 兼容未来类型注解语法
 
@@ -20,6 +21,7 @@ from .models import (  # 导入数据模型
     DocumentUpsertResponse,  # 文档写入响应体
     VectorSearchRequest,     # 检索请求体
     VectorSearchResponse,    # 检索响应体
+    VectorStatsResponse,     # 运行指标响应体
 )
 from .services import vector_service  # 导入向量存储服务实例
 
@@ -65,8 +67,8 @@ async def get_document(document_id: str) -> DocumentGetResponse:
 #
 # POST /vectors/documents
 # 说明：
-#   - 请求体：文档内容、元数据等
-#   - 用于新增或更新向量库中的文档
+#   - 请求体：文档内容、元数据等，可选 document_id
+#   - 用于新增或更新向量库中的文档；传入 document_id 时替换该ID已有的分块，重复写入不会产生重复数据
 #
 @router.post("/documents", response_model=DocumentUpsertResponse)  # 定义POST /documents端点
 async def add_document(payload: DocumentPayload) -> DocumentUpsertResponse:
@@ -89,3 +91,17 @@ async def clear_db() -> ClearDbResponse:
     返回：ClearDbResponse
     """
     return await vector_service.clear_db()  # 调用清空数据库方法
+
+#
+# GET /vectors/stats
+# 说明：
+#   - 返回向量服务运行指标（查询嵌入合批的批大小、排队时长，查询嵌入缓存的命中/未命中/淘汰次数等）
+#   - 供监控/调参使用
+#
+@router.get("/stats", response_model=VectorStatsResponse)  # 定义GET /stats端点
+async def get_stats() -> VectorStatsResponse:
+    """
+    向量服务运行指标。
+    返回：VectorStatsResponse
+    """
+    return VectorStatsResponse(**vector_service.stats())  # 汇总服务指标
@@ -1,16 +1,30 @@
 """Core business logic for the vector store module."""  # 向量存储模块的核心业务逻辑
 from __future__ import annotations  # 兼容未来类型注解语法
 
+import asyncio  # 异步调度，用于把阻塞调用转交给专用线程池
+import functools  # 偏函数，用于包装带参数的阻塞调用
 import json  # JSON数据处理
 import os  # 操作系统接口，用于文件操作
-from typing import Dict, List  # 类型注解：Dict字典，List列表
+import threading  # 线程锁，保护跨线程共享的计数器文件
+import time  # 计时，用于统计排队等待时长
+import unicodedata  # Unicode规范化，用于归一化查询文本
+from collections import OrderedDict  # 有序字典，实现LRU淘汰
+from contextlib import contextmanager  # 计数器文件锁的上下文管理器
+from concurrent.futures import ThreadPoolExecutor  # 线程池执行器，承载嵌入与Chroma I/O
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar  # 类型注解：Dict字典，List列表，Callable可调用对象
 
-import chromadb  # ChromaDB向量数据库客户端
 import numpy as np  # NumPy数组处理
-from chromadb.config import Settings as ChromaSettings  # ChromaDB配置设置
 from fastapi import HTTPException  # FastAPI HTTP异常
 from langchain_text_splitters import RecursiveCharacterTextSplitter  # 递归字符文本分割器
-from sentence_transformers import SentenceTransformer  # 句子变换器，用于文本嵌入
+
+try:
+    import fcntl  # POSIX文件锁，多个进程共享counter.json时串行化号段预留
+except ImportError:  # pragma: no cover - Windows下没有fcntl，退化为仅进程内加锁
+    fcntl = None
+
+if TYPE_CHECKING:  # 仅用于类型注解；chromadb与sentence_transformers导入较慢，在首次使用时才导入
+    from chromadb.api import ClientAPI  # ChromaDB客户端类型
+    from sentence_transformers import SentenceTransformer  # 句子变换器类型
 
 from .config import VectorSettings, get_settings  # 导入配置类和工厂函数
 from .models import (  # 导入数据模型
@@ -19,51 +33,315 @@ from .models import (  # 导入数据模型
     DocumentGetResponse,  # 文档获取响应
     DocumentPayload,  # 文档载荷
     DocumentUpsertResponse,  # 文档插入响应
+    EmbeddingBatcherStats,  # 查询嵌入批处理统计
+    QueryCacheStats,  # 查询嵌入缓存统计
     VectorMatch,  # 向量匹配
     VectorSearchRequest,  # 向量搜索请求
     VectorSearchResponse,  # 向量搜索响应
 )
 
+T = TypeVar("T")  # 阻塞调用返回值的泛型类型
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query vectors with per-entry TTL."""  # 带过期时间的有界LRU查询向量缓存
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self._max_size = max(0, max_size)  # 最大条目数，0表示禁用缓存
+        self._ttl = ttl_seconds  # 条目存活时间（秒），<=0表示永不过期
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, np.ndarray]]" = OrderedDict()  # 键 -> (写入时间, 向量)
+        self._hits = 0  # 命中次数
+        self._misses = 0  # 未命中次数
+        self._evictions = 0  # 因容量淘汰的次数
+        self._expirations = 0  # 因过期淘汰的次数
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        normalized = unicodedata.normalize("NFKC", query)  # 全角/半角等统一
+        return " ".join(normalized.split()).lower()  # 折叠空白并转小写
+
+    def get(self, model: str, query: str) -> Optional[np.ndarray]:
+        if not self._max_size:  # 缓存已禁用
+            return None
+        key = (model, self.normalize(query))  # 缓存键：模型名 + 归一化查询
+        entry = self._entries.get(key)  # 查找条目
+        if entry is None:
+            self._misses += 1
+            return None
+        stored_at, vector = entry
+        if self._ttl > 0 and time.monotonic() - stored_at > self._ttl:  # 条目已过期
+            del self._entries[key]
+            self._expirations += 1
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)  # 标记为最近使用
+        self._hits += 1
+        return vector
+
+    def put(self, model: str, query: str, vector: np.ndarray) -> None:
+        if not self._max_size:  # 缓存已禁用
+            return
+        key = (model, self.normalize(query))  # 缓存键
+        self._entries[key] = (time.monotonic(), vector)  # 写入/覆盖条目
+        self._entries.move_to_end(key)  # 标记为最近使用
+        while len(self._entries) > self._max_size:  # 超出容量时淘汰最久未使用的条目
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()  # 清空全部条目
+
+    def stats(self) -> QueryCacheStats:
+        lookups = self._hits + self._misses  # 总查询次数
+        return QueryCacheStats(
+            size=len(self._entries),  # 当前条目数
+            max_size=self._max_size,  # 容量上限
+            hits=self._hits,  # 命中次数
+            misses=self._misses,  # 未命中次数
+            evictions=self._evictions,  # 容量淘汰次数
+            expirations=self._expirations,  # 过期淘汰次数
+            hit_rate=round(self._hits / lookups, 4) if lookups else 0.0,  # 命中率
+        )
+
+
+class QueryEmbeddingBatcher:
+    """Coalesces concurrent single-query embeddings into batched encode calls."""  # 将并发的单条查询嵌入合并为批量encode
+
+    def __init__(self, service: "VectorService", max_batch_size: int, max_wait_ms: float) -> None:
+        self._service = service  # 所属的向量服务，用于执行实际的批量嵌入
+        self._max_batch_size = max(1, max_batch_size)  # 单批最多合并的查询数
+        self._max_wait = max(0.0, max_wait_ms) / 1000.0  # 首条查询入队后最多等待的秒数
+        self._queue: Optional[asyncio.Queue] = None  # 待嵌入查询队列，随工作协程一起延迟创建
+        self._worker: Optional[asyncio.Task] = None  # 后台合批协程
+        self._taken: List[Tuple[str, asyncio.Future, float]] = []  # 已出队、尚未返回结果的查询（收集中或嵌入中的批次）
+        self._batches = 0  # 已执行的批次数
+        self._items = 0  # 已嵌入的查询总数
+        self._max_batch_seen = 0  # 观测到的最大批大小
+        self._wait_total = 0.0  # 累计排队等待时长（秒）
+        self._wait_max = 0.0  # 最大排队等待时长（秒）
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Queue one query and wait for its vector from the next batch."""  # 入队单条查询并等待所在批次返回向量
+        queue = self._ensure_worker()  # 确保后台合批协程已启动
+        future: asyncio.Future = asyncio.get_running_loop().create_future()  # 调用方等待的结果占位
+        await queue.put((text, future, time.perf_counter()))  # 入队：文本、结果占位、入队时间
+        return await future  # 等待批次完成后返回向量
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        if self._worker is None or self._worker.done():  # 首次使用或协程已退出时重建
+            self._queue = asyncio.Queue()  # 新建队列（绑定当前事件循环）
+            self._worker = asyncio.create_task(self._run())  # 启动后台合批协程
+        return self._queue  # 返回当前队列
+
+    async def _run(self) -> None:
+        queue = self._queue  # 绑定本协程使用的队列
+        loop = asyncio.get_running_loop()  # 获取事件循环，用于计算截止时间
+        try:
+            while True:
+                batch = self._taken = [await queue.get()]  # 阻塞等待第一条查询
+                deadline = loop.time() + self._max_wait  # 本批最晚的发车时间
+                while len(batch) < self._max_batch_size:  # 未满批时继续收集
+                    remaining = deadline - loop.time()  # 剩余等待时间
+                    if remaining <= 0:  # 超过等待窗口，只收集已在队列中的查询
+                        if queue.empty():
+                            break
+                        batch.append(queue.get_nowait())
+                        continue
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))  # 在窗口内等待更多查询
+                    except asyncio.TimeoutError:
+                        break  # 窗口结束，发车
+                await self._flush(batch)  # 执行一次批量嵌入
+                self._taken = []
+        finally:
+            self._cancel_taken()  # 协程被取消时，已出队的调用方不能一直等待
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        live = [item for item in batch if not item[1].done()]  # 跳过调用方已取消的查询
+        if not live:
+            return
+        started = time.perf_counter()  # 发车时间
+        for _, _, enqueued in live:  # 记录每条查询的排队时长
+            waited = started - enqueued
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        self._batches += 1  # 批次数+1
+        self._items += len(live)  # 累加查询数
+        self._max_batch_seen = max(self._max_batch_seen, len(live))  # 更新最大批大小
+        try:
+            vectors = await self._service._run_blocking(self._service._embed_texts, [text for text, _, _ in live])  # 一次批量encode
+        except Exception as exc:  # noqa: BLE001
+            for _, future, _ in live:  # 把异常传递给本批所有调用方
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future, _), vector in zip(live, vectors):  # 按顺序把向量交还给各调用方
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> EmbeddingBatcherStats:
+        """Snapshot of batching metrics."""  # 批处理指标快照
+        return EmbeddingBatcherStats(
+            batches=self._batches,  # 批次数
+            items=self._items,  # 查询总数
+            avg_batch_size=round(self._items / self._batches, 3) if self._batches else 0.0,  # 平均批大小
+            max_batch_size=self._max_batch_seen,  # 最大批大小
+            avg_queue_wait_ms=round(self._wait_total / self._items * 1000, 3) if self._items else 0.0,  # 平均排队时长（毫秒）
+            max_queue_wait_ms=round(self._wait_max * 1000, 3),  # 最大排队时长（毫秒）
+            pending=self._queue.qsize() if self._queue is not None else 0,  # 当前排队中的查询数
+        )
+
+    def _cancel_taken(self) -> None:
+        for _, future, _ in self._taken:
+            if not future.done():
+                future.cancel()
+        self._taken = []
+
+    def close(self) -> None:
+        """Stop the background worker (queued and in-flight callers are cancelled)."""  # 停止后台合批协程
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()  # 取消协程
+        self._cancel_taken()  # 取消已出队、正在收集或嵌入中的调用方
+        if self._queue is not None:  # 取消仍在排队的调用方
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                future.cancel()
+        self._worker = None  # 清空协程对象
+
 
 class VectorService:
     """Encapsulates embedding, chunking and ChromaDB persistence."""  # 封装嵌入、分块和ChromaDB持久化的服务类
 
     def __init__(self, settings: VectorSettings | None = None) -> None:
         self.settings = settings or get_settings()  # 初始化设置，如果未提供则使用默认配置
-        self._client = chromadb.PersistentClient(  # 创建持久化ChromaDB客户端
-            path=self.settings.db_path,  # 指定数据库路径
-            settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True),  # 配置设置：禁用匿名遥测，允许重置
-        )
+        self._client: Optional["ClientAPI"] = None  # ChromaDB客户端，首次使用时创建
         self._collection = None  # 集合对象，延迟初始化
-        self._embedder = self._init_embedder()  # 初始化嵌入器
+        self._embedder: Optional["SentenceTransformer"] = None  # 嵌入模型，首次使用或预热时加载
+        self._init_lock = threading.Lock()  # 保护客户端与模型的延迟初始化
+        self._executor = ThreadPoolExecutor(  # 嵌入与Chroma I/O专用线程池，避免阻塞事件循环
+            max_workers=max(1, self.settings.executor_workers),  # 工作线程数
+            thread_name_prefix="vector-io",  # 线程名前缀，便于排查
+        )
+        self._id_lock = threading.Lock()  # ID分配锁，写入可能在多个工作线程中并发执行
+        self._next_id = 0  # 下一个可分配的ID，0表示尚未预留号段
+        self._id_ceiling = 0  # 当前已预留号段的上界（已持久化到counter.json）
+        self._pending = asyncio.Semaphore(max(1, self.settings.executor_queue_size))  # 有界队列：限制排队+执行中的任务数
+        self._data_version = 0  # 数据版本号，每次写入/清库后递增，供下游缓存判断失效
+        self.warmup_attempts = 0  # 后台预热已尝试的次数
+        self.warmup_error: Optional[str] = None  # 最近一次预热失败的原因，成功后清空
+        self._query_cache = QueryEmbeddingCache(  # 查询嵌入LRU缓存
+            max_size=self.settings.query_cache_size,  # 容量上限
+            ttl_seconds=self.settings.query_cache_ttl,  # 条目存活时间
+        )
+        self._query_batcher = QueryEmbeddingBatcher(  # 查询嵌入合批器
+            self,
+            max_batch_size=self.settings.query_batch_max_size,  # 单批最多合并的查询数
+            max_wait_ms=self.settings.query_batch_wait_ms,  # 合批等待窗口（毫秒）
+        )
+
+    async def _run_blocking(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a blocking embedding/Chroma call on the dedicated executor."""  # 在专用线程池中执行阻塞调用
+        async with self._pending:  # 队列已满时在此等待，形成反压
+            loop = asyncio.get_running_loop()  # 获取当前事件循环
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args))  # 提交到线程池并等待结果
+
+    def shutdown(self) -> None:
+        """Release the executor threads (called on application shutdown)."""  # 关闭线程池
+        self._query_batcher.close()  # 停止查询合批协程
+        self._executor.shutdown(wait=False, cancel_futures=True)  # 不等待执行中的任务，取消排队任务
+
+    def _init_embedder(self) -> "SentenceTransformer":
+        from sentence_transformers import SentenceTransformer  # 延迟导入，避免拖慢应用启动
 
-    def _init_embedder(self) -> SentenceTransformer:
         load_kwargs = {"token": self.settings.HF_TOKEN} if self.settings.HF_TOKEN else {}  # 如果有HF令牌则添加到加载参数
         return SentenceTransformer(self.settings.embedding_model, **load_kwargs)  # 创建句子变换器实例
 
+    def _get_embedder(self) -> "SentenceTransformer":
+        if self._embedder is None:  # 首次使用时加载模型
+            with self._init_lock:  # 避免并发请求重复加载
+                if self._embedder is None:
+                    self._embedder = self._init_embedder()  # 初始化嵌入器
+        return self._embedder
+
+    def _get_client(self) -> "ClientAPI":
+        if self._client is None:  # 首次使用时打开持久化客户端
+            with self._init_lock:
+                if self._client is None:
+                    import chromadb  # 延迟导入，避免拖慢应用启动
+                    from chromadb.config import Settings as ChromaSettings  # ChromaDB配置设置
+
+                    self._client = chromadb.PersistentClient(  # 创建持久化ChromaDB客户端
+                        path=self.settings.db_path,  # 指定数据库路径
+                        settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True),  # 配置设置：禁用匿名遥测，允许重置
+                    )
+        return self._client
+
+    @property
+    def ready(self) -> bool:
+        """Whether the embedding model and Chroma client are loaded."""  # 模型与客户端是否均已加载
+        return self._embedder is not None and self._client is not None
+
+    def _warm_up_sync(self) -> None:
+        self._get_client()  # 打开ChromaDB客户端
+        self._get_collection()  # 获取或创建集合
+        self._embed_texts(["warm up"])  # 加载模型并完成一次前向计算
+
+    async def warm_up(self) -> None:
+        """Load the model and open the Chroma client in the background."""  # 后台预热：加载模型并打开客户端
+        await self._run_blocking(self._warm_up_sync)  # 在专用线程池中执行，不阻塞事件循环
+
     def _get_collection(self):
         if self._collection is None:  # 如果集合未初始化
-            self._collection = self._client.get_or_create_collection(  # 获取或创建集合
+            self._collection = self._get_client().get_or_create_collection(  # 获取或创建集合
                 name="documents",  # 集合名称
                 metadata={"hnsw:space": "cosine"},  # 元数据：使用余弦相似度
             )
         return self._collection  # 返回集合对象
 
     def _allocate_id(self) -> str:
-        os.makedirs(self.settings.db_path, exist_ok=True)  # 确保数据库目录存在
-        counter_path = os.path.join(self.settings.db_path, "counter.json")  # 计数器文件路径
-        current = 0  # 当前计数器值
-        if os.path.exists(counter_path):  # 如果计数器文件存在
+        with self._id_lock:  # 串行化分配，避免并发写入拿到相同ID
+            if self._next_id == 0 or self._next_id > self._id_ceiling:  # 号段未加载或已用完
+                self._reserve_id_block_locked()  # 预留下一个号段
+            allocated = self._next_id  # 从内存号段中分配
+            self._next_id += 1  # 移动游标
+            return str(allocated)  # 返回字符串形式的ID
+
+    def _counter_path(self) -> str:
+        return os.path.join(self.settings.db_path, "counter.json")  # 计数器文件路径
+
+    @contextmanager
+    def _counter_file_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self._counter_path()}.lock", "a", encoding="utf-8") as handle:  # 独立的锁文件，不随counter.json替换
+            fcntl.flock(handle, fcntl.LOCK_EX)  # 阻塞直到其他进程完成预留
             try:
-                with open(counter_path, "r", encoding="utf-8") as handle:  # 读取计数器文件
-                    data = json.load(handle)  # 解析JSON数据
-                    current = int(data.get("value", 0))  # 获取当前值
-            except Exception:  # 异常处理
-                current = 0  # 默认值为0
-        nxt = current + 1  # 计算下一个ID
-        with open(counter_path, "w", encoding="utf-8") as handle:  # 写入新的计数器值
-            json.dump({"value": nxt}, handle)  # 保存为JSON
-        return str(nxt)  # 返回字符串形式的ID
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read_counter(self) -> int:
+        try:
+            with open(self._counter_path(), "r", encoding="utf-8") as handle:  # 读取计数器文件
+                return int(json.load(handle).get("value", 0))  # 所有进程中已预留到的最大值
+        except FileNotFoundError:  # 尚未分配过ID
+            return 0
+        except Exception:  # 文件损坏
+            return 0  # 默认值为0
+
+    def _reserve_id_block_locked(self) -> None:
+        os.makedirs(self.settings.db_path, exist_ok=True)  # 确保数据库目录存在
+        counter_path = self._counter_path()  # 计数器文件路径
+        with self._counter_file_lock():  # 多个进程（如多个uvicorn worker）共享同一向量库时互斥
+            current = max(self._read_counter(), self._id_ceiling)  # 每次都重新读取，其他进程可能已预留更高的号段
+            ceiling = current + max(1, self.settings.id_block_size)  # 新号段上界
+            tmp_path = f"{counter_path}.{os.getpid()}.tmp"  # 先写临时文件再替换，避免写到一半时崩溃损坏计数器
+            with open(tmp_path, "w", encoding="utf-8") as handle:  # 持久化新上界
+                json.dump({"value": ceiling}, handle)  # 保存为JSON
+            os.replace(tmp_path, counter_path)  # 原子替换
+        self._next_id = current + 1  # 号段起点；重启后从上界之后继续，未用完的号段直接跳过
+        self._id_ceiling = ceiling  # 记录上界
 
     def exists(self, document_id: str) -> bool:
         collection = self._get_collection()  # 获取集合
@@ -76,7 +354,11 @@ class VectorService:
     def _embed_texts(self, texts: List[str]) -> np.ndarray:
         if not texts:  # 如果文本列表为空
             return np.empty((0, self.settings.embedding_dim))  # 返回空数组
-        return self._embedder.encode(texts, normalize_embeddings=True)  # 编码文本并归一化嵌入
+        return self._get_embedder().encode(  # 批量编码文本并归一化嵌入
+            texts,
+            batch_size=max(1, self.settings.embedding_batch_size),  # 按配置的批大小切分前向计算
+            normalize_embeddings=True,
+        )
 
     def _chunk_text(self, text: str, chunk_size: int, overlap: int) -> List[str]:
         if len(text) <= chunk_size:  # 如果文本长度小于等于分块大小
@@ -91,47 +373,103 @@ class VectorService:
         )
         return [chunk.strip() for chunk in splitter.split_text(text) if chunk.strip()]  # 分割文本并清理空白
 
+    @property
+    def data_version(self) -> int:
+        return self._data_version  # 当前数据版本号
+
     async def upsert_document(self, payload: DocumentPayload) -> DocumentUpsertResponse:
+        response = await self._run_blocking(self._upsert_document_sync, payload)  # 在专用线程池中执行写入
+        self._data_version += 1  # 写入成功后递增数据版本（仅在事件循环线程中修改）
+        return response
+
+    def _upsert_document_sync(self, payload: DocumentPayload) -> DocumentUpsertResponse:
+        return self._upsert_documents_sync([payload])[0]  # 单文档写入即一个元素的批量写入
+
+    async def upsert_documents(self, payloads: List[DocumentPayload]) -> List[DocumentUpsertResponse]:
+        if not payloads:  # 空批次直接返回
+            return []
+        responses = await self._run_blocking(self._upsert_documents_sync, payloads)  # 在专用线程池中执行批量写入
+        self._data_version += 1  # 写入成功后递增数据版本（仅在事件循环线程中修改）
+        return responses
+
+    def _upsert_documents_sync(self, payloads: List[DocumentPayload]) -> List[DocumentUpsertResponse]:
         collection = self._get_collection()  # 获取集合
-        base_id = self._allocate_id()  # 分配基础ID
-        if len(payload.text) > self.settings.chunk_size:  # 如果文本长度超过分块大小
-            chunks = self._chunk_text(payload.text, self.settings.chunk_size, self.settings.chunk_overlap)  # 分割文本
-            ids: List[str] = []  # ID列表
-            embeddings: List[List[float]] = []  # 嵌入列表
-            documents: List[str] = []  # 文档列表
-            metadatas: List[Dict] = []  # 元数据列表
-            for idx, chunk in enumerate(chunks):  # 遍历分块
-                chunk_id = f"{base_id}_chunk_{idx}"  # 生成分块ID
-                embedding = self._embed_texts([chunk])[0]  # 计算嵌入
-                ids.append(chunk_id)  # 添加ID
-                embeddings.append(embedding.tolist())  # 添加嵌入
-                documents.append(chunk)  # 添加文档
-                meta = {  # 构建元数据
-                    **payload.metadata,  # 复制原始元数据
-                    "parent_doc": base_id,  # 父文档ID
-                    "chunk_index": idx,  # 分块索引
-                    "total_chunks": len(chunks),  # 总分块数
-                }
+        ids: List[str] = []  # ID列表
+        documents: List[str] = []  # 文档列表
+        metadatas: List[Dict] = []  # 元数据列表
+        responses: List[DocumentUpsertResponse] = []  # 每个文档的写入响应
+        last_index = {p.document_id: i for i, p in enumerate(payloads) if p.document_id}  # 同批重复的外部ID只保留最后一次
+        external_ids = list(last_index)  # 本批次需要替换旧分块的外部ID
+        for index, payload in enumerate(payloads):  # 遍历批次中的文档，先展开为待嵌入的文本行
+            if payload.document_id and last_index[payload.document_id] != index:  # 被同批后续载荷覆盖
+                responses.append(DocumentUpsertResponse(document_id=payload.document_id, status="stored"))
+                continue
+            base_id = payload.document_id or self._allocate_id()  # 优先使用外部ID，否则分配计数器ID
+            if len(payload.text) > self.settings.chunk_size:  # 如果文本长度超过分块大小
+                chunks = self._chunk_text(payload.text, self.settings.chunk_size, self.settings.chunk_overlap)  # 分割文本
+                for idx, chunk in enumerate(chunks):  # 遍历分块
+                    ids.append(f"{base_id}_chunk_{idx}")  # 生成分块ID
+                    documents.append(chunk)  # 添加文档
+                    meta = {  # 构建元数据
+                        **payload.metadata,  # 复制原始元数据
+                        "parent_doc": base_id,  # 父文档ID
+                        "chunk_index": idx,  # 分块索引
+                        "total_chunks": len(chunks),  # 总分块数
+                    }
+                    if payload.url is not None:  # 如果有URL
+                        meta["url"] = payload.url  # 添加URL到元数据
+                    metadatas.append(meta)  # 添加元数据
+            else:  # 如果不需要分块
+                meta = dict(payload.metadata)  # 复制元数据
                 if payload.url is not None:  # 如果有URL
-                    meta["url"] = payload.url  # 添加URL到元数据
+                    meta["url"] = payload.url  # 添加URL
+                ids.append(base_id)  # 添加ID
+                documents.append(payload.text)  # 添加文档
                 metadatas.append(meta)  # 添加元数据
-            collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)  # 批量插入
-        else:  # 如果不需要分块
-            embedding = self._embed_texts([payload.text])[0]  # 计算嵌入
-            meta = dict(payload.metadata)  # 复制元数据
-            if payload.url is not None:  # 如果有URL
-                meta["url"] = payload.url  # 添加URL
-            collection.upsert(  # 插入单个文档
-                ids=[base_id],  # ID列表
-                embeddings=[embedding.tolist()],  # 嵌入列表
-                documents=[payload.text],  # 文档列表
-                metadatas=[meta],  # 元数据列表
-            )
-        return DocumentUpsertResponse(document_id=base_id, status="stored")  # 返回插入响应
+            responses.append(DocumentUpsertResponse(document_id=base_id, status="stored"))  # 记录响应
+        embeddings = self._embed_texts(documents)  # 整个批次只做一次批量嵌入
+        stale_ids = self._existing_ids(collection, external_ids) - set(ids) if external_ids else set()  # 新版本中已不存在的旧分块
+        collection.upsert(  # 整个批次只做一次upsert
+            ids=ids,  # ID列表
+            embeddings=[embedding.tolist() for embedding in embeddings],  # 嵌入列表
+            documents=documents,  # 文档列表
+            metadatas=metadatas,  # 元数据列表
+        )
+        if stale_ids:  # 按外部ID幂等写入：新分块写入成功后才删除多余的旧分块，嵌入或写入失败时旧数据保持不变
+            collection.delete(ids=sorted(stale_ids))
+        return responses  # 返回插入响应
+
+    @staticmethod
+    def _existing_ids(collection, external_ids: List[str]) -> set:
+        """Ids currently stored for the given external document ids."""  # 外部ID对应的已有文档与分块ID
+        direct = collection.get(ids=external_ids, include=[])  # 未分块时文档ID即外部ID
+        derived = collection.get(  # 分块文档及旧版本按计数器ID写入、仅在元数据中记录original_id的文档
+            where={"$or": [{"parent_doc": {"$in": external_ids}}, {"original_id": {"$in": external_ids}}]},
+            include=[],
+        )
+        return set(direct.get("ids") or []) | set(derived.get("ids") or [])
+
+    async def embed_query(self, query: str) -> np.ndarray:
+        model = self.settings.embedding_model  # 模型名参与缓存键，切换模型后旧向量不会被复用
+        cached = self._query_cache.get(model, query)  # 先查缓存
+        if cached is not None:
+            return cached
+        vector = await self._query_batcher.embed(query)  # 未命中则经合批器计算查询嵌入
+        self._query_cache.put(model, query, vector)  # 写入缓存
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        return {  # 汇总各组件的运行指标
+            "query_batcher": self._query_batcher.stats(),
+            "query_cache": self._query_cache.stats(),
+        }
 
     async def search(self, request: VectorSearchRequest) -> VectorSearchResponse:
+        query_embedding = await self.embed_query(request.query)  # 计算查询文本的嵌入（与并发查询合批）
+        return await self._run_blocking(self._search_sync, request, query_embedding)  # 在专用线程池中执行检索
+
+    def _search_sync(self, request: VectorSearchRequest, query_embedding: np.ndarray) -> VectorSearchResponse:
         collection = self._get_collection()  # 获取集合
-        query_embedding = self._embed_texts([request.query])[0]  # 计算查询文本的嵌入
         raw = collection.query(  # 执行向量查询
             query_embeddings=[query_embedding.tolist()],  # 查询嵌入
             n_results=request.top_k,  # 返回结果数量
@@ -168,6 +506,9 @@ class VectorService:
         return VectorSearchResponse(results=matches, query=request.query, top_k=request.top_k)  # 返回搜索响应
 
     async def get_document_by_id(self, document_id: str) -> DocumentGetResponse:
+        return await self._run_blocking(self._get_document_by_id_sync, document_id)  # 在专用线程池中执行查询
+
+    def _get_document_by_id_sync(self, document_id: str) -> DocumentGetResponse:
         collection = self._get_collection()  # 获取集合
         result = collection.get(ids=[document_id], include=["documents", "metadatas"])  # 根据ID获取文档
         ids = result.get("ids") or []  # 获取ID列表
@@ -201,18 +542,25 @@ class VectorService:
         return DocumentGetResponse(document_id=document_id, text=joined_content, chunks=out_chunks, metadata=parent_meta)  # 返回文档响应
 
     async def clear_db(self) -> ClearDbResponse:
+        response = await self._run_blocking(self._clear_db_sync)  # 在专用线程池中执行清库
+        self._data_version += 1  # 清库后递增数据版本
+        return response
+
+    def _clear_db_sync(self) -> ClearDbResponse:
         try:
-            self._client.delete_collection("documents")  # 尝试删除集合
+            self._get_client().delete_collection("documents")  # 尝试删除集合
         except Exception:  # 忽略异常
             pass
         self._collection = None  # 重置集合对象
         self._get_collection()  # 重新创建集合
-        counter_path = os.path.join(self.settings.db_path, "counter.json")  # 计数器文件路径
-        try:
-            if os.path.exists(counter_path):  # 如果计数器文件存在
-                os.remove(counter_path)  # 删除计数器文件
-        except Exception:  # 忽略异常
-            pass
+        with self._id_lock:  # 与ID分配互斥
+            self._next_id = 0  # 清空内存号段，下次分配从1开始
+            self._id_ceiling = 0
+            try:
+                if os.path.exists(self._counter_path()):  # 如果计数器文件存在
+                    os.remove(self._counter_path())  # 删除计数器文件
+            except Exception:  # 忽略异常
+                pass
         return ClearDbResponse(status="cleared")  # 返回清空响应
 
 